@@ -1,5 +1,7 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import time
 # from read_repo_to_index import read_all_files
 # from services.pinecone_module import get_pinecone_connector
 # from services.embedding import get_embeddings
@@ -9,7 +11,8 @@ from pydantic import BaseModel
 from utils.process import process_repository
 from utils.retrieval import search_code 
 from template.prompt import get_prompt
-from model.llm import chat
+from model.llm import chat, chat_stream
+from utils.sse import SSE_HEADERS, stream_text_events
 from template.query_optimization import get_optimized_query
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -34,6 +37,7 @@ class deleteIndexRequest(BaseModel):
 class chatRequest(BaseModel):
     index_name: str
     query_text: str
+    stream: bool = False
 
 
 @app.get("/test")
@@ -52,15 +56,23 @@ async def process_repo(req: RepoRequest):
     
 
 @app.post("/chat-with-codebase")
-async def chat_with_codebase(req: chatRequest):
+def chat_with_codebase(req: chatRequest):
     print("Chat with codebase called")
     print(req.index_name, "  ", req.query_text)
     try:
+        started = time.perf_counter()
         # optimized_query=get_optimized_query(req.query_text)
         context=search_code(req.query_text, req.index_name)
         # print("context ", context)
         prompt=get_prompt(context, req.query_text)
         print(prompt)
+        if req.stream:
+            # Context is ready before the response starts, tokens follow as they come
+            return StreamingResponse(
+                stream_text_events(chat_stream(prompt), started),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
         llm_response=chat(prompt)
         return {"status": "success", "llm_response": llm_response}
     except Exception as e:
@@ -1,5 +1,5 @@
 from google import genai
-import os
+import os, time, logging
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,6 +17,23 @@ def chat(prompt):
   except Exception as e:
       print(f"An error occurred during chat: {e}")
       return "Error: Unable to get response from the model."
+
+
+def chat_stream(prompt):
+  """Yield the answer in text chunks as the model generates it."""
+  started = time.perf_counter()
+  first_token_at = None
+  for chunk in client.models.generate_content_stream(
+      model="gemini-2.5-flash",
+      contents=prompt,
+  ):
+      if not chunk.text:
+          continue
+      if first_token_at is None:
+          first_token_at = time.perf_counter()
+          logging.info(f"LLM time to first token: {(first_token_at - started) * 1000:.0f} ms")
+      yield chunk.text
+  logging.info(f"LLM stream finished in {(time.perf_counter() - started) * 1000:.0f} ms")
   
 
 
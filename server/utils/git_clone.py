@@ -1,14 +1,28 @@
 
 
-import uuid, os, git, shutil
+import uuid, os, git, shutil, time, logging
+from utils.parsing import LANGUAGES, DOC_EXTENSIONS, IGNORE_DIRS
 
 
+def get_sparse_patterns():
+    """Only the files the parser reads get their blobs fetched and checked out."""
+    patterns = [f"*.{ext}" for ext in LANGUAGES] + [f"*{ext}" for ext in DOC_EXTENSIONS]
+    patterns += [f"!**/{d}/**" for d in sorted(IGNORE_DIRS)]
+    return patterns
+
 
 def clone_repository(github_url: str) -> str:
+    """Shallow (depth 1), blobless, sparse clone of the default branch."""
     session_id = str(uuid.uuid4())
     local_path = os.path.join("data", "repos", session_id)
-    git.Repo.clone_from(github_url, local_path)
-    print("repo cloned succesfully.")
+    started = time.perf_counter()
+    repo = git.Repo.clone_from(
+        github_url, local_path,
+        multi_options=["--depth=1", "--filter=blob:none", "--no-checkout", "--single-branch"]
+    )
+    repo.git.sparse_checkout("set", "--no-cone", *get_sparse_patterns())
+    repo.git.checkout("--detach", "HEAD")
+    logging.info(f"Repo cloned successfully in {time.perf_counter() - started:.2f}s.")
     return session_id, local_path
 
 
@@ -16,6 +30,6 @@ def clone_repository(github_url: str) -> str:
 
 def cleanup_repo(repo_path: str):
     """Remove cloned repository"""
-    print("clean up successfully")
     if os.path.exists(repo_path):
-        shutil.rmtree(repo_path)
\ No newline at end of file
+        shutil.rmtree(repo_path)
+        logging.info(f"Cleaned up {repo_path}")
@@ -31,6 +31,11 @@ CONFIG = {
     }
 }
 
+# Parsed source files by extension, the chunked doc files, and directories never walked
+LANGUAGES = {'py': 'python', 'js': 'javascript'}
+DOC_EXTENSIONS = ('.md', '.txt')
+IGNORE_DIRS = {'node_modules', '.git'}
+
 parsers_cache = {}
 
 def get_parser(language: str):
@@ -227,7 +232,7 @@ def extract_all_nodes(repo_path: str) -> List[Dict]:
                     file_relationships[relative_path] = file_node.get('imports', [])
                 
                 all_nodes.extend(nodes)
-            elif file.lower().endswith(('.md', 'txt')):
+            elif file.lower().endswith(DOC_EXTENSIONS):
                 file_path = os.path.join(root, file)
                 try:
                     with open(file_path, 'r', encoding='utf-8') as f:
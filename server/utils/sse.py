@@ -0,0 +1,32 @@
+import json, logging, time
+
+# Sent with every event stream so proxies (nginx) don't buffer it
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data, event=None):
+    """One Server-Sent Event frame with a JSON payload."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+def stream_text_events(chunks, started):
+    """
+    SSE frames of a streamed answer: one per text chunk, then "done" with
+    ttft_ms and total_ms from `started` (or "error" if the model fails).
+    """
+    ttft_ms = None
+    try:
+        for text in chunks:
+            if ttft_ms is None:
+                ttft_ms = round((time.perf_counter() - started) * 1000)
+                logging.info(f"Time to first token: {ttft_ms} ms")
+            yield sse_event({"text": text})
+    except Exception as e:
+        logging.error(f"An error occurred during chat stream: {e}")
+        yield sse_event({"detail": str(e)}, event="error")
+        return
+
+    total_ms = round((time.perf_counter() - started) * 1000)
+    logging.info(f"Streamed answer in {total_ms} ms (time to first token {ttft_ms} ms)")
+    yield sse_event({"ttft_ms": ttft_ms, "total_ms": total_ms}, event="done")
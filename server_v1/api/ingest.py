@@ -1,15 +1,57 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from services.ingest.pipeline import run_ingest_pipeline
+from services.ingest.jobs import submit_ingest_job, get_job, get_queue_position, delete_session
 
 router = APIRouter()
 
 class IngestRequest(BaseModel):
     repo_url: str
 
+class UpdateRequest(BaseModel):
+    repo_url: Optional[str] = None
+    commit: Optional[str] = None
 
-@router.post("/")
+
+@router.post("/", status_code=202)
 async def ingest_repo(request: IngestRequest):
-    session_id = run_ingest_pipeline(request.repo_url)
-    return {"status" : "success", "session_id" : session_id}
\ No newline at end of file
+    job = submit_ingest_job(request.repo_url)
+    return {
+        "status" : "success",
+        "job_id" : job.job_id,
+        "session_id" : job.session_id,
+        "phase" : job.phase,
+        "queue_position" : get_queue_position(job)
+    }
+
+
+@router.post("/{session_id}/update", status_code=202)
+async def update_repo(session_id: str, request: UpdateRequest):
+    job = submit_ingest_job(request.repo_url, session_id=session_id, commit=request.commit)
+    return {
+        "status" : "success",
+        "job_id" : job.job_id,
+        "session_id" : job.session_id,
+        "phase" : job.phase,
+        "queue_position" : get_queue_position(job)
+    }
+
+
+@router.get("/{job_id}")
+async def ingest_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Ingest job not found : {job_id}")
+
+    return {
+        "status" : "success",
+        **job.to_dict(),
+        "queue_position" : get_queue_position(job)
+    }
+
+
+@router.delete("/{session_id}")
+def delete_ingested_session(session_id: str):
+    delete_session(session_id)
+    return {"status" : "success", "session_id" : session_id}
@@ -1,7 +1,9 @@
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from services.retreive.pipeline import run_retreival_pipeline
+from services.retreive.pipeline import run_retreival_pipeline, stream_retreival_pipeline
+from core.sse import SSE_HEADERS
 
 
 router = APIRouter()
@@ -9,12 +11,21 @@ router = APIRouter()
 class RetreivalRequest(BaseModel):
     session_id: str
     query: str
+    # Stream the answer as Server-Sent Events instead of one JSON body
+    stream: bool = False
 
 
 @router.post("/")
 async def retreive_answer(request: RetreivalRequest):
-    llm_response = run_retreival_pipeline(
+    if request.stream:
+        return StreamingResponse(
+            await stream_retreival_pipeline(request.session_id, request.query),
+            media_type="text/event-stream",
+            headers=SSE_HEADERS
+        )
+
+    llm_response, cache_status = await run_retreival_pipeline(
         request.session_id,
         request.query
     )
-    return {"status" : "success", "llm_response" : llm_response}
\ No newline at end of file
+    return {"status" : "success", "llm_response" : llm_response, "cache" : cache_status}
\ No newline at end of file
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+
+from services.llm.embedding_cache import get_embedding_cache
+from services.vector_store.factory import get_vector_store
+from services.retreive.query_cache import get_query_cache_stats
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_stats():
+    cache = get_embedding_cache()
+    return {
+        "status" : "success",
+        "embedding_cache" : cache.stats() if cache else None,
+        "vector_store" : get_vector_store().latency_stats(),
+        "query_cache" : get_query_cache_stats()
+    }
@@ -0,0 +1,102 @@
+"""
+Call extraction per chunk: the old multi-pass regex scan over chunk text
+against the single tree-sitter query over the chunk's subtree.
+
+Chunks are cut the way nodes_extractor cuts them (largest AST nodes up to
+MAX_CHUNK_SIZE bytes). For each chunk both extractors run on the same input;
+the report has the time spent in each and how the call sets differ, with a
+few examples of names only one side found. Names only the regex finds are
+mostly the chunk's own definition (`def name(`), or calls mentioned in
+strings and comments.
+
+Run from server_v1/:
+    python -m benchmarks.call_extraction ../server_v1 ../client/src
+"""
+import argparse, json, time
+from collections import Counter
+from typing import Dict, List
+
+from services.ingest.file_traversal import collect_files
+from services.ingest.nodes_extractor import MAX_CHUNK_SIZE
+from services.ingest.parser import get_parser
+from services.ingest.helper.call_extractor import extract_calls_from_node
+from services.ingest.helper.regex_extractor.extract_calls import extract_calls_from_text
+
+
+def collect_chunks(paths: List[str]) -> List[Dict]:
+    chunks = []
+    for repo_path in paths:
+        for file_path, language in collect_files(repo_path):
+            if language is None:
+                continue
+            with open(file_path, 'rb') as f:
+                code = f.read()
+            tree = get_parser(language).parse(code)
+
+            stack = [tree.root_node]
+            while stack:
+                node = stack.pop()
+                if node.end_byte - node.start_byte <= MAX_CHUNK_SIZE:
+                    text = node.text.decode('utf-8', errors='ignore')
+                    if text.strip():
+                        chunks.append({"node": node, "text": text, "language": language, "file": file_path})
+                else:
+                    stack.extend(node.children)
+    return chunks
+
+
+def timed(extract, chunks: List[Dict], repeat: int):
+    best, results = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        results = [extract(chunk) for chunk in chunks]
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="source trees to use as the corpus")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--examples", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    chunks = collect_chunks(args.paths)
+    regex_ms, regex_calls = timed(lambda c: extract_calls_from_text(c["text"], c["language"]), chunks, args.repeat)
+    ast_ms, ast_calls = timed(lambda c: extract_calls_from_node(c["node"], c["language"]), chunks, args.repeat)
+
+    only_regex, only_ast, identical = Counter(), Counter(), 0
+    for old, new in zip(regex_calls, ast_calls):
+        identical += old == new
+        only_regex.update(old - new)
+        only_ast.update(new - old)
+
+    result = {
+        "files": len({c["file"] for c in chunks}),
+        "chunks": len(chunks),
+        "bytes": sum(len(c["text"]) for c in chunks),
+        "regex_ms": round(regex_ms, 1),
+        "ast_ms": round(ast_ms, 1),
+        "speedup": round(regex_ms / ast_ms, 2) if ast_ms else None,
+        "identical_chunks": identical,
+        "calls_regex": sum(len(c) for c in regex_calls),
+        "calls_ast": sum(len(c) for c in ast_calls),
+        "only_regex": dict(only_regex.most_common(args.examples)),
+        "only_ast": dict(only_ast.most_common(args.examples)),
+    }
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+
+    print(f"{result['files']} files, {result['chunks']} chunks, {result['bytes']} bytes")
+    print(f"regex: {result['regex_ms']} ms   ast: {result['ast_ms']} ms   speedup: {result['speedup']}x")
+    print(f"identical call sets: {identical} of {len(chunks)} chunks")
+    print(f"calls found: regex {result['calls_regex']}, ast {result['calls_ast']}")
+    print(f"most common only in regex: {result['only_regex']}")
+    print(f"most common only in ast:   {result['only_ast']}")
+
+
+if __name__ == "__main__":
+    main()
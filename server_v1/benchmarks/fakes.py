@@ -0,0 +1,102 @@
+"""
+Local stand-ins for the services the ingest path writes to, so the
+benchmarks run without Neo4j or an embedding API.
+
+install_storage_fakes() swaps them into services.ingest.storage:
+  - a Neo4j driver whose sessions and write transactions accept queries and
+    count the rows they were given, without keeping them
+  - an embedding function returning small constant vectors, optionally
+    after a delay per node
+  - a vector store that keeps vectors on the nodes, like the neo4j backend
+"""
+import os, time
+
+# The LLM modules read their keys at import, and storage builds its Neo4j
+# driver at import (it only connects on first use). The stand-ins never call out.
+os.environ.setdefault("LLM_API_KEY", "benchmark")
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+os.environ.setdefault("NEO4J_PASSWORD", "benchmark")
+
+from typing import Callable, Dict, List, Optional
+
+
+class FakeResult:
+    def consume(self):
+        return None
+
+    def single(self):
+        return None
+
+    def __iter__(self):
+        return iter(())
+
+
+class FakeTransaction:
+    def __init__(self, driver: "FakeNeo4jDriver"):
+        self.driver = driver
+
+    def run(self, query: str, rows: Optional[List[Dict]] = None, **params):
+        self.driver.queries += 1
+        self.driver.rows += len(rows or ())
+        return FakeResult()
+
+
+class FakeSession(FakeTransaction):
+    def execute_write(self, fn: Callable, *args):
+        self.driver.transactions += 1
+        return fn(FakeTransaction(self.driver), *args)
+
+    execute_read = execute_write
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeNeo4jDriver:
+    def __init__(self):
+        self.queries = 0
+        self.transactions = 0
+        self.rows = 0
+
+    def session(self, **kwargs):
+        return FakeSession(self)
+
+
+class FakeVectorStore:
+    name = "fake"
+    stores_on_nodes = True
+
+    def upsert(self, session_id, ids, embeddings):
+        pass
+
+    append = upsert
+
+    def flush(self, session_id):
+        pass
+
+
+def fake_embeddings(dim: int, ms_per_node: float = 0.0):
+    def get_embeddings(chunks: List[str], progress_callback=None, task_type: str = "RETRIEVAL_DOCUMENT"):
+        # Stands in for the API round trips; sleeping frees the GIL as network waits do
+        if ms_per_node:
+            time.sleep(len(chunks) * ms_per_node / 1000)
+        if progress_callback:
+            progress_callback(len(chunks), len(chunks))
+        # A list per chunk, as the real client returns, so held embeddings cost what they would
+        return [[0.0] * dim for _ in chunks]
+    return get_embeddings
+
+
+def install_storage_fakes(dim: int = 8, embed_ms_per_node: float = 0.0) -> FakeNeo4jDriver:
+    import services.ingest.storage as storage
+
+    driver = FakeNeo4jDriver()
+    storage.neo4j_driver = driver
+    storage.get_embeddings = fake_embeddings(dim, embed_ms_per_node)
+    storage.get_vector_store = lambda: FakeVectorStore()
+    storage.ensure_session_vector_index = lambda session_id: None
+    storage.migrate_to_session_vector_indexes = lambda session: None
+    return driver
@@ -0,0 +1,210 @@
+"""
+Import extraction time against file size: regex_extractor.extract_imports,
+linear in the file, against the previous version (kept below as
+legacy_extract_imports), which looked every match up again with
+code_str.find and so grew with matches x file size.
+
+Files are generated: --imports import statements spread through filler code
+that mentions the imported names again, the way real modules use what they
+import. The report also counts statements where the two versions disagree;
+for Python these are the legacy version's bogus direct imports read out of
+`from a.b.c import x` lines, whose 'from' sat outside its 10 character window.
+
+Run from server_v1/:
+    python -m benchmarks.import_extraction --lines 2000 20000 100000
+"""
+import argparse, json, random, re, time
+from typing import Dict, List
+
+from services.ingest.helper.regex_extractor.extract_imports import extract_imports
+
+
+def legacy_extract_imports(code_str: str, language: str) -> List[Dict[str, any]]:
+    """extract_imports as it was before, verbatim."""
+    imports = []
+
+    if language == 'python':
+        # Pattern: from module import item1, item2, item3
+        from_import_pattern = r'from\s+([a-zA-Z0-9_.]+)\s+import\s+([^;\n]+)'
+        matches = re.findall(from_import_pattern, code_str, re.MULTILINE)
+        for module, items_str in matches:
+            # Split items and clean them
+            items = [item.strip().split(' as ')[0].strip()
+                    for item in items_str.split(',')]
+            imports.append({
+                'module': module,
+                'items': items,
+                'import_type': 'from_import',
+                'raw_statement': f'from {module} import {items_str}'
+            })
+
+        # Pattern: import module1, module2
+        direct_import_pattern = r'import\s+([a-zA-Z0-9_., ]+)'
+        matches = re.findall(direct_import_pattern, code_str, re.MULTILINE)
+        for modules_str in matches:
+            # Skip if it's part of a 'from ... import' statement
+            if 'from' in code_str[max(0, code_str.find(modules_str)-10):code_str.find(modules_str)]:
+                continue
+            modules = [m.strip().split(' as ')[0].strip()
+                      for m in modules_str.split(',')]
+            for module in modules:
+                imports.append({
+                    'module': module,
+                    'items': [module],  # For direct import, the module itself is the item
+                    'import_type': 'direct_import',
+                    'raw_statement': f'import {module}'
+                })
+
+    elif language in ['javascript', 'typescript']:
+        # Pattern: import { item1, item2 } from 'module'
+        named_import_pattern = r'import\s+\{([^}]+)\}\s+from\s+[\'"]([^\'"]+)[\'"]'
+        matches = re.findall(named_import_pattern, code_str, re.MULTILINE)
+        for items_str, module in matches:
+            items = [item.strip().split(' as ')[0].strip()
+                    for item in items_str.split(',')]
+            imports.append({
+                'module': module,
+                'items': items,
+                'import_type': 'named_import',
+                'raw_statement': f'import {{ {items_str} }} from "{module}"'
+            })
+
+        # Pattern: import defaultItem from 'module'
+        default_import_pattern = r'import\s+([a-zA-Z0-9_$]+)\s+from\s+[\'"]([^\'"]+)[\'"]'
+        matches = re.findall(default_import_pattern, code_str, re.MULTILINE)
+        for item, module in matches:
+            # Skip if it's part of a named import or namespace import
+            if '{' in code_str[max(0, code_str.find(item)-20):code_str.find(item)] or \
+               '*' in code_str[max(0, code_str.find(item)-20):code_str.find(item)]:
+                continue
+            imports.append({
+                'module': module,
+                'items': [item],
+                'import_type': 'default_import',
+                'raw_statement': f'import {item} from "{module}"'
+            })
+
+        # Pattern: import * as namespace from 'module'
+        namespace_import_pattern = r'import\s+\*\s+as\s+([a-zA-Z0-9_$]+)\s+from\s+[\'"]([^\'"]+)[\'"]'
+        matches = re.findall(namespace_import_pattern, code_str, re.MULTILINE)
+        for namespace, module in matches:
+            imports.append({
+                'module': module,
+                'items': [f'* as {namespace}'],
+                'import_type': 'namespace_import',
+                'raw_statement': f'import * as {namespace} from "{module}"'
+            })
+
+        # Pattern: const { item1, item2 } = require('module')
+        require_destructure_pattern = r'(?:const|let|var)\s+\{([^}]+)\}\s*=\s*require\([\'"]([^\'"]+)[\'"]\)'
+        matches = re.findall(require_destructure_pattern, code_str, re.MULTILINE)
+        for items_str, module in matches:
+            items = [item.strip().split(':')[0].strip()
+                    for item in items_str.split(',')]
+            imports.append({
+                'module': module,
+                'items': items,
+                'import_type': 'require_destructure',
+                'raw_statement': f'const {{ {items_str} }} = require("{module}")'
+            })
+
+        # Pattern: const item = require('module')
+        require_pattern = r'(?:const|let|var)\s+([a-zA-Z0-9_$]+)\s*=\s*require\([\'"]([^\'"]+)[\'"]\)'
+        matches = re.findall(require_pattern, code_str, re.MULTILINE)
+        for item, module in matches:
+            # Skip if it's destructuring
+            if '{' not in code_str[max(0, code_str.find(item)-5):code_str.find(item)]:
+                imports.append({
+                    'module': module,
+                    'items': [item],
+                    'import_type': 'require',
+                    'raw_statement': f'const {item} = require("{module}")'
+                })
+
+        # Pattern: export { item1 } from 'module'
+        re_export_pattern = r'export\s+\{([^}]+)\}\s+from\s+[\'"]([^\'"]+)[\'"]'
+        matches = re.findall(re_export_pattern, code_str, re.MULTILINE)
+        for items_str, module in matches:
+            items = [item.strip().split(' as ')[0].strip()
+                    for item in items_str.split(',')]
+            imports.append({
+                'module': module,
+                'items': items,
+                'import_type': 're_export',
+                'raw_statement': f'export {{ {items_str} }} from "{module}"'
+            })
+
+    return imports
+
+
+def generate_file(language: str, lines: int, imports: int, rng: random.Random) -> str:
+    names = [f"name{i}" for i in range(imports)]
+    statements = []
+    for i, name in enumerate(names):
+        if language == 'python':
+            statements.append(f"import pkg{i}.mod" if i % 2 else f"from pkg{i}.mod import {name}, other{i}")
+        else:
+            statements.append(f"import {{ {name} }} from './mod{i}'" if i % 2 else f"import {name.title()} from './mod{i}'")
+
+    out, every = [], max(1, lines // max(1, imports))
+    for line in range(lines):
+        if line % every == 0 and statements:
+            out.append(statements.pop(0))
+        else:
+            used = rng.choice(names)
+            out.append(f"    value = {used}(x) + {used.title()}.call()  # uses {used}")
+    return "\n".join(out)
+
+
+def timed(extract, code: str, language: str, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = extract(code, language)
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def statement_keys(imports: List[Dict]) -> set:
+    return {(i['import_type'], i['module'], tuple(i['items'])) for i in imports}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[2000, 20000, 100000])
+    parser.add_argument("--imports-per-1k-lines", type=int, default=20)
+    parser.add_argument("--languages", nargs="+", default=["python", "javascript"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    results = []
+    for language in args.languages:
+        for lines in args.lines:
+            code = generate_file(language, lines, lines * args.imports_per_1k_lines // 1000, rng)
+            legacy_ms, legacy = timed(legacy_extract_imports, code, language, args.repeat)
+            linear_ms, linear = timed(extract_imports, code, language, args.repeat)
+            results.append({
+                "language": language,
+                "lines": lines,
+                "kb": len(code) // 1024,
+                "legacy_ms": round(legacy_ms, 2),
+                "linear_ms": round(linear_ms, 2),
+                "speedup": round(legacy_ms / linear_ms, 1) if linear_ms else None,
+                "statements": len(linear),
+                "differing": len(statement_keys(legacy) ^ statement_keys(linear)),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'language':>10} {'lines':>7} {'kb':>6} {'legacy_ms':>10} {'linear_ms':>10} {'speedup':>8} {'stmts':>6} {'diff':>5}")
+    for r in results:
+        print(f"{r['language']:>10} {r['lines']:>7} {r['kb']:>6} {r['legacy_ms']:>10} {r['linear_ms']:>10} "
+              f"{r['speedup']:>8} {r['statements']:>6} {r['differing']:>5}")
+
+
+if __name__ == "__main__":
+    main()
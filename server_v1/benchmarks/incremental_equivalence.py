@@ -0,0 +1,302 @@
+"""
+Check that an incremental ingest leaves the same graph as a full ingest of
+the new commit.
+
+A generated repo (synthetic_repo.py) gets a package whose __init__.py
+re-exports a function of one of its modules, and a file outside it that
+imports the function from the package and calls it. Callers like that hold
+no IMPORTS_FROM edge into the module, only a package import. The repo is
+committed, then changed: the re-exported module and a few generated files
+are modified, one file is deleted and one added.
+
+A second run fails the update between its writes, checks the session is
+left marked dirty at the old commit, and that the next update rebuilds it.
+
+The graph of the first commit is loaded into an in-memory store standing in
+for the Neo4j helpers pipeline uses, run_incremental_ingest_pipeline brings
+it to the second commit, and the nodes and edges are compared to a full
+extraction of the second commit. Embeddings and the Neo4j writes themselves
+are not exercised, see ingest_stages.py for those.
+
+Run from server_v1/:
+    python -m benchmarks.incremental_equivalence --files 200
+"""
+import argparse, logging, os, shutil, subprocess, sys, tempfile
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+import benchmarks.fakes  # noqa: F401, environment defaults for the service imports
+
+# Files up to MAX_CHUNK_SIZE are a single chunk, the docstring makes each
+# definition a node of its own
+DOCSTRING = '"""\n' + "Fixture of the incremental ingest check.\n" * 40 + '"""\n\n'
+PACKAGE_INIT = DOCSTRING + "from .impl import scale_all\n"
+PACKAGE_IMPL = DOCSTRING + '''def scale_all(values, factor):
+    """Every value times factor."""
+    return [value * factor for value in values]
+'''
+PACKAGE_IMPL_CHANGED = DOCSTRING + '''def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+def scale_all(values, factor):
+    """Every value times factor, clamped."""
+    return [clamp(value * factor, -100, 100) for value in values]
+'''
+PACKAGE_CALLER = DOCSTRING + '''from tools import scale_all
+
+
+def report(values):
+    return sum(scale_all(values, 2))
+'''
+
+
+class MemoryGraph:
+    """Nodes and (source, type, target) edges of one session, written like Neo4j would."""
+
+    def __init__(self):
+        self.nodes: Dict[str, Dict] = {}
+        self.edges: Set[Tuple[str, str, str]] = set()
+        self.info: Dict = {}
+
+    def add_nodes(self, nodes: List[Dict]):
+        for node in nodes:
+            self.nodes[node["id"]] = {
+                "id": node["id"],
+                "name": node.get("name"),
+                "ast_type": node.get("ast_type"),
+                "file": node.get("file"),
+                "language": node.get("language"),
+                "metadata": node.get("metadata") or {},
+            }
+
+    def add_edges(self, edges: List[Dict]):
+        # MATCH on both ends, an edge to a node not stored is dropped
+        self.edges.update(
+            (edge["source"], edge["type"], edge["target"]) for edge in edges
+            if edge["source"] in self.nodes and edge["target"] in self.nodes
+        )
+
+    def files_of(self, node_id: str) -> str:
+        return self.nodes[node_id]["file"]
+
+
+def git(repo: str, *args: str) -> str:
+    return subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+def write(path: str, text: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def make_history(source: str, files: int) -> Tuple[str, str]:
+    """Generated repo plus the re-exporting package, in two commits."""
+    from benchmarks.synthetic_repo import generate_repo
+
+    generate_repo(source, files)
+    write(os.path.join(source, "tools", "__init__.py"), PACKAGE_INIT)
+    write(os.path.join(source, "tools", "impl.py"), PACKAGE_IMPL)
+    write(os.path.join(source, "reports", "summary.py"), PACKAGE_CALLER)
+    git(source, "init", "--quiet")
+    git(source, "add", "-A")
+    git(source, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "--quiet", "-m", "first")
+    first = git(source, "rev-parse", "HEAD")
+
+    write(os.path.join(source, "tools", "impl.py"), PACKAGE_IMPL_CHANGED)
+    modules = sorted(
+        os.path.join(directory, name)
+        for directory, _, names in os.walk(os.path.join(source, "pkg_0"))
+        for name in names if name.startswith("module_")
+    )
+    for path in modules[:3]:
+        with open(path, "a") as f:
+            f.write("\n\ndef extra_total(values):\n    return sum(values)\n")
+    os.remove(modules[3])
+    write(os.path.join(source, "pkg_0", "module_added.py"), (
+        "from pkg_0.module_0 import helper_0_0\n\n\n"
+        "def added(values):\n    return helper_0_0(values)\n"
+    ))
+    git(source, "add", "-A")
+    git(source, "-c", "user.name=bench", "-c", "user.email=bench@localhost", "commit", "--quiet", "-m", "second")
+    return first, git(source, "rev-parse", "HEAD")
+
+
+def checkout(source: str, repo_path: str, commit: str):
+    subprocess.run(["git", "clone", "--quiet", source, repo_path], check=True)
+    git(repo_path, "checkout", "--quiet", commit)
+
+
+def full_graph(repo_path: str) -> MemoryGraph:
+    """What a full ingest stores: every node, then every edge between them."""
+    from services.ingest.file_traversal import extract_all_nodes
+    from services.ingest.storage import build_relationship_edges
+
+    nodes = extract_all_nodes(repo_path, workers=1)
+    graph = MemoryGraph()
+    graph.add_nodes(nodes)
+    graph.add_edges([edge for node in nodes for edge in build_relationship_edges(node)])
+    return graph
+
+
+def install_memory_storage(graph: MemoryGraph, source: str, repo_path: str):
+    """Point the storage, clone and session helpers pipeline calls at `graph`."""
+    import services.ingest.pipeline as pipeline
+    from services.ingest.storage import build_relationship_edges
+
+    def timed_clone(repo_url, session_id, job=None, commit=None, **kwargs):
+        checkout(source, repo_path, commit or "HEAD")
+        return session_id, repo_path
+
+    def get_importer_files(session_id, files):
+        return sorted({
+            graph.files_of(source_id) for source_id, rel_type, target_id in graph.edges
+            if rel_type == "IMPORTS_FROM" and graph.files_of(target_id) in files
+            and graph.files_of(source_id) not in files
+        })
+
+    def get_node_stubs(session_id, exclude_files):
+        return [
+            {**{k: row[k] for k in ("id", "name", "ast_type", "file", "language")}, "relationships": {}, "metadata": {
+                "calls": row["metadata"].get("calls") or [],
+                "is_definition": row["metadata"].get("is_definition"),
+                "definition_type": row["metadata"].get("definition_type"),
+            }}
+            for row in graph.nodes.values()
+            if row["ast_type"] != "ROOT" and row["file"] not in exclude_files
+        ]
+
+    def delete_file_nodes(session_id, files):
+        dropped = {node_id for node_id, row in graph.nodes.items() if row["file"] in files}
+        for node_id in dropped:
+            del graph.nodes[node_id]
+        graph.edges = {edge for edge in graph.edges if edge[0] not in dropped and edge[2] not in dropped}
+
+    def store_nodes_in_neo4j(nodes, session_id, progress_callback=None, on_storing=None):
+        graph.add_nodes(nodes)
+        graph.add_edges([edge for node in nodes for edge in build_relationship_edges(node)])
+
+    def replace_import_edges(session_id, files, nodes):
+        graph.edges = {
+            edge for edge in graph.edges
+            if not (edge[1] == "IMPORTS_FROM" and graph.files_of(edge[0]) in files)
+        }
+        graph.add_edges([edge for node in nodes for edge in build_relationship_edges(node, only_type="IMPORTS_FROM")])
+
+    fakes = {
+        "timed_clone": timed_clone,
+        "get_session_info": lambda session_id: dict(graph.info),
+        "set_session_info": lambda session_id, repo_url, commit: graph.info.update(repo_url=repo_url, commit=commit, dirty=False),
+        "mark_session_dirty": lambda session_id: graph.info.update(dirty=True),
+        "get_importer_files": get_importer_files,
+        "get_node_stubs": get_node_stubs,
+        "delete_file_nodes": delete_file_nodes,
+        "store_nodes_in_neo4j": store_nodes_in_neo4j,
+        "replace_import_edges": replace_import_edges,
+        "write_relationship_edges": lambda edges, session_id: graph.add_edges(edges),
+        "get_call_edges": lambda session_id: ([], {}),
+        "save_call_graph": lambda session_id, call_graph: None,
+        "invalidate_session": lambda session_id: None,
+    }
+    for name, fake in fakes.items():
+        setattr(pipeline, name, fake)
+
+    def run_ingest_pipeline(repo_url, session_id=None, job=None, commit=None):
+        timed_clone(repo_url, session_id, commit=commit)
+        rebuilt = full_graph(repo_path)
+        shutil.rmtree(repo_path)
+        graph.nodes, graph.edges = rebuilt.nodes, rebuilt.edges
+        graph.info = {"root_id": f"{repo_path}:ROOT", "repo_url": repo_url, "commit": commit, "dirty": False}
+        return session_id
+
+    def cleanup_session(session_id):
+        graph.nodes, graph.edges, graph.info = {}, set(), {}
+
+    pipeline.run_ingest_pipeline = run_ingest_pipeline
+    pipeline.cleanup_session = cleanup_session
+
+
+def fail_once(module, name: str):
+    """Make `module.name` raise on its next call only."""
+    original = getattr(module, name)
+
+    def failing(*args, **kwargs):
+        setattr(module, name, original)
+        raise RuntimeError(f"{name} failed")
+
+    setattr(module, name, failing)
+
+
+def compare(label: str, incremental: MemoryGraph, full: MemoryGraph) -> bool:
+    missing_nodes = full.nodes.keys() - incremental.nodes.keys()
+    extra_nodes = incremental.nodes.keys() - full.nodes.keys()
+    missing_edges = full.edges - incremental.edges
+    extra_edges = incremental.edges - full.edges
+
+    print(f"{label}: {len(full.nodes)} nodes, {len(full.edges)} edges in the full ingest")
+    print(f"  nodes missing {len(missing_nodes)}, extra {len(extra_nodes)}")
+    print(f"  edges missing {dict(Counter(t for _, t, _ in missing_edges))}, extra {dict(Counter(t for _, t, _ in extra_edges))}")
+    for source_id, rel_type, target_id in sorted(missing_edges | extra_edges)[:10]:
+        sign = "-" if (source_id, rel_type, target_id) in missing_edges else "+"
+        print(f"    {sign} {source_id} -[{rel_type}]-> {target_id}")
+    return not (missing_nodes or extra_nodes or missing_edges or extra_edges)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200, help="Generated files besides the re-exporting package")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    import services.ingest.pipeline as pipeline
+
+    with tempfile.TemporaryDirectory() as scratch:
+        source = os.path.join(scratch, "source")
+        repo_path = os.path.join(scratch, "checkout")
+        first, second = make_history(source, args.files)
+
+        checkout(source, repo_path, second)
+        expected = full_graph(repo_path)
+        shutil.rmtree(repo_path)
+
+        caller = os.path.join(repo_path, "reports", "summary.py")
+        package_calls = sum(
+            1 for source_id, rel_type, _ in expected.edges
+            if rel_type == "FUNCTION_CALL" and expected.files_of(source_id) == caller
+        )
+        print(f"calls out of the package importer in the full ingest: {package_calls}")
+
+        graph = MemoryGraph()
+        install_memory_storage(graph, source, repo_path)
+
+        def ingest_first_commit():
+            checkout(source, repo_path, first)
+            stored = full_graph(repo_path)
+            shutil.rmtree(repo_path)
+            graph.nodes, graph.edges = stored.nodes, stored.edges
+            graph.info = {"root_id": f"{repo_path}:ROOT", "repo_url": source, "commit": first, "dirty": False}
+
+        ingest_first_commit()
+        pipeline.run_incremental_ingest_pipeline("bench", commit=second)
+        same = compare(f"update {first[:8]}..{second[:8]}", graph, expected)
+
+        # An update failing between its writes leaves the session dirty at
+        # the old commit, the next one rebuilds it
+        ingest_first_commit()
+        fail_once(pipeline, "replace_import_edges")
+        try:
+            pipeline.run_incremental_ingest_pipeline("bench", commit=second)
+        except RuntimeError:
+            pass
+        left_dirty = graph.info.get("dirty") and graph.info.get("commit") == first
+        print(f"failed update left the session dirty at {first[:8]}: {bool(left_dirty)}")
+        pipeline.run_incremental_ingest_pipeline("bench", commit=second)
+        same = compare("update after the failed one", graph, expected) and left_dirty and same
+
+    print("incremental matches full" if same else "incremental differs from full")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Peak memory of an ingest, from traversal to the (faked) Neo4j writes.
+
+Each run is a separate process: it generates a synthetic repo (see
+synthetic_repo.py) and ingests it against the stand-ins of fakes.py, with
+extraction in this process (EXTRACT_WORKERS=1) unless --workers says otherwise.
+  - streaming: pipeline.ingest_checkout, parse / embed / write overlapping
+               through bounded queues, edges written at the end
+  - batch:     extract_all_nodes, then store_nodes_in_neo4j over the list
+
+Reported:
+  - rss_base_mb:  RSS after imports, before the ingest
+  - rss_peak_mb:  peak RSS of the process (ru_maxrss), extraction workers
+                  started with --workers are not included
+  - ingest_mb:    peak minus base, what the ingest itself needed
+  - per_node_b:   ingest_mb spread over the nodes
+
+--embed-ms-per-node gives the fake embedder a latency, which is where the
+overlap of the streaming mode pays off in wall time.
+
+Run from server_v1/:
+    python -m benchmarks.ingest_memory --files 1000 5000
+"""
+import argparse, json, logging, multiprocessing, os, resource, tempfile, time
+from typing import Dict
+
+
+def current_rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_ingest(mode: str, files: int, functions: int, dim: int, embed_ms_per_node: float, workers: int) -> Dict:
+    # Read by file_traversal at import, --workers gets the pool whatever the repo size
+    os.environ["EXTRACT_WORKERS"] = str(workers)
+    os.environ["EXTRACT_PARALLEL_MIN_FILES"] = "0"
+
+    from benchmarks.fakes import install_storage_fakes
+    from benchmarks.synthetic_repo import generate_repo
+    from services.ingest.file_traversal import extract_all_nodes
+    from services.ingest.storage import store_nodes_in_neo4j
+    from services.ingest.pipeline import ingest_checkout
+
+    # Per file ingest logging would dominate the run
+    logging.disable(logging.WARNING)
+    driver = install_storage_fakes(dim, embed_ms_per_node)
+
+    with tempfile.TemporaryDirectory() as repo_path:
+        generate_repo(repo_path, files, functions)
+        rss_base = current_rss_mb()
+
+        started = time.perf_counter()
+        if mode == "streaming":
+            nodes = ingest_checkout(repo_path, "bench")
+        else:
+            nodes = extract_all_nodes(repo_path)
+            store_nodes_in_neo4j(nodes, "bench")
+        total = time.perf_counter() - started
+
+    rss_peak = peak_rss_mb()
+    return {
+        "mode": mode,
+        "files": files,
+        "nodes": len(nodes),
+        "rows_written": driver.rows,
+        "total_s": round(total, 2),
+        "rss_base_mb": round(rss_base, 1),
+        "rss_peak_mb": round(rss_peak, 1),
+        "ingest_mb": round(rss_peak - rss_base, 1),
+        "per_node_b": int((rss_peak - rss_base) * 2**20 / max(1, len(nodes))),
+    }
+
+
+def report_to(conn, fn, *args):
+    conn.send(fn(*args))
+    conn.close()
+
+
+def in_fresh_process(fn, *args) -> Dict:
+    """
+    fn(*args) in a child of this process, which has imported nothing of the
+    ingest yet, so every run starts from the same RSS. Not a Pool worker:
+    those are daemonic and can't start extraction workers. Forked where
+    possible, so the extraction workers inherit the disabled logging too.
+    """
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=report_to, args=(sender, fn, *args))
+    process.start()
+    # Only the child holds the sending end now, so recv() fails instead of hanging if it dies
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        process.join()
+        raise RuntimeError(f"benchmark process exited with code {process.exitcode}") from None
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--modes", nargs="+", default=["batch", "streaming"], choices=["batch", "streaming"])
+    parser.add_argument("--functions-per-file", type=int, default=6)
+    parser.add_argument("--dim", type=int, default=768, help="size of the fake embeddings")
+    parser.add_argument("--embed-ms-per-node", type=float, default=0.0)
+    parser.add_argument("--workers", type=int, default=1, help="extraction worker processes")
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    results = []
+    for files in args.files:
+        for mode in args.modes:
+            results.append(in_fresh_process(
+                run_ingest, mode, files, args.functions_per_file, args.dim, args.embed_ms_per_node, args.workers
+            ))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':>9} {'files':>6} {'nodes':>7} {'rows':>8} {'total_s':>7} {'base_mb':>8} {'peak_mb':>8} {'ingest_mb':>9} {'B/node':>7}")
+    for r in results:
+        print(f"{r['mode']:>9} {r['files']:>6} {r['nodes']:>7} {r['rows_written']:>8} {r['total_s']:>7} {r['rss_base_mb']:>8} "
+              f"{r['rss_peak_mb']:>8} {r['ingest_mb']:>9} {r['per_node_b']:>7}")
+
+
+if __name__ == "__main__":
+    main()
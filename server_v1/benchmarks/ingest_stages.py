@@ -0,0 +1,285 @@
+"""
+Time, throughput and memory of each ingest stage, with the storage faked.
+
+Every repo is ingested in a fresh process, one stage after the other:
+  - traversal:          collect_files and the file index
+  - chunking:           extraction (read, parse, chunk, names), less the two below
+  - call_extraction:    extract_calls_from_node, timed inside the extraction
+  - import_extraction:  extract_imports, timed inside the extraction
+  - import_resolution:  resolve_imports_to_node_ids
+  - call_resolution:    SymbolTable and resolve_cross_file_calls
+  - edge_building:      EdgeArrays rows of every relationship type, CallGraph
+  - storage_incremental: store_nodes_in_neo4j of one batch of files, the
+                        write path of an incremental ingest
+  - storage:            stream_nodes_to_neo4j of every batch, then the
+                        cross-file edges, as pipeline.ingest_checkout writes
+                        a full ingest
+Both storage stages run against the stand-ins of fakes.py; with
+--vector-store local the vectors go to a real LocalVectorStore instead of
+the nodes.
+
+Extraction runs serially so the call and import times can be taken from
+inside it; --workers N adds an extraction_parallel stage with the pool.
+
+Repos are generated ones (synthetic_repo.py) of --files sizes, and the
+--fixtures of fixtures.json: directories of this repository, or public
+repos pinned at a tag and cloned once into --fixture-cache.
+
+Per stage: seconds, files/s, nodes/s (over the files and nodes the stage
+handled), and rss_peak_mb, the process high-water RSS at the end of the
+stage (ru_maxrss, so it only grows).
+
+--output writes the results as JSON, with the commit they were taken at.
+--compare reads such a file and prints each stage's time against it.
+
+Run from server_v1/:
+    python -m benchmarks.ingest_stages --files 1000 10000 50000 --fixtures server_v1 client
+    python -m benchmarks.ingest_stages --files 1000 --output before.json
+    python -m benchmarks.ingest_stages --files 1000 --compare before.json
+"""
+import argparse, json, logging, os, subprocess, sys, tempfile, time
+from typing import Dict, List, Optional
+
+from benchmarks.ingest_memory import current_rss_mb, in_fresh_process, peak_rss_mb
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(os.path.dirname(BENCHMARKS_DIR))
+FIXTURES_FILE = os.path.join(BENCHMARKS_DIR, "fixtures.json")
+
+
+class Accumulated:
+    """Wraps a function and adds up the time spent in it."""
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.seconds = 0.0
+
+    def __call__(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+def run_stages(
+    label: str,
+    repo_path: Optional[str],
+    files: int,
+    functions: int,
+    workers: int,
+    dim: int,
+    vector_store: str = "nodes"
+) -> Dict:
+    from benchmarks.fakes import install_storage_fakes
+    from benchmarks.synthetic_repo import generate_repo
+    import services.ingest.nodes_extractor as nodes_extractor
+    from services.ingest.file_traversal import collect_files, iter_extracted_batches, make_root_node
+    from services.ingest.helper.imports_resolver import build_file_index, resolve_imports_to_node_ids
+    from services.ingest.helper.symbol_table import CallGraph, SymbolTable, resolve_cross_file_calls
+    from services.ingest.storage import EdgeArrays, finish_session_nodes, store_nodes_in_neo4j, write_node_edges
+    from services.ingest.streaming import stream_nodes_to_neo4j
+
+    # Per file ingest logging would dominate the run
+    logging.disable(logging.WARNING)
+    install_storage_fakes(dim)
+
+    stages: List[tuple] = []
+
+    def mark(name: str, seconds: float, files: Optional[int] = None, nodes: Optional[int] = None):
+        stages.append((name, seconds, peak_rss_mb(), files, nodes))
+
+    with tempfile.TemporaryDirectory() as scratch:
+        if vector_store == "local":
+            import services.ingest.storage as storage
+            from services.vector_store.local_store import LocalVectorStore
+            local_store = LocalVectorStore(root=os.path.join(scratch, "vectors"))
+            storage.get_vector_store = lambda: local_store
+        repo_path = repo_path or generate_repo(scratch, files, functions)
+        rss_base = current_rss_mb()
+
+        started = time.perf_counter()
+        files_to_extract = collect_files(repo_path)
+        known_files = build_file_index(files_to_extract, repo_path)
+        mark("traversal", time.perf_counter() - started)
+
+        # Looked up in the extractor's namespace on every call, so wrapped there
+        extract_calls = nodes_extractor.extract_calls_from_node
+        extract_imports = nodes_extractor.extract_imports
+        nodes_extractor.extract_calls_from_node = calls = Accumulated(extract_calls)
+        nodes_extractor.extract_imports = imports = Accumulated(extract_imports)
+        try:
+            started = time.perf_counter()
+            batches = [[make_root_node(repo_path)]]
+            batches.extend(iter_extracted_batches(repo_path, files_to_extract, workers=1))
+            all_nodes = [node for batch_nodes in batches for node in batch_nodes]
+            extraction = time.perf_counter() - started
+        finally:
+            nodes_extractor.extract_calls_from_node = extract_calls
+            nodes_extractor.extract_imports = extract_imports
+        mark("chunking", extraction - calls.seconds - imports.seconds)
+        mark("call_extraction", calls.seconds)
+        mark("import_extraction", imports.seconds)
+
+        if workers > 1:
+            started = time.perf_counter()
+            for _ in iter_extracted_batches(repo_path, files_to_extract, workers=workers, min_files=0):
+                pass
+            mark("extraction_parallel", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        resolve_imports_to_node_ids(all_nodes, repo_path, known_files=known_files)
+        mark("import_resolution", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        resolve_cross_file_calls(all_nodes, SymbolTable(all_nodes, repo_path))
+        mark("call_resolution", time.perf_counter() - started)
+
+        started = time.perf_counter()
+        edges = EdgeArrays(all_nodes)
+        edge_rows = sum(1 for rel_type in edges.by_type for _ in edges.rows(rel_type))
+        CallGraph.from_nodes(all_nodes)
+        mark("edge_building", time.perf_counter() - started)
+
+        # Before the stream, which drops the code text of the nodes it stored
+        changed = batches[1] if len(batches) > 1 else []
+        started = time.perf_counter()
+        store_nodes_in_neo4j(changed, "bench")
+        mark("storage_incremental", time.perf_counter() - started,
+             len({node["file"] for node in changed}), len(changed))
+
+        started = time.perf_counter()
+        stream_nodes_to_neo4j(iter(batches), "bench")
+        finish_session_nodes("bench")
+        write_node_edges(all_nodes, "bench")
+        mark("storage", time.perf_counter() - started)
+
+    file_count, node_count = len(files_to_extract), len(all_nodes)
+
+    def per_second(count: int, seconds: float) -> Optional[int]:
+        return round(count / seconds) if seconds else None
+
+    return {
+        "repo": label,
+        "files": file_count,
+        "nodes": node_count,
+        "edges": edge_rows,
+        "total_s": round(sum(
+            seconds for name, seconds, *_ in stages if name not in ("extraction_parallel", "storage_incremental")
+        ), 3),
+        "rss_base_mb": round(rss_base, 1),
+        "rss_peak_mb": round(peak_rss_mb(), 1),
+        "stages": {
+            name: {
+                "seconds": round(seconds, 3),
+                "files_per_s": per_second(file_count if files is None else files, seconds),
+                "nodes_per_s": per_second(node_count if nodes is None else nodes, seconds),
+                "rss_peak_mb": round(rss_peak, 1),
+            }
+            for name, seconds, rss_peak, files, nodes in stages
+        },
+    }
+
+
+def load_fixtures() -> Dict[str, Dict]:
+    with open(FIXTURES_FILE) as f:
+        return json.load(f)
+
+
+def fixture_path(name: str, fixture: Dict, cache_dir: str) -> str:
+    """Local fixtures are directories of this repository, the others are cloned at their tag once."""
+    if "path" in fixture:
+        return os.path.join(REPO_ROOT, fixture["path"])
+
+    path = os.path.join(cache_dir, f"{name}-{fixture['ref']}")
+    if not os.path.isdir(path):
+        subprocess.run(
+            ["git", "clone", "--quiet", "--depth", "1", "--branch", fixture["ref"], fixture["url"], path],
+            check=True
+        )
+    return path
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict, baseline: Optional[Dict] = None):
+    baseline_cases = {case["repo"]: case for case in (baseline or {}).get("cases", [])}
+    if baseline:
+        print(f"compared with {baseline.get('commit')}, time ratio new/old per stage")
+
+    for case in results["cases"]:
+        print(f"\n{case['repo']}: {case['files']} files, {case['nodes']} nodes, {case['edges']} edges, "
+              f"{case['total_s']} s, peak {case['rss_peak_mb']} MB")
+        print(f"  {'stage':<20} {'seconds':>8} {'files/s':>9} {'nodes/s':>10} {'peak_mb':>8}" + (f" {'vs old':>7}" if baseline else ""))
+        old_stages = baseline_cases.get(case["repo"], {}).get("stages", {})
+        for name, stage in case["stages"].items():
+            line = (f"  {name:<20} {stage['seconds']:>8} {stage['files_per_s'] or '-':>9} "
+                    f"{stage['nodes_per_s'] or '-':>10} {stage['rss_peak_mb']:>8}")
+            if baseline:
+                old = old_stages.get(name, {}).get("seconds")
+                line += f" {round(stage['seconds'] / old, 2) if old else '-':>7}"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, nargs="*", default=[1000, 10000, 50000], help="sizes of generated repos")
+    parser.add_argument("--functions-per-file", type=int, default=6)
+    parser.add_argument("--fixtures", nargs="*", default=[], help="names from fixtures.json")
+    parser.add_argument("--fixture-cache", default=os.path.join(tempfile.gettempdir(), "ingest-bench-fixtures"))
+    parser.add_argument("--workers", type=int, default=1, help="also time extraction with this many worker processes")
+    parser.add_argument("--dim", type=int, default=8, help="size of the fake embeddings")
+    parser.add_argument("--vector-store", choices=["nodes", "local"], default="nodes",
+                        help="vectors on the (fake) nodes, or a real LocalVectorStore in a scratch directory")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures()
+    unknown = [name for name in args.fixtures if name not in fixtures]
+    if unknown:
+        parser.error(f"unknown fixtures {unknown}, fixtures.json has {sorted(fixtures)}")
+
+    cases = [(f"synthetic-{files}", None, files) for files in args.files]
+    for name in args.fixtures:
+        fixture = fixtures[name]
+        label = f"{name}@{fixture['ref']}" if "ref" in fixture else name
+        cases.append((label, fixture_path(name, fixture, args.fixture_cache), 0))
+
+    results = {
+        "commit": current_commit(),
+        "python": sys.version.split()[0],
+        "workers": args.workers,
+        "vector_store": args.vector_store,
+        "cases": [
+            in_fresh_process(run_stages, label, path, files, args.functions_per_file, args.workers, args.dim, args.vector_store)
+            for label, path, files in cases
+        ],
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
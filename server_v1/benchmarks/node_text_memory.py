@@ -0,0 +1,81 @@
+"""
+Memory held for chunk text through extraction and the (faked) writes.
+
+Extracts a synthetic repo (see synthetic_repo.py), or --repo, serially
+under tracemalloc, then embeds and writes the nodes with store_nodes_in_neo4j
+against the stand-ins of fakes.py. Reported per phase:
+  - extract_peak_mb:   peak traced memory while extracting
+  - held_mb:           traced memory the extracted nodes hold afterwards
+  - held_blocks:       allocated blocks they hold (sys.getallocatedblocks)
+  - store_peak_mb:     peak traced memory while embedding and writing them
+
+Embeddings are 8 wide here so the text, not the vectors, dominates.
+
+Run from server_v1/:
+    python -m benchmarks.node_text_memory --files 1000
+    python -m benchmarks.node_text_memory --repo /path/to/checkout
+"""
+import argparse, gc, json, logging, sys, tempfile, time, tracemalloc
+from typing import Dict, Optional
+
+
+def measure(files: int, functions: int, repo: Optional[str] = None) -> Dict:
+    from benchmarks.fakes import install_storage_fakes
+    from benchmarks.synthetic_repo import generate_repo
+    from services.ingest.file_traversal import extract_all_nodes
+    from services.ingest.storage import store_nodes_in_neo4j
+
+    logging.disable(logging.WARNING)
+    install_storage_fakes(8)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        repo_path = repo or generate_repo(scratch, files, functions)
+
+        gc.collect()
+        blocks_before = sys.getallocatedblocks()
+        tracemalloc.start()
+
+        started = time.perf_counter()
+        nodes = extract_all_nodes(repo_path, workers=1)
+        extract_s = time.perf_counter() - started
+        gc.collect()
+        held, extract_peak = tracemalloc.get_traced_memory()
+        held_blocks = sys.getallocatedblocks() - blocks_before
+
+        tracemalloc.reset_peak()
+        started = time.perf_counter()
+        store_nodes_in_neo4j(nodes, "bench")
+        store_s = time.perf_counter() - started
+        _, store_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        "repo": repo or f"synthetic, {files} files",
+        "nodes": len(nodes),
+        "extract_s": round(extract_s, 2),
+        "extract_peak_mb": round(extract_peak / 2**20, 1),
+        "held_mb": round(held / 2**20, 1),
+        "held_blocks": held_blocks,
+        "store_s": round(store_s, 2),
+        "store_peak_mb": round(store_peak / 2**20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--functions-per-file", type=int, default=6)
+    parser.add_argument("--repo", help="an existing checkout instead of a synthetic repo")
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    result = measure(args.files, args.functions_per_file, args.repo)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    for key, value in result.items():
+        print(f"{key:>16}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Throughput of POST /api/retreive against concurrent users on one event loop.
+
+The real router and the real request path run in-process (one loop, like a
+single uvicorn worker): prepare_answer, get_embeddings_async with its rate
+limiter and SQLite cache, session_exists, retrieve_context,
+search_and_expand_async, the call graph load, chat_async. Only the outside
+services are replaced, at the client level:
+  - Neo4j: GraphDriver of retrieval_fakes.py, async sessions that answer the
+    path's own Cypher from the graph of a generated repo
+  - embedding API: genai.embed_content_async, hashed word vectors
+  - LLM: client.aio.models.generate_content
+
+Each stand-in takes --*-ms per round trip, in one of two modes:
+  - async:    the round trip is awaited, as the async driver and clients do
+  - blocking: the round trip is a time.sleep, what a sync driver or client
+              called from the coroutines would amount to. A reference for
+              what a blocking call left in the path looks like.
+
+Besides throughput and latency, a ticker task measures the worst event loop
+lag of each run. In async mode it only holds the CPU work of the requests
+(scoring, token counts); a blocking call anywhere in the path, the stand-ins
+or not, shows up there and flattens throughput as users grow.
+
+Run from server_v1/:
+    python -m benchmarks.retrieval_concurrency --users 1 8 32
+"""
+import os
+
+# The LLM modules read their keys at import, the stand-ins never call out.
+# The query share of the embedding quota would otherwise throttle the run.
+os.environ.setdefault("LLM_API_KEY", "benchmark")
+os.environ.setdefault("EMBED_REQUESTS_PER_MIN", "100000000")
+os.environ.setdefault("EMBED_TOKENS_PER_MIN", "100000000")
+
+import argparse, asyncio, json, logging, tempfile, time, uuid
+from types import SimpleNamespace
+from typing import Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+
+def install_stand_ins(graph, mode: str, args, latency) -> FastAPI:
+    import services.llm.embedding as embedding
+    import services.llm.llm as llm
+    import services.retreive.retrieve_context as retrieve_context
+    from services.ingest.helper.symbol_table import save_call_graph
+    from api.retreive import router as retreive_router
+    from benchmarks.retrieval_fakes import GraphDriver, MemoryVectorStore, hashed_embedding
+
+    blocking = mode == "blocking"
+
+    async def round_trip(ms: float):
+        if blocking:
+            latency.block(ms)
+        else:
+            await latency.wait(ms)
+
+    async def embed_content_async(model, content, task_type, output_dimensionality):
+        await round_trip(args.embed_ms)
+        return {"embedding": [hashed_embedding(text, graph.dim).tolist() for text in content]}
+
+    async def generate_content(model, contents):
+        await round_trip(args.llm_ms)
+        return SimpleNamespace(text=f"answer over {len(contents)} prompt chars")
+
+    # Vectors on the nodes, so lookup and expansion are the one search_and_expand_async query
+    store = MemoryVectorStore(graph, latency, 0)
+    store.stores_on_nodes = True
+    driver = GraphDriver(graph, latency, args.graph_ms, blocking)
+
+    embedding.genai = SimpleNamespace(embed_content_async=embed_content_async)
+    llm.client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=generate_content)))
+    retrieve_context.get_async_neo4j_driver = lambda: driver
+    retrieve_context.get_vector_store = lambda: store
+    save_call_graph("bench", graph.call_graph())
+
+    app = FastAPI()
+    app.include_router(retreive_router, prefix="/api/retreive")
+    return app
+
+
+async def watch_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Worst delay, in ms, of a short sleep on the loop until `stop` is set."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - started - interval)
+    return worst * 1000
+
+
+async def drive(app: FastAPI, users: int, requests_per_user: int, names: List[str]) -> Dict:
+    latencies = []
+
+    async def user(client: httpx.AsyncClient, index: int):
+        for i in range(requests_per_user):
+            # Unique queries, so no cache level short-circuits the pipeline
+            name = names[(index * requests_per_user + i) % len(names)]
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/retreive/",
+                json={"session_id": "bench", "query": f"what does {name} compute {uuid.uuid4()}"}
+            )
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(watch_loop_lag(stop))
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(user(client, index) for index in range(users)))
+        elapsed = time.perf_counter() - started
+    stop.set()
+
+    latencies.sort()
+    return {
+        "users": users,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2], 1),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))], 1),
+        "max_loop_lag_ms": round(await lag, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests-per-user", type=int, default=5)
+    parser.add_argument("--modes", nargs="+", default=["async", "blocking"], choices=["async", "blocking"])
+    parser.add_argument("--files", type=int, default=200, help="Size of the generated repo searched")
+    parser.add_argument("--embed-ms", type=float, default=80)
+    parser.add_argument("--graph-ms", type=float, default=40, help="Neo4j round trip")
+    parser.add_argument("--llm-ms", type=float, default=400)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    # Per request logging (prompts included) would dominate the run
+    logging.disable(logging.WARNING)
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        # Read at import by the cache and call graph modules
+        os.environ["EMBED_CACHE_PATH"] = os.path.join(scratch, "embeddings.sqlite")
+        os.environ["CALL_GRAPH_DIR"] = os.path.join(scratch, "callgraphs")
+
+        from benchmarks.retrieval_fakes import CodeGraph, Latency
+        from benchmarks.synthetic_repo import generate_repo
+
+        graph = CodeGraph.from_repo(generate_repo(os.path.join(scratch, "repo"), args.files))
+        names = sorted({node["name"] for node in graph.nodes if node["ast_type"] == "function_definition"})
+
+        for mode in args.modes:
+            app = install_stand_ins(graph, mode, args, Latency())
+            for users in args.users:
+                results.append({"mode": mode, **asyncio.run(drive(app, users, args.requests_per_user, names))})
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':>8} {'users':>5} {'requests':>8} {'req/s':>7} {'p50_ms':>8} {'p99_ms':>8} {'loop_lag_ms':>11}")
+    for r in results:
+        print(f"{r['mode']:>8} {r['users']:>5} {r['requests']:>8} {r['throughput_rps']:>7} "
+              f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['max_loop_lag_ms']:>11}")
+
+
+if __name__ == "__main__":
+    main()
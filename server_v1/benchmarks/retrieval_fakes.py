@@ -0,0 +1,332 @@
+"""
+Local stand-ins for the services the retrieval path reads from, so load
+tests run without Neo4j, Pinecone or the Gemini APIs.
+
+  - CodeGraph: the nodes and edges of an extracted repo held in memory, with
+    a vector per node. search() is the vector index, expand() follows edges
+    the way expansion_subquery does (outgoing, shortest hop first, capped)
+  - hashed_embedding: a deterministic stand-in for the embedding model, a
+    bag of hashed words. A question naming a function lands near that code.
+  - MemoryVectorStore: Pinecone semantics, ids and scores only, the graph
+    lookup is a separate round trip
+  - GraphDriver: an async Neo4j driver whose sessions answer the retrieval
+    path's own Cypher (session_exists, search_and_expand_async) from a
+    CodeGraph, so the real query code runs against it
+  - FakeLLM: answers after a configurable time to first token and duration
+
+Every stand-in waits a configurable latency per round trip, drawn around
+its mean, and records where request time goes with record_stage().
+"""
+import os
+
+# The LLM modules read their keys at import, and the drivers are built at
+# import (they only connect on first use). The stand-ins never call out.
+os.environ.setdefault("LLM_API_KEY", "benchmark")
+os.environ.setdefault("NEO4J_URI", "bolt://localhost:7687")
+os.environ.setdefault("NEO4J_PASSWORD", "benchmark")
+os.environ.setdefault("PINECONE_API_KEY", "benchmark")
+
+import asyncio, math, random, re, time, zlib
+from collections import deque
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from services.vector_store.base import VectorStore
+
+# Milliseconds per stage of the request being served, set by the load generator
+STAGE_TIMES: ContextVar[Optional[Dict[str, float]]] = ContextVar("stage_times", default=None)
+
+WORD_PATTERN = re.compile(r"[A-Za-z][a-z]+|[A-Z]+(?![a-z])|\d+")
+
+
+def record_stage(stage: str, started: float):
+    """Add the time since `started` to `stage` of the current request."""
+    times = STAGE_TIMES.get()
+    if times is not None:
+        times[stage] = times.get(stage, 0.0) + (time.perf_counter() - started) * 1000
+
+
+class Latency:
+    """Round trip times around a mean, log-normal so a few calls are much slower."""
+
+    def __init__(self, jitter: float = 0.3, seed: int = 0):
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+
+    def draw(self, mean_ms: float) -> float:
+        if mean_ms <= 0:
+            return 0.0
+        if not self.jitter:
+            return mean_ms / 1000
+        # mu shifted so the mean stays mean_ms
+        return self.rng.lognormvariate(math.log(mean_ms) - self.jitter ** 2 / 2, self.jitter) / 1000
+
+    async def wait(self, mean_ms: float):
+        await asyncio.sleep(self.draw(mean_ms))
+
+    def block(self, mean_ms: float):
+        time.sleep(self.draw(mean_ms))
+
+
+def hashed_embedding(text: str, dim: int) -> np.ndarray:
+    """Unit vector of the text's words (camelCase and snake_case split), hashed into `dim` buckets."""
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in WORD_PATTERN.findall(text or ""):
+        vector[zlib.crc32(word.lower().encode()) % dim] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CodeGraph:
+    """
+    One session's graph in memory: nodes as the retrieval queries project
+    them (NODE_PROJECTION, plus the language the old server reads),
+    outgoing edges per node, and a vector matrix.
+    """
+
+    def __init__(self, nodes: List[Dict], dim: int = 256):
+        from services.ingest.storage import iter_relationship_targets
+
+        self.dim = dim
+        self.nodes = [
+            {
+                "id": node["id"],
+                "name": node.get("name") or node.get("ast_type"),
+                "ast_type": node.get("ast_type"),
+                "file": node.get("file"),
+                "language": node.get("language"),
+                "code_str": node.get("code_str") or "",
+                "start_line": node.get("start_line"),
+                "start_byte": node.get("start_byte"),
+                "end_byte": node.get("end_byte"),
+            }
+            for node in nodes
+        ]
+        self.index = {node["id"]: i for i, node in enumerate(self.nodes)}
+        self.edges: List[List[Tuple[int, str]]] = [[] for _ in self.nodes]
+        self.calls: Dict[str, List[str]] = {}
+        for node in nodes:
+            source = self.index[node["id"]]
+            for rel_type, target in iter_relationship_targets(node):
+                if target in self.index:
+                    self.edges[source].append((self.index[target], rel_type))
+                    if rel_type in ("FUNCTION_CALL", "CLASS_CALL"):
+                        self.calls.setdefault(node["id"], []).append(target)
+
+        self.matrix = np.stack([
+            hashed_embedding(f"{node['name']} {node['ast_type']} {node['code_str']}", dim)
+            for node in self.nodes
+        ]) if self.nodes else np.zeros((0, dim), dtype=np.float32)
+
+    @classmethod
+    def from_repo(cls, repo_path: str, dim: int = 256, workers: int = 1) -> "CodeGraph":
+        from services.ingest.file_traversal import extract_all_nodes
+        return cls(extract_all_nodes(repo_path, workers=workers), dim)
+
+    def call_graph(self):
+        from services.ingest.helper.symbol_table import CallGraph
+        return CallGraph.from_edges([node["id"] for node in self.nodes], self.calls)
+
+    def search(self, vector: List[float], k: int) -> List[Tuple[int, float]]:
+        """Top-k node positions by cosine similarity, best first."""
+        if not len(self.nodes):
+            return []
+        scores = self.matrix @ np.asarray(vector, dtype=np.float32)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(i), float(scores[i])) for i in top]
+
+    def expand(self, start: int, hops: int, rel_types: Optional[List[str]], max_neighbours: int) -> List[Dict]:
+        """
+        Neighbours within `hops` outgoing edges, as expansion_subquery returns
+        them: {node, rel_type, hop}, closest first, rel_type of the edge that
+        reaches the neighbour on a shortest path.
+        """
+        seen = {start}
+        neighbours = []
+        frontier = deque([(start, 0)])
+        while frontier and len(neighbours) < max_neighbours:
+            position, hop = frontier.popleft()
+            if hop == hops:
+                continue
+            for target, rel_type in self.edges[position]:
+                if target in seen or (rel_types and rel_type not in rel_types):
+                    continue
+                seen.add(target)
+                neighbours.append({"node": self.nodes[target], "rel_type": rel_type, "hop": hop + 1})
+                frontier.append((target, hop + 1))
+        return neighbours[:max_neighbours]
+
+
+class MemoryVectorStore(VectorStore):
+    """Pinecone semantics over a CodeGraph: ids and scores, no graph data."""
+
+    name = "memory"
+
+    def __init__(self, graph: CodeGraph, latency: Latency, query_ms: float):
+        super().__init__()
+        self.graph = graph
+        self.latency = latency
+        self.query_ms = query_ms
+
+    def upsert(self, session_id, ids, vectors):
+        pass
+
+    def delete(self, session_id, ids):
+        pass
+
+    def delete_session(self, session_id):
+        pass
+
+    def query(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        self.latency.block(self.query_ms)
+        return self.hits(vector, k)
+
+    async def query_async(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        started = time.perf_counter()
+        await self.latency.wait(self.query_ms)
+        hits = self.hits(vector, k)
+        record_stage("vector_search", started)
+        return hits
+
+    def hits(self, vector: List[float], k: int) -> List[Dict]:
+        return [{"id": self.graph.nodes[i]["id"], "score": score} for i, score in self.graph.search(vector, k)]
+
+
+class FakeSession:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeDriver:
+    """Sync or async driver that only hands out sessions, the queries are replaced by CodeGraph stand-ins."""
+
+    def session(self, **kwargs):
+        return FakeSession()
+
+
+class FakeResult:
+    """Records of one fake query, read the way the async driver's result is."""
+
+    def __init__(self, records: List[Dict]):
+        self.records = records
+
+    async def single(self) -> Optional[Dict]:
+        return self.records[0] if self.records else None
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for record in self.records:
+            yield record
+
+
+class GraphSession(FakeSession):
+    """
+    Async session answering the retrieval queries from a CodeGraph after a
+    round trip of `query_ms`. Awaited by default; with `blocking` the round
+    trip is a time.sleep, what a sync driver called from a coroutine does.
+    Any other query raises, so no fallback path is taken silently.
+    """
+
+    HOPS_PATTERN = re.compile(r"\*1\.\.(\d+)")
+
+    def __init__(self, graph: CodeGraph, latency: Latency, query_ms: float, blocking: bool = False):
+        self.graph = graph
+        self.latency = latency
+        self.query_ms = query_ms
+        self.blocking = blocking
+
+    async def run(self, query: str, **params) -> FakeResult:
+        started = time.perf_counter()
+        if self.blocking:
+            self.latency.block(self.query_ms)
+        else:
+            await self.latency.wait(self.query_ms)
+
+        if "db.index.vector.queryNodes" in query and "neighbours" in query:
+            hops = int(self.HOPS_PATTERN.search(query).group(1))
+            records = [
+                {
+                    "node": self.graph.nodes[i],
+                    "score": score,
+                    "neighbours": self.graph.expand(i, hops, params["rel_types"], params["max_neighbours"]),
+                }
+                for i, score in self.graph.search(params["query_vector"], params["k"])
+            ]
+            record_stage("vector_search", started)
+            return FakeResult(records)
+        if "ast_type: 'ROOT'" in query:
+            return FakeResult([{"id": f"{params['session_id']}:ROOT"}])
+        raise RuntimeError(f"GraphSession has no answer for query: {query.strip()[:80]}")
+
+
+class GraphDriver:
+    """Async driver handing out GraphSessions."""
+
+    def __init__(self, graph: CodeGraph, latency: Latency, query_ms: float, blocking: bool = False):
+        self.graph = graph
+        self.latency = latency
+        self.query_ms = query_ms
+        self.blocking = blocking
+
+    def session(self, **kwargs):
+        return GraphSession(self.graph, self.latency, self.query_ms, self.blocking)
+
+
+class FakeLLM:
+    """
+    Answers after `ttft_ms`, the rest of the answer arriving over `total_ms`
+    in `chunks` pieces, with the prompt size echoed so the answer varies.
+    """
+
+    def __init__(self, latency: Latency, ttft_ms: float, total_ms: float, chunks: int = 8):
+        self.latency = latency
+        self.ttft_ms = ttft_ms
+        self.total_ms = total_ms
+        self.chunks = max(1, chunks)
+
+    def answer_parts(self, prompt: str) -> List[str]:
+        return [f"part {i} of an answer over {len(prompt)} prompt chars. " for i in range(self.chunks)]
+
+    def tail_ms(self) -> float:
+        return max(0.0, self.total_ms - self.ttft_ms) / max(1, self.chunks - 1)
+
+    async def chat_async(self, prompt: str) -> str:
+        started = time.perf_counter()
+        await self.latency.wait(self.total_ms)
+        record_stage("llm", started)
+        return "".join(self.answer_parts(prompt))
+
+    async def chat_stream_async(self, prompt: str) -> AsyncIterator[str]:
+        started = time.perf_counter()
+        for i, part in enumerate(self.answer_parts(prompt)):
+            await self.latency.wait(self.ttft_ms if i == 0 else self.tail_ms())
+            yield part
+        record_stage("llm", started)
+
+    def chat(self, prompt: str) -> str:
+        started = time.perf_counter()
+        self.latency.block(self.total_ms)
+        record_stage("llm", started)
+        return "".join(self.answer_parts(prompt))
+
+    def chat_stream(self, prompt: str) -> Iterator[str]:
+        started = time.perf_counter()
+        for i, part in enumerate(self.answer_parts(prompt)):
+            self.latency.block(self.ttft_ms if i == 0 else self.tail_ms())
+            yield part
+        record_stage("llm", started)
@@ -0,0 +1,415 @@
+"""
+Load generator for the question endpoints, with every backend stood in.
+
+N concurrent users each send a run of questions to one endpoint of an
+in-process app:
+  - retreive:            POST /api/retreive of this server
+  - chat-with-codebase:  POST /chat-with-codebase of the old server (../server),
+                         which needs that server's requirements installed
+
+Everything the endpoints call out to is replaced by retrieval_fakes.py,
+built over one repo (synthetic_repo.py, or --repo) extracted into a
+CodeGraph:
+  - embedding model: hashed word vectors, after --embed-ms
+  - vector search and graph: the CodeGraph in memory. With --backend neo4j,
+    search and neighbour expansion are one round trip of --graph-ms, as
+    with vectors on the nodes. With --backend pinecone, the search costs
+    --vector-ms and expansion is a separate --graph-ms round trip.
+  - LLM: an answer after --llm-ttft-ms, complete after --llm-ms
+Round trips are drawn log-normally around those means (--jitter), so the
+tail percentiles mean something.
+
+Questions mix templates over the repo's definitions and files ("Where is X
+defined?", "What calls X?", ...) with repeats of a few popular ones
+(--repeat-ratio, Zipf weighted), so the query and answer caches see
+realistic hits. --stream-ratio of the requests ask for SSE streaming.
+
+Reported per concurrency level:
+  - throughput and p50/p95/p99 latency, and for streamed requests the time
+    to first token the server reports
+  - answers served from cache
+  - mean and p95 ms per request of each stage: embed, vector_search,
+    expansion (node_fetch on the old server), context_build (the rest of
+    retrieval: scoring, dedup, token budgeting) and llm
+
+Run from server_v1/:
+    python -m benchmarks.retrieval_load --users 1 8 32
+    python -m benchmarks.retrieval_load --target chat-with-codebase --users 8
+    python -m benchmarks.retrieval_load --backend pinecone --stream-ratio 0.5 --json
+"""
+import argparse, asyncio, importlib.util, json, logging, os, random, sys, tempfile, time
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+# Sets the settings the server modules need at import, before any is imported
+from benchmarks.retrieval_fakes import (
+    STAGE_TIMES, CodeGraph, FakeDriver, FakeLLM, Latency, MemoryVectorStore, hashed_embedding, record_stage
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+STAGES = ["embed", "vector_search", "expansion", "node_fetch", "context_build", "llm"]
+
+# Stages timed inside each target's retrieval call, the rest of it is context building.
+# This server embeds the question before retrieval, the old one inside it.
+RETRIEVAL_ROUND_TRIPS = {
+    "retreive": ("vector_search", "expansion"),
+    "chat-with-codebase": ("embed", "vector_search", "node_fetch"),
+}
+
+QUESTION_TEMPLATES = [
+    "Where is {name} defined?",
+    "How does {name} work?",
+    "What calls {name}?",
+    "What does {name} return, and when does it fail?",
+    "Explain the code in {file}",
+]
+
+GENERAL_QUESTIONS = [
+    "How is this project structured?",
+    "Where does the application start?",
+    "How are errors handled?",
+    "How is configuration loaded?",
+]
+
+DEFINITION_TYPES = {
+    "function_definition", "function_declaration", "method_definition",
+    "class_definition", "class_declaration",
+}
+
+
+class QueryMix:
+    """Questions about the repo's own code, a share of them repeats of a few popular ones."""
+
+    def __init__(self, graph: CodeGraph, repo_path: str, repeat_ratio: float, hot_questions: int = 20, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.repeat_ratio = repeat_ratio
+        self.names = sorted({node["name"] for node in graph.nodes if node["ast_type"] in DEFINITION_TYPES and node["name"]})
+        self.files = sorted({os.path.relpath(node["file"], repo_path) for node in graph.nodes if node["ast_type"] == "file"})
+        self.hot = [self.fresh() for _ in range(hot_questions)]
+        # Zipf: the most popular question is asked twice as often as the second
+        self.hot_weights = [1 / (rank + 1) for rank in range(len(self.hot))]
+
+    def fresh(self) -> str:
+        template = self.rng.choice(QUESTION_TEMPLATES)
+        if "{file}" in template and self.files:
+            return template.format(file=self.rng.choice(self.files))
+        if "{name}" in template and self.names:
+            return template.format(name=self.rng.choice(self.names))
+        return self.rng.choice(GENERAL_QUESTIONS)
+
+    def next(self) -> str:
+        if self.hot and self.rng.random() < self.repeat_ratio:
+            return self.rng.choices(self.hot, weights=self.hot_weights)[0]
+        return self.fresh()
+
+
+def timed_stage(stage: str, fn: Callable) -> Callable:
+    """Coroutine function `fn` with its duration recorded as `stage`."""
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            record_stage(stage, started)
+    return wrapper
+
+
+def install_retreive_stand_ins(graph: CodeGraph, args, latency: Latency, llm: FakeLLM) -> FastAPI:
+    import services.retreive.pipeline as pipeline
+    import services.retreive.retrieve_context as retrieve_context
+    from services.retreive.vector_search import expansion_params
+    from api.retreive import router as retreive_router
+
+    store = MemoryVectorStore(graph, latency, args.vector_ms)
+    store.stores_on_nodes = args.backend == "neo4j"
+    call_graph = graph.call_graph()
+
+    async def get_embeddings_async(chunks, task_type: str = "RETRIEVAL_DOCUMENT"):
+        started = time.perf_counter()
+        await latency.wait(args.embed_ms)
+        embeddings = [hashed_embedding(chunk, graph.dim).tolist() for chunk in chunks]
+        record_stage("embed", started)
+        return embeddings
+
+    async def session_exists(session_id: str) -> bool:
+        await latency.wait(args.graph_ms)
+        return True
+
+    def expand(positions_and_scores, hops, params) -> List[Dict]:
+        return [
+            {
+                "node": graph.nodes[i],
+                "score": score,
+                "neighbours": graph.expand(i, hops, params["rel_types"], params["max_neighbours"]),
+            }
+            for i, score in positions_and_scores
+        ]
+
+    async def search_and_expand_async(session, query_embedding, session_id, k, hops=None, rel_types=None, max_neighbours=None):
+        # Vectors on the nodes: lookup and expansion share one round trip, counted as search
+        hops, params = expansion_params(hops, rel_types, max_neighbours)
+        started = time.perf_counter()
+        await latency.wait(args.graph_ms)
+        hits = graph.search(query_embedding, k)
+        record_stage("vector_search", started)
+
+        started = time.perf_counter()
+        results = expand(hits, hops, params)
+        record_stage("expansion", started)
+        return results
+
+    async def expand_hits_async(session, hits, session_id, hops=None, rel_types=None, max_neighbours=None):
+        hops, params = expansion_params(hops, rel_types, max_neighbours)
+        started = time.perf_counter()
+        await latency.wait(args.graph_ms)
+        results = expand(
+            [(graph.index[hit["id"]], hit["score"]) for hit in hits if hit["id"] in graph.index], hops, params
+        )
+        record_stage("expansion", started)
+        return results
+
+    retrieve_context.get_embeddings_async = get_embeddings_async
+    retrieve_context.get_async_neo4j_driver = lambda: FakeDriver()
+    retrieve_context.get_vector_store = lambda: store
+    retrieve_context.search_and_expand_async = search_and_expand_async
+    retrieve_context.expand_hits_async = expand_hits_async
+    retrieve_context.get_call_graph = lambda session_id: call_graph
+
+    pipeline.get_embeddings_async = get_embeddings_async
+    pipeline.session_exists = session_exists
+    pipeline.retrieve_context = timed_stage("retrieval", retrieve_context.retrieve_context)
+    pipeline.chat_async = llm.chat_async
+    pipeline.chat_stream_async = llm.chat_stream_async
+
+    app = FastAPI()
+    app.include_router(retreive_router, prefix="/api/retreive")
+    return app
+
+
+def install_chat_with_codebase_stand_ins(graph: CodeGraph, args, latency: Latency, llm: FakeLLM) -> FastAPI:
+    """The old server, loaded from ../server by path: its main would shadow ours."""
+    server_dir = os.path.join(REPO_ROOT, "server")
+    sys.path.insert(0, server_dir)
+    spec = importlib.util.spec_from_file_location("legacy_server_main", os.path.join(server_dir, "main.py"))
+    legacy = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(legacy)
+    import utils.retrieval as retrieval
+
+    def get_embeddings(chunks):
+        started = time.perf_counter()
+        latency.block(args.embed_ms)
+        embeddings = [hashed_embedding(chunk, graph.dim).tolist() for chunk in chunks]
+        record_stage("embed", started)
+        return embeddings
+
+    class FakeIndex:
+        def query(self, vector, top_k, include_metadata=False):
+            started = time.perf_counter()
+            latency.block(args.vector_ms)
+            matches = [{"id": graph.nodes[i]["id"], "score": score} for i, score in graph.search(vector, top_k)]
+            record_stage("vector_search", started)
+            return {"matches": matches}
+
+    class FakePinecone:
+        def Index(self, name):
+            return FakeIndex()
+
+    def fetch_node_from_neo4j(session, node_id):
+        # One round trip per match, as the old server does
+        started = time.perf_counter()
+        latency.block(args.graph_ms)
+        node = graph.nodes[graph.index[node_id]] if node_id in graph.index else None
+        record_stage("node_fetch", started)
+        if node is None:
+            return None
+        return {
+            "code": node["code_str"], "file": node["file"], "language": node["language"],
+            "start_line": node["start_line"], "name": node["name"], "type": node["ast_type"],
+        }
+
+    def search_code(*call_args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return retrieval.search_code(*call_args, **kwargs)
+        finally:
+            record_stage("retrieval", started)
+
+    retrieval.get_embeddings = get_embeddings
+    retrieval.pc = FakePinecone()
+    retrieval.neo4j_driver = FakeDriver()
+    retrieval.fetch_node_from_neo4j = fetch_node_from_neo4j
+    legacy.search_code = search_code
+    legacy.chat = llm.chat
+    legacy.chat_stream = llm.chat_stream
+    # The old server prints every prompt
+    legacy.print = lambda *a, **k: None
+    return legacy.app
+
+
+def clear_answer_caches():
+    from services.retreive.query_cache import answer_cache, query_embedding_cache
+    for cache in (query_embedding_cache, answer_cache):
+        cache.discard_where(lambda key: True)
+
+
+def request_for(target: str, query: str, stream: bool) -> Dict:
+    if target == "retreive":
+        return {"url": "/api/retreive/", "json": {"session_id": "bench", "query": query, "stream": stream}}
+    return {"url": "/chat-with-codebase", "json": {"index_name": "bench", "query_text": query, "stream": stream}}
+
+
+async def send(client: httpx.AsyncClient, target: str, query: str, stream: bool) -> Dict:
+    """One question, as {ok, ttft_ms, answer_cache}."""
+    request = request_for(target, query, stream)
+    if not stream:
+        response = await client.post(request["url"], json=request["json"])
+        body = response.json() if response.is_success else {}
+        return {"ok": response.is_success, "ttft_ms": None, "answer_cache": (body.get("cache") or {}).get("answer")}
+
+    # The in-process transport hands over the body only once it is complete,
+    # so time to first token is the one the server reports in its "done" event
+    ttft_ms, answer_cache, ok = None, None, True
+    async with client.stream("POST", request["url"], json=request["json"]) as response:
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                if event == "meta":
+                    answer_cache = data.get("cache", {}).get("answer")
+                elif event == "done":
+                    ttft_ms = data.get("ttft_ms")
+                elif event == "error":
+                    ok = False
+            elif not line:
+                event = None
+        ok = ok and response.is_success
+    return {"ok": ok, "ttft_ms": ttft_ms, "answer_cache": answer_cache}
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(p * len(samples)))], 1)
+
+
+async def drive(app: FastAPI, args, mix: QueryMix, users: int) -> Dict:
+    samples = []
+
+    async def user(client: httpx.AsyncClient, rng: random.Random):
+        for _ in range(args.requests_per_user):
+            query = mix.next()
+            stream = rng.random() < args.stream_ratio
+            # Each user is its own task, so this only collects its own requests' stages
+            stages: Dict[str, float] = {}
+            STAGE_TIMES.set(stages)
+
+            started = time.perf_counter()
+            try:
+                result = await send(client, args.target, query, stream)
+            except httpx.HTTPError:
+                result = {"ok": False, "ttft_ms": None, "answer_cache": None}
+            result["latency_ms"] = (time.perf_counter() - started) * 1000
+
+            if "retrieval" in stages:
+                stages["context_build"] = max(0.0, stages.pop("retrieval") - sum(
+                    stages.get(stage, 0.0) for stage in RETRIEVAL_ROUND_TRIPS[args.target]
+                ))
+            result["stages"] = stages
+            samples.append(result)
+
+            if args.think_ms:
+                await asyncio.sleep(rng.expovariate(1000 / args.think_ms))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(user(client, random.Random(i)) for i in range(users)))
+        elapsed = time.perf_counter() - started
+
+    latencies = [s["latency_ms"] for s in samples if s["ok"]]
+    ttfts = [s["ttft_ms"] for s in samples if s["ok"] and s["ttft_ms"] is not None]
+    stage_names = [stage for stage in STAGES if any(stage in s["stages"] for s in samples)]
+    return {
+        "users": users,
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if not s["ok"]),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": percentile(latencies, 0.50),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "ttft_p50_ms": percentile(ttfts, 0.50),
+        "ttft_p95_ms": percentile(ttfts, 0.95),
+        "cached_answers": sum(1 for s in samples if s["answer_cache"] == "hit"),
+        "stages": {
+            stage: {
+                "mean_ms": round(sum(s["stages"].get(stage, 0.0) for s in samples) / len(samples), 1),
+                "p95_ms": percentile([s["stages"].get(stage, 0.0) for s in samples], 0.95),
+            }
+            for stage in stage_names
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="retreive", choices=["retreive", "chat-with-codebase"])
+    parser.add_argument("--backend", default="neo4j", choices=["neo4j", "pinecone"], help="vector search semantics (retreive only)")
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests-per-user", type=int, default=10)
+    parser.add_argument("--think-ms", type=float, default=0, help="mean pause between a user's requests")
+    parser.add_argument("--repo", help="repo to build the graph from, a generated one by default")
+    parser.add_argument("--files", type=int, default=300, help="size of the generated repo")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--repeat-ratio", type=float, default=0.3, help="share of questions repeating a popular one")
+    parser.add_argument("--stream-ratio", type=float, default=0.0, help="share of requests asking for SSE")
+    parser.add_argument("--embed-ms", type=float, default=80)
+    parser.add_argument("--vector-ms", type=float, default=30)
+    parser.add_argument("--graph-ms", type=float, default=40)
+    parser.add_argument("--llm-ttft-ms", type=float, default=400)
+    parser.add_argument("--llm-ms", type=float, default=1500)
+    parser.add_argument("--jitter", type=float, default=0.3, help="sigma of the log-normal round trip times, 0 for fixed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    # Per request logging would dominate the run
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as scratch:
+        repo_path = args.repo
+        if not repo_path:
+            from benchmarks.synthetic_repo import generate_repo
+            repo_path = generate_repo(scratch, args.files, seed=args.seed)
+        graph = CodeGraph.from_repo(repo_path, args.dim)
+        mix = QueryMix(graph, repo_path, args.repeat_ratio, seed=args.seed)
+
+    latency = Latency(args.jitter, args.seed)
+    llm = FakeLLM(latency, args.llm_ttft_ms, args.llm_ms)
+    install = install_retreive_stand_ins if args.target == "retreive" else install_chat_with_codebase_stand_ins
+    app = install(graph, args, latency, llm)
+
+    results = []
+    for users in args.users:
+        clear_answer_caches()
+        results.append(asyncio.run(drive(app, args, mix, users)))
+
+    if args.json:
+        print(json.dumps({"target": args.target, "backend": args.backend, "nodes": len(graph.nodes), "results": results}, indent=2))
+        return
+
+    print(f"{args.target} ({args.backend if args.target == 'retreive' else 'pinecone + neo4j'}), {len(graph.nodes)} nodes")
+    print(f"{'users':>5} {'reqs':>5} {'errs':>4} {'req/s':>7} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'ttft_p50':>8} {'cached':>6}  stage mean/p95 ms")
+    for r in results:
+        stages = "  ".join(f"{name} {s['mean_ms']}/{s['p95_ms']}" for name, s in r["stages"].items())
+        print(f"{r['users']:>5} {r['requests']:>5} {r['errors']:>4} {r['throughput_rps']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['ttft_p50_ms'] or '-':>8} {r['cached_answers']:>6}  {stages}")
+
+
+if __name__ == "__main__":
+    main()
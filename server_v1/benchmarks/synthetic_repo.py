@@ -0,0 +1,107 @@
+"""
+Generated source trees for the ingest benchmarks.
+
+Python and JavaScript files in nested packages, each with a few classes and
+functions that import and call definitions of other files, so traversal,
+chunking, call/import extraction and import resolution all have real work.
+Same arguments, same tree.
+"""
+import os, random
+from typing import List
+
+
+def python_file(index: int, module_paths: List[str], functions: int, rng: random.Random) -> str:
+    imports = sorted(set(rng.sample(range(len(module_paths)), min(3, len(module_paths)))) - {index})
+    lines = ["import os", "from typing import Dict, List", ""]
+    lines += [f"from {module_paths[i]} import helper_{i}_0, Model{i}" for i in imports]
+    lines.append("")
+
+    lines += [
+        f"class Model{index}:",
+        f'    """Model {index}, holds a couple of fields."""',
+        "",
+        "    def __init__(self, name: str, size: int = 0):",
+        "        self.name = name",
+        "        self.size = size",
+        "        self.items: List[Dict] = []",
+        "",
+        "    def add(self, item: Dict) -> int:",
+        "        self.items.append(item)",
+        "        return len(self.items)",
+        "",
+    ]
+    for f in range(functions):
+        callee = rng.choice(imports) if imports else index
+        lines += [
+            f"def helper_{index}_{f}(values: List[int], scale: float = 1.0) -> float:",
+            f'    """Scaled sum number {f}."""',
+            "    total = 0.0",
+            "    for value in values:",
+            "        if value % 2:",
+            "            total += value * scale",
+            "        else:",
+            "            total -= value / (scale or 1)",
+            f"    model = Model{callee}(os.path.basename('x{f}'))",
+            "    model.add({'total': total})",
+            f"    return total + helper_{callee}_0([1, 2, 3])" if callee != index or f else "    return total",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def js_file(index: int, functions: int, rng: random.Random) -> str:
+    other = rng.randrange(max(1, index)) if index else 0
+    lines = [
+        "import React from 'react'",
+        f"import {{ util{other}_0 }} from './module_{other}'",
+        "",
+        f"export class Store{index} {{",
+        "  constructor(name) {",
+        "    this.name = name",
+        "    this.items = []",
+        "  }",
+        "  add(item) {",
+        "    this.items.push(item)",
+        "    return this.items.length",
+        "  }",
+        "}",
+        "",
+    ]
+    for f in range(functions):
+        lines += [
+            f"export function util{index}_{f}(values, scale = 1) {{",
+            "  let total = 0",
+            "  for (const value of values) {",
+            "    total += value % 2 ? value * scale : -value / (scale || 1)",
+            "  }",
+            f"  const store = new Store{index}('s{f}')",
+            "  store.add({ total })",
+            f"  return total + util{other}_0([1, 2, 3])" if other != index else "  return total",
+            "}",
+            "",
+        ]
+    return "\n".join(lines)
+
+
+def generate_repo(path: str, files: int, functions_per_file: int = 6, js_ratio: float = 0.25, seed: int = 0) -> str:
+    """Write `files` source files under `path`, 20 per package directory."""
+    rng = random.Random(seed)
+    py_count = files - int(files * js_ratio)
+    module_paths = [f"pkg_{i // 20}.module_{i}" for i in range(py_count)]
+
+    for i, module_path in enumerate(module_paths):
+        package_dir = os.path.join(path, *module_path.split(".")[:-1])
+        os.makedirs(package_dir, exist_ok=True)
+        init_path = os.path.join(package_dir, "__init__.py")
+        if not os.path.exists(init_path):
+            open(init_path, "w").close()
+        with open(os.path.join(path, *module_path.split(".")) + ".py", "w") as f:
+            f.write(python_file(i, module_paths, functions_per_file, rng))
+
+    js_dir = os.path.join(path, "web", "src")
+    os.makedirs(js_dir, exist_ok=True)
+    for i in range(files - py_count):
+        with open(os.path.join(js_dir, f"module_{i}.js"), "w") as f:
+            f.write(js_file(i, functions_per_file, rng))
+
+    return path
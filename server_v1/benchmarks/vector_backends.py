@@ -0,0 +1,104 @@
+"""
+Query latency (p50/p99) and recall@k of the local vector store backends.
+
+Builds one synthetic session of clustered unit vectors (code embeddings are
+far from uniform, so clusters are closer to what IVF sees in practice) and
+compares:
+  - exact: LocalVectorStore below its IVF threshold, full matrix scan
+  - ivf:   LocalVectorStore with an IVF index, probing --nprobe lists
+
+Recall is measured against the exact scan. The neo4j and pinecone backends
+need a running service and are not covered here; their live p50/p99 shows
+up under "vector_store" in GET /api/stats.
+
+Run from server_v1/:
+    python -m benchmarks.vector_backends --nodes 20000 100000
+"""
+import argparse, json, tempfile, time
+from typing import Dict, List
+
+import numpy as np
+
+from services.vector_store.local_store import LocalVectorStore, normalize
+
+
+def clustered_vectors(rng: np.random.Generator, count: int, dim: int, clusters: int) -> np.ndarray:
+    centers = normalize(rng.standard_normal((clusters, dim)).astype(np.float32))
+    labels = rng.integers(0, clusters, count)
+    noise = rng.standard_normal((count, dim)).astype(np.float32) * (0.6 / np.sqrt(dim))
+    return normalize(centers[labels] + noise)
+
+
+def percentile(samples: List[float], p: float) -> float:
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+
+def run(nodes: int, dim: int, queries: int, k: int, nprobe: int, seed: int) -> Dict:
+    rng = np.random.default_rng(seed)
+    vectors = clustered_vectors(rng, nodes, dim, clusters=max(8, nodes // 500))
+    ids = [f"node-{i}" for i in range(nodes)]
+    probes = vectors[rng.integers(0, nodes, queries)]
+    probes = normalize(probes + rng.standard_normal(probes.shape).astype(np.float32) * (0.3 / np.sqrt(dim)))
+
+    results = {"nodes": nodes}
+    truth = None
+
+    with tempfile.TemporaryDirectory() as root:
+        stores = {
+            "exact": LocalVectorStore(root=f"{root}/exact", ivf_threshold=nodes + 1),
+            "ivf": LocalVectorStore(root=f"{root}/ivf", ivf_threshold=0, nprobe=nprobe),
+        }
+
+        for name, store in stores.items():
+            started = time.perf_counter()
+            store.upsert("bench", ids, vectors)
+            build_seconds = round(time.perf_counter() - started, 2)
+
+            latencies, hits = [], []
+            for query in probes:
+                started = time.perf_counter()
+                hits.append({hit["id"] for hit in store.query("bench", query.tolist(), k)})
+                latencies.append((time.perf_counter() - started) * 1000)
+
+            if truth is None:
+                truth = hits
+            recall = sum(len(found & expected) / k for found, expected in zip(hits, truth)) / queries
+
+            results[name] = {
+                "build_s": build_seconds,
+                "p50_ms": percentile(latencies, 0.50),
+                "p99_ms": percentile(latencies, 0.99),
+                "recall_at_k": round(recall, 3),
+            }
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[20000, 100000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    results = [run(n, args.dim, args.queries, args.k, args.nprobe, args.seed) for n in args.nodes]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'nodes':>7} {'backend':>7} {'build_s':>7} {'p50_ms':>7} {'p99_ms':>7} {'recall':>6}")
+    for r in results:
+        for backend in ("exact", "ivf"):
+            b = r[backend]
+            print(f"{r['nodes']:>7} {backend:>7} {b['build_s']:>7} {b['p50_ms']:>7} "
+                  f"{b['p99_ms']:>7} {b['recall_at_k']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Recall@k of session-scoped vector search against brute-force cosine.
+
+Simulates many resident sessions sharing one global vector index and compares:
+  - global_filter: old behaviour, global top-k then filter by session
+  - overfetch:     adaptive over-fetch on the global index
+  - session_ivf:   per-session approximate index, the IVF of the local
+                   vector store (k-means lists, --nprobe of --nlist probed)
+
+Truth is exact search within the session. The global index is exact brute
+force, so its columns isolate the effect of filtering; session_ivf is the
+approximation loss of a per-session index. LocalVectorStore probes 16 of
+~141 lists at its 20k vector threshold, about 11%; the defaults here probe
+2 of 14 lists (sqrt of the session size, as the store picks) for the same
+share. The vectors are random, with none of the clustering of real code
+embeddings, so session_ivf is a pessimistic figure.
+
+The per-session HNSW index of the neo4j backend, what ships by default, is
+not measured: it needs a Neo4j server. The output says so next to the
+figures.
+
+Run from server_v1/:
+    python -m benchmarks.vector_recall --sessions 1 10 50
+    python -m benchmarks.vector_recall --nodes-per-session 2000 --nprobe 4
+"""
+import argparse, json, math, random, time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.retreive.vector_search import adaptive_overfetch
+from services.vector_store.local_store import SessionVectors, train_ivf
+
+NOT_MEASURED = "neo4j per-session HNSW index (default backend), session_ivf is the local store's IVF"
+
+
+def random_unit_vector(rng: random.Random, dim: int) -> List[float]:
+    vector = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector]
+
+
+def cosine_ranking(query: List[float], vectors: List[List[float]]) -> List[int]:
+    # Vectors are unit length, so the dot product is the cosine similarity
+    scores = [sum(q * v for q, v in zip(query, vector)) for vector in vectors]
+    return sorted(range(len(vectors)), key=lambda i: -scores[i])
+
+
+def run(
+    num_sessions: int,
+    nodes_per_session: int,
+    dim: int,
+    queries: int,
+    k: int,
+    seed: int,
+    nprobe: int,
+    nlist: Optional[int] = None
+) -> Dict:
+    rng = random.Random(seed)
+    vectors, owners = [], []
+    for session in range(num_sessions):
+        for _ in range(nodes_per_session):
+            vectors.append(random_unit_vector(rng, dim))
+            owners.append(session)
+
+    nlist = nlist or max(1, int(math.sqrt(nodes_per_session)))
+    session_indexes = []
+    for session in range(num_sessions):
+        offset = session * nodes_per_session
+        matrix = np.asarray(vectors[offset:offset + nodes_per_session], dtype=np.float32)
+        ids = list(range(offset, offset + nodes_per_session))
+        session_indexes.append(SessionVectors(ids, matrix, train_ivf(matrix, nlist, seed)))
+
+    recall = {"global_filter": 0.0, "overfetch": 0.0, "session_ivf": 0.0}
+    latency = {"global_scan_ms": 0.0, "session_scan_ms": 0.0, "session_ivf_ms": 0.0}
+    rounds = fetched = 0
+
+    for _ in range(queries):
+        session = rng.randrange(num_sessions)
+        base = vectors[session * nodes_per_session + rng.randrange(nodes_per_session)]
+        query = [x + rng.gauss(0, 0.5 / math.sqrt(dim)) for x in base]
+
+        started = time.perf_counter()
+        global_order = cosine_ranking(query, vectors)
+        latency["global_scan_ms"] += (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        offset = session * nodes_per_session
+        session_order = [offset + i for i in cosine_ranking(query, vectors[offset:offset + nodes_per_session])]
+        latency["session_scan_ms"] += (time.perf_counter() - started) * 1000
+
+        truth = set(session_order[:k])
+
+        old = [i for i in global_order[:k] if owners[i] == session]
+        recall["global_filter"] += len(truth.intersection(old)) / k
+
+        def search(n: int):
+            hits = global_order[:n]
+            return len(hits), [i for i in hits if owners[i] == session]
+
+        matches, stats = adaptive_overfetch(search, k)
+        recall["overfetch"] += len(truth.intersection(matches)) / k
+        rounds += stats["rounds"]
+        fetched += stats["fetch"]
+
+        started = time.perf_counter()
+        hits = session_indexes[session].search(np.asarray(query, dtype=np.float32), k, nprobe)
+        latency["session_ivf_ms"] += (time.perf_counter() - started) * 1000
+        recall["session_ivf"] += len(truth.intersection(hit["id"] for hit in hits)) / k
+
+    return {
+        "sessions": num_sessions,
+        "nodes": num_sessions * nodes_per_session,
+        "nlist": nlist,
+        "nprobe": min(nprobe, nlist),
+        "recall_at_k": {name: round(value / queries, 3) for name, value in recall.items()},
+        "overfetch_avg_rounds": round(rounds / queries, 2),
+        "overfetch_avg_fetch": round(fetched / queries, 1),
+        "latency_ms": {name: round(value / queries, 2) for name, value in latency.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--nodes-per-session", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--nlist", type=int, help="IVF lists per session, default sqrt of its size")
+    parser.add_argument("--nprobe", type=int, default=2, help="IVF lists probed per query")
+    parser.add_argument("--json", action="store_true", help="print raw JSON results")
+    args = parser.parse_args()
+
+    results = [
+        run(n, args.nodes_per_session, args.dim, args.queries, args.k, args.seed, args.nprobe, args.nlist)
+        for n in args.sessions
+    ]
+
+    if args.json:
+        print(json.dumps({"results": results, "not_measured": NOT_MEASURED}, indent=2))
+        return
+
+    print(f"{'sessions':>8} {'nodes':>7} {'global_filter':>13} {'overfetch':>9} {'session_ivf':>11} "
+          f"{'probed':>7} {'rounds':>6} {'fetch':>7} {'global_ms':>9} {'session_ms':>10} {'ivf_ms':>7}")
+    for r in results:
+        print(f"{r['sessions']:>8} {r['nodes']:>7} {r['recall_at_k']['global_filter']:>13} "
+              f"{r['recall_at_k']['overfetch']:>9} {r['recall_at_k']['session_ivf']:>11} "
+              f"{str(r['nprobe']) + '/' + str(r['nlist']):>7} "
+              f"{r['overfetch_avg_rounds']:>6} {r['overfetch_avg_fetch']:>7} "
+              f"{r['latency_ms']['global_scan_ms']:>9} {r['latency_ms']['session_scan_ms']:>10} "
+              f"{r['latency_ms']['session_ivf_ms']:>7}")
+    print(f"not measured: {NOT_MEASURED}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+import json
+from typing import Any, Optional
+
+# Sent with every event stream so proxies (nginx) don't buffer it
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """One Server-Sent Event frame with a JSON payload."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
@@ -1,29 +1,59 @@
 import os
-from neo4j import GraphDatabase
+from neo4j import GraphDatabase, AsyncGraphDatabase
 from dotenv import load_dotenv
 
 load_dotenv()
 
 __neo4j_driver = None
+__async_neo4j_driver = None
+
+
+def get_connection_settings():
+    neo4j_uri = os.getenv("NEO4J_URI")
+    neo4j_username = os.getenv("NEO4J_USERNAME", "neo4j")
+    neo4j_password = os.getenv("NEO4J_PASSWORD")
+
+    if not neo4j_uri:
+        raise ValueError("NEO4J_URI not found in environment variables")
+    if not neo4j_password:
+        raise ValueError("NEO4J_PASSWORD not found in environment variables")
+
+    return neo4j_uri, (neo4j_username, neo4j_password)
 
 
 def get_neo4j_driver():
     global __neo4j_driver
 
     if __neo4j_driver is None:
-        neo4j_uri = os.getenv("NEO4J_URI")
-        neo4j_username = os.getenv("NEO4J_USERNAME", "neo4j")
-        neo4j_password = os.getenv("NEO4J_PASSWORD")
-
-        if not neo4j_uri:
-            raise ValueError("NEO4J_URI not found in environment variables")
-        if not neo4j_password:
-            raise ValueError("NEO4J_PASSWORD not found in environment variables")
-        
-        __neo4j_driver = GraphDatabase.driver(
-            neo4j_uri,
-            auth=(neo4j_username, neo4j_password)
-        )
+        neo4j_uri, auth = get_connection_settings()
+        __neo4j_driver = GraphDatabase.driver(neo4j_uri, auth=auth)
     
     return __neo4j_driver
-            
\ No newline at end of file
+
+
+def get_async_neo4j_driver():
+    """Driver for the request path, its sessions must be used from the API event loop."""
+    global __async_neo4j_driver
+
+    if __async_neo4j_driver is None:
+        neo4j_uri, auth = get_connection_settings()
+        __async_neo4j_driver = AsyncGraphDatabase.driver(neo4j_uri, auth=auth)
+
+    return __async_neo4j_driver
+
+
+async def close_async_neo4j_driver():
+    global __async_neo4j_driver
+
+    if __async_neo4j_driver is not None:
+        await __async_neo4j_driver.close()
+        __async_neo4j_driver = None
+
+
+def session_label(session_id: str) -> str:
+    """Extra label carried by every node of a session, backs its vector index."""
+    return "Session_" + session_id.replace("-", "_")
+
+
+def session_vector_index(session_id: str) -> str:
+    return "session_embeddings_" + session_id.replace("-", "_")
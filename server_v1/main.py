@@ -1,11 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
 from api.ingest import router as ingest_router
 from api.retreive import router as retreive_router
+from api.stats import router as stats_router
+from services.ingest.storage import ensure_schema
+from db.neo4j_client import close_async_neo4j_driver
+from core.logging import get_logger
 
+logger = get_logger(__name__)
 
-app = FastAPI(title="Codebase RAG Service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        ensure_schema()
+    except Exception as e:
+        # Storage retries on first write, don't keep the API down for it
+        logger.warning(f"Neo4j schema setup failed at startup: {e}")
+    yield
+    await close_async_neo4j_driver()
+
+
+app = FastAPI(title="Codebase RAG Service", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,6 +37,7 @@ app.add_middleware(
 # Register Routes
 app.include_router(ingest_router, prefix="/api/ingest")
 app.include_router(retreive_router, prefix="/api/retreive")
+app.include_router(stats_router, prefix="/api/stats")
 
 
 @app.get("/")
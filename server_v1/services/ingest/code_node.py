@@ -0,0 +1,113 @@
+import sys
+from typing import Any, Dict, Iterator, Optional
+
+
+class CodeNode:
+    """
+    One extracted AST chunk.
+
+    Fixed slots instead of a dict per node, `relationships` only holds the
+    types a node actually has, and the strings every node of a file repeats
+    (file, language, ast_type) are interned, so they are shared instead of
+    copied per node.
+
+    Chunks don't copy their code out of the file. They share the file's bytes
+    (`source`) and decode their [start_byte, end_byte) span only when
+    code_str is read, at embedding and write time.
+
+    Reads and writes like the dict nodes it replaces (node["file"],
+    node.get("name"), {**node}), so the rest of the pipeline takes either.
+    """
+
+    # What the dict protocol exposes, code_str read through the span
+    FIELDS = (
+        "id", "name", "code_str", "ast_type", "file", "language",
+        "start_line", "end_line", "start_byte", "end_byte", "size",
+        "relationships", "metadata",
+    )
+
+    __slots__ = (
+        "id", "name", "text", "source", "ast_type", "file", "language",
+        "start_line", "end_line", "start_byte", "end_byte", "size",
+        "relationships", "metadata",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: Optional[str],
+        code_str: Optional[str],
+        ast_type: str,
+        file: str,
+        language: str,
+        start_line: int,
+        end_line: int,
+        start_byte: int,
+        end_byte: int,
+        size: int,
+        relationships: Dict[str, list],
+        metadata: Dict[str, Any],
+        source: Optional[bytes] = None
+    ):
+        self.id = id
+        self.name = name
+        # Own text (FILE and ROOT nodes) or a span of the shared file bytes
+        self.text = code_str
+        self.source = source
+        self.ast_type = sys.intern(ast_type)
+        self.file = sys.intern(file)
+        self.language = sys.intern(language)
+        self.start_line = start_line
+        self.end_line = end_line
+        self.start_byte = start_byte
+        self.end_byte = end_byte
+        self.size = size
+        self.relationships = relationships
+        self.metadata = metadata
+
+    @property
+    def code_str(self) -> Optional[str]:
+        if self.source is None:
+            return self.text
+        # memoryview: decoded straight from the file bytes, no slice copy first
+        return str(memoryview(self.source)[self.start_byte:self.end_byte], 'utf-8', 'ignore')
+
+    @code_str.setter
+    def code_str(self, value: Optional[str]):
+        # Setting it (None once stored) also lets go of the file bytes
+        self.text = value
+        self.source = None
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value):
+        try:
+            setattr(self, key, value)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def keys(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    # Pickled as a flat tuple for the extraction workers, strings re-interned
+    # on arrival. The chunks of a file come back in one batch, so pickle
+    # sends their shared `source` once.
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+        self.ast_type = sys.intern(self.ast_type)
+        self.file = sys.intern(self.file)
+        self.language = sys.intern(self.language)
@@ -1,11 +1,15 @@
 # services/ingest/file_traversal.py
-import os
-from typing import Dict, List, Set, Optional
+import os, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Set, Optional, Tuple
 from pathlib import Path
 from core.logging import get_logger
 from services.ingest.nodes_extractor import extract_nodes_from_file
 from services.ingest.nodes_extractor import make_base_node
-from services.ingest.helper.imports_resolver import resolve_imports_to_node_ids
+from services.ingest.helper.imports_resolver import resolve_imports_to_node_ids, build_file_index
+from services.ingest.helper.symbol_table import SymbolTable, resolve_cross_file_calls
 
 logger = get_logger(__name__)
 
@@ -23,6 +27,18 @@ LANGUAGES = {
     'tsx': 'typescript'
 }
 
+# Ingest jobs running at once (jobs.py), each with its own extraction pool
+CONCURRENT_INGESTS = max(1, int(os.getenv("INGEST_MAX_WORKERS") or 2))
+
+# Parallel extraction, EXTRACT_WORKERS <= 1 keeps the serial path. By default
+# the CPUs are split between the jobs that may run at once.
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS") or max(1, (os.cpu_count() or 1) // CONCURRENT_INGESTS))
+EXTRACT_BATCH_SIZE = int(os.getenv("EXTRACT_BATCH_SIZE") or 32)
+EXTRACT_IN_FLIGHT_PER_WORKER = 2
+# Smaller repos are extracted serially: starting the forkserver and workers
+# costs more than the pool saves (300 files took 1.45s on 2 workers, 0.63s serially)
+EXTRACT_PARALLEL_MIN_FILES = int(os.getenv("EXTRACT_PARALLEL_MIN_FILES") or 1000)
+
 DOC_EXTENSIONS = ('.md', '.txt', '.rst', '.markdown')
 CONFIG_EXTENSIONS = ('.json', '.yaml', '.yml', '.toml', '.ini', '.cfg')
 
@@ -37,13 +53,98 @@ STANDARD_LIBS = {
 }
 
 
-def extract_all_nodes(repo_path: str) -> List[Dict]:
-    """Extract all nodes with cross-file relationship tracking."""
-    all_nodes = []
+def extract_doc_chunks(file_path: str, chunk_size: int = 1000) -> List[Dict]:
+    """Split a plain-text/markdown file into fixed size FILE_CHUNK nodes."""
+    nodes = []
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        # Simple chunking (you can replace with your chunk_text function)
+        for i in range(0, len(content), chunk_size):
+            chunk = content[i:i+chunk_size]
+            nodes.append({
+                'id': f"{file_path}:FILE_CHUNK_{i}",
+                'ast_type': 'FILE_CHUNK',
+                'name': f"{os.path.basename(file_path)}_chunk_{i//chunk_size}",
+                'code_str': chunk,
+                'file': file_path,
+                'language': 'markdown',
+                'start_line': 1,
+                'end_line': len(chunk.splitlines()),
+                'relationships': {},
+                'metadata': {}
+            })
+    except Exception as e:
+        logger.error(f"Failed to read {file_path}: {e}")
+    
+    return nodes
 
-    root_node_id = f"{repo_path}:ROOT"
-    root_node = make_base_node(
-        node_id=root_node_id,
+
+def collect_files(repo_path: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Walk the repo once and list every file to extract, in os.walk order.
+
+    Returns:
+        List of (file_path, language) tuples, language is None for doc files
+    """
+    files_to_extract = []
+
+    for root, dirs, files in os.walk(repo_path):
+        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
+        
+        for file in files:
+            indexed, language = get_file_language(file)
+            if indexed:
+                files_to_extract.append((os.path.join(root, file), language))
+    
+    return files_to_extract
+
+
+def get_file_language(file_path: str) -> Tuple[bool, Optional[str]]:
+    """
+    Returns:
+        (is_indexed, language), language is None for doc files
+    """
+    file = os.path.basename(file_path)
+    ext = file.split('.')[-1].lower()
+    
+    if ext in LANGUAGES:
+        return True, LANGUAGES[ext]
+    
+    if file.lower().endswith(('.md', '.txt')):
+        return True, None
+    
+    return False, None
+
+
+def is_indexed_path(relative_path: str) -> bool:
+    """Whether a repo relative path would be picked up by collect_files."""
+    parts = relative_path.replace('\\', '/').split('/')
+    if any(part in IGNORE_DIRS for part in parts[:-1]):
+        return False
+    return get_file_language(relative_path)[0]
+
+
+def extract_file(file_path: str, language: Optional[str], root_node_id: str) -> List[Dict]:
+    """Extract nodes of a single source or doc file."""
+    if language is None:
+        return extract_doc_chunks(file_path)
+    
+    return extract_nodes_from_file(file_path, language, root_node_id)
+
+
+def extract_files_batch(batch: List[Tuple[str, Optional[str]]], root_node_id: str) -> List[List[Dict]]:
+    """
+    Worker entry point for the process pool. Each worker process keeps its
+    own parsers cache, so a parser is built at most once per language per worker.
+    """
+    return [extract_file(file_path, language, root_node_id) for file_path, language in batch]
+
+
+def make_root_node(repo_path: str) -> Dict:
+    return make_base_node(
+        node_id=f"{repo_path}:ROOT",
         name="ROOT", 
         ast_type="ROOT",
         file_path=repo_path,
@@ -57,55 +158,120 @@ def extract_all_nodes(repo_path: str) -> List[Dict]:
         depth=0
     )
 
-    all_nodes.append(root_node)
+
+def get_extract_mp_context():
+    """
+    Workers never fork from the server process itself, which holds the Neo4j
+    and genai clients and runs other threads. They fork from a clean
+    forkserver that imported this module (tree-sitter and the extractors, no
+    drivers) once. The preload only counts before that server first starts.
+    """
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def iter_extracted_batches(
+    repo_path: str,
+    files_to_extract: List[Tuple[str, Optional[str]]],
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    min_files: Optional[int] = None
+) -> Iterator[List[Dict]]:
+    """
+    Extract `files_to_extract` a batch of files at a time and yield the nodes
+    of each batch as soon as it is parsed, in file order for the serial and
+    parallel paths alike. Imports and cross-file calls are left unresolved.
+
+    Args:
+        repo_path: Root directory of the repository
+        files_to_extract: collect_files of the repo
+        workers: Number of worker processes, 1 (or less) runs serially
+        batch_size: Number of files handed to a worker at a time
+        progress_callback: Called with (files_parsed, files_total) as files finish
+        min_files: Fewer files than this run serially, EXTRACT_PARALLEL_MIN_FILES by default
+    """
+    workers = EXTRACT_WORKERS if workers is None else workers
+    min_files = EXTRACT_PARALLEL_MIN_FILES if min_files is None else min_files
+    batch_size = max(1, EXTRACT_BATCH_SIZE if batch_size is None else batch_size)
+    root_node_id = f"{repo_path}:ROOT"
+
+    files_total = len(files_to_extract)
+    files_parsed = 0
+    batches = [
+        files_to_extract[i:i+batch_size]
+        for i in range(0, len(files_to_extract), batch_size)
+    ]
+
+    if workers > 1 and len(batches) > 1 and files_total >= min_files:
+        workers = min(workers, len(batches))
+        logger.info(f"Extracting {files_total} files with {workers} workers (batch size {batch_size})")
+
+        # Results are taken in submission order, which keeps the output deterministic.
+        # Only a few batches per worker are in flight, so a slow consumer holds parsing back
+        # instead of finished batches piling up in the pool.
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_extract_mp_context()) as executor:
+            pending_batches = iter(batches)
+            in_flight = deque(
+                executor.submit(extract_files_batch, batch, root_node_id)
+                for batch in islice(pending_batches, workers * EXTRACT_IN_FLIGHT_PER_WORKER)
+            )
+            while in_flight:
+                batch_nodes = in_flight.popleft().result()
+                next_batch = next(pending_batches, None)
+                if next_batch is not None:
+                    in_flight.append(executor.submit(extract_files_batch, next_batch, root_node_id))
+
+                files_parsed += len(batch_nodes)
+                if progress_callback:
+                    progress_callback(files_parsed, files_total)
+                yield [node for nodes in batch_nodes for node in nodes]
+    else:
+        for batch in batches:
+            batch_nodes = []
+            for file_path, language in batch:
+                logger.info(f"Processing {os.path.relpath(file_path, repo_path)}...")
+                batch_nodes.extend(extract_file(file_path, language, root_node_id))
+
+                files_parsed += 1
+                if progress_callback:
+                    progress_callback(files_parsed, files_total)
+            yield batch_nodes
+
+
+def extract_all_nodes(
+    repo_path: str,
+    workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> List[Dict]:
+    """
+    Extract all nodes with cross-file relationship tracking.
+
+    Args:
+        repo_path: Root directory of the repository
+        workers: Number of worker processes, 1 (or less) runs serially
+        batch_size: Number of files handed to a worker at a time
+        progress_callback: Called with (files_parsed, files_total) as files finish
     
+    Returns:
+        List of nodes, in the same order for the serial and parallel paths
+    """
     logger.info(f"Starting enhanced extraction from {repo_path}")
+
+    files_to_extract = collect_files(repo_path)
+    all_nodes = [make_root_node(repo_path)]
+    for batch_nodes in iter_extracted_batches(
+        repo_path, files_to_extract, workers, batch_size, progress_callback
+    ):
+        all_nodes.extend(batch_nodes)
     
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
-        
-        for file in files:
-            ext = file.split('.')[-1].lower()
-            
-            if ext in LANGUAGES:
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, repo_path)
-                language = LANGUAGES[ext]
-                
-                logger.info(f"Processing {relative_path}...")
-                
-                # Extract all nodes from this
-                nodes = extract_nodes_from_file(file_path, language, root_node_id)
-
-                if len(nodes) > 0:
-                    all_nodes.extend(nodes)
-            
-            elif file.lower().endswith(('.md', '.txt')):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    
-                    # Simple chunking (you can replace with your chunk_text function)
-                    chunk_size = 1000
-                    for i in range(0, len(content), chunk_size):
-                        chunk = content[i:i+chunk_size]
-                        all_nodes.append({
-                            'id': f"{file_path}:FILE_CHUNK_{i}",
-                            'ast_type': 'FILE_CHUNK',
-                            'name': f"{os.path.basename(file_path)}_chunk_{i//chunk_size}",
-                            'code_str': chunk,
-                            'file': file_path,
-                            'language': 'markdown',
-                            'start_line': 1,
-                            'end_line': len(chunk.splitlines()),
-                            'relationships': {},
-                            'metadata': {}
-                        })
-                except Exception as e:
-                    logger.error(f"Failed to read {file_path}: {e}")
-    
-    
-    all_nodes = resolve_imports_to_node_ids(all_nodes, repo_path)
-    
-    return all_nodes
\ No newline at end of file
+    resolve_cross_file_edges(all_nodes, repo_path, build_file_index(files_to_extract, repo_path))
+    return all_nodes
+
+
+def resolve_cross_file_edges(all_nodes: List[Dict], repo_path: str, known_files: Set[str]):
+    """Imports, then calls into other files; import results break ties between same-named definitions."""
+    resolve_imports_to_node_ids(all_nodes, repo_path, known_files=known_files)
+    resolve_cross_file_calls(all_nodes, SymbolTable(all_nodes, repo_path))
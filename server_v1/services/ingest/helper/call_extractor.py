@@ -0,0 +1,79 @@
+import sys
+from typing import Dict, Set
+from tree_sitter_language_pack import get_language
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Tree-sitter patterns for the callee name of every call site. Member calls
+# (obj.method(), Class.method(), new ns.Client()) capture the last name only.
+PYTHON_CALLS = """
+(call function: (identifier) @call)
+(call function: (attribute attribute: (identifier) @call))
+(decorator (identifier) @call)
+(decorator (attribute attribute: (identifier) @call))
+"""
+
+JS_CALLS = """
+(call_expression function: (identifier) @call)
+(call_expression function: (member_expression property: (property_identifier) @call))
+(new_expression constructor: (identifier) @call)
+(new_expression constructor: (member_expression property: (property_identifier) @call))
+(decorator (identifier) @call)
+(decorator (member_expression property: (property_identifier) @call))
+"""
+
+# Only capitalised tags are components, <div> and friends are plain HTML
+JSX_CALLS = """
+(jsx_opening_element name: (identifier) @component)
+(jsx_self_closing_element name: (identifier) @component)
+(jsx_opening_element name: (member_expression property: (property_identifier) @component))
+(jsx_self_closing_element name: (member_expression property: (property_identifier) @component))
+"""
+
+CALL_QUERIES = {
+    "python": PYTHON_CALLS,
+    "javascript": JS_CALLS + JSX_CALLS,
+    "typescript": JS_CALLS,
+}
+
+# Builtins that would only add noise to the call graph
+IGNORED_CALLS = {
+    'super', 'print', 'len', 'range', 'str', 'int', 'float', 'list', 'dict',
+    'require'
+}
+
+queries_cache: Dict[str, object] = {}
+
+
+def get_call_query(language: str):
+    """Compiled once per language, like the parsers."""
+    if language not in queries_cache:
+        source = CALL_QUERIES.get(language)
+        queries_cache[language] = get_language(language).query(source) if source else None
+    return queries_cache[language]
+
+
+def extract_calls_from_node(node, language: str) -> Set[str]:
+    """
+    Names called inside an AST node: calls, constructors, decorators and JSX
+    components, read straight off the parse tree in one pass.
+
+    Unlike a text scan, definitions (`def f(`, `function f(`) and control flow
+    (`if (`, `while (`) are never mistaken for calls, and nothing inside
+    strings or comments is picked up.
+    """
+    query = get_call_query(language)
+    if query is None:
+        return set()
+
+    calls = set()
+    for capture, nodes in query.captures(node).items():
+        for name_node in nodes:
+            # The same few names recur across the repo, interned they are stored once
+            name = sys.intern(name_node.text.decode('utf-8', errors='ignore'))
+            if capture == "component" and not name[:1].isupper():
+                continue
+            calls.add(name)
+
+    return {c for c in calls if len(c) > 1 and c.lower() not in IGNORED_CALLS}
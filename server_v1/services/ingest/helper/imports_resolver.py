@@ -1,7 +1,8 @@
 # services/ingest/file_traversal.py
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
 from core.logging import get_logger
+from services.ingest.helper.regex_extractor.extract_imports import extract_imports
 
 
 logger = get_logger(__name__)
@@ -20,9 +21,27 @@ STANDARD_LIBS = {
 
 
 
+def to_relative_path(path: str, repo_path: str) -> str:
+    """os.path.relpath for paths under the repo, by slicing instead of resolving both sides."""
+    prefix = os.path.join(os.path.normpath(repo_path), '')
+    path = os.path.normpath(path)
+    if path.startswith(prefix):
+        return path[len(prefix):]
+    return os.path.relpath(path, repo_path)
+
+
+def build_file_index(files: List[Tuple[str, Optional[str]]], repo_path: str) -> Set[str]:
+    """Repo relative paths of the files collect_files found, for resolving imports without disk probes."""
+    return {to_relative_path(file_path, repo_path) for file_path, _ in files}
+
+
 def resolve_import_path_to_file(import_module: str, current_file: str, 
-                                 repo_path: str, language: str) -> Optional[str]:
-    
+                                 repo_path: str, language: str,
+                                 known_files: Optional[Set[str]] = None) -> Optional[str]:
+    """
+    Repo relative path of the file an import points to. With `known_files`
+    candidates are looked up in that index, otherwise probed on disk.
+    """
     current_dir = os.path.dirname(current_file)
     
     if language == 'python':
@@ -63,7 +82,11 @@ def resolve_import_path_to_file(import_module: str, current_file: str,
     
     # Check which path exists and return relative to repo_path
     for path in possible_paths:
-        if os.path.isfile(path):
+        if known_files is not None:
+            relative_path = to_relative_path(path, repo_path)
+            if relative_path in known_files:
+                return relative_path
+        elif os.path.isfile(path):
             return os.path.relpath(path, repo_path)
     
     return None
@@ -84,12 +107,21 @@ def is_external_import(import_module: str, language: str) -> bool:
     return False
 
 
-def find_imported_items_in_file(file_nodes: List[Dict], imported_items: List[str]) -> List[str]:
+def build_name_index(file_nodes: List[Dict]) -> Dict[str, str]:
+    """name -> id of the first node with that name in a file, FILE nodes left out."""
+    name_index = {}
+    for node in file_nodes:
+        if node.get('ast_type', '') != 'file' and node.get('name') is not None:
+            name_index.setdefault(node['name'], node['id'])
+    return name_index
+
+
+def find_imported_items_in_file(name_index: Dict[str, str], imported_items: List[str]) -> List[str]:
     """
     Find the node IDs of specific imported items within a file's nodes.
     
     Args:
-        file_nodes: All nodes from the imported file
+        name_index: build_name_index of the imported file's nodes
         imported_items: List of item names to find (functions, classes, etc.)
     
     Returns:
@@ -102,44 +134,50 @@ def find_imported_items_in_file(file_nodes: List[Dict], imported_items: List[str
         if item_name.startswith('*'):
             continue
             
-        # Look for matching definitions in the file
-        for node in file_nodes:
-            node_name = node.get('name')
-            ast_type = node.get('ast_type', '')
-            
-            # Skip FILE nodes
-            if ast_type == 'file':
-                continue
-            
-            # Match by name
-            if node_name == item_name:
-                matched_node_ids.append(node['id'])
-                logger.debug(f"Found match: {item_name} -> {node['id']} (type: {ast_type})")
-                break
+        node_id = name_index.get(item_name)
+        if node_id is not None:
+            matched_node_ids.append(node_id)
+            logger.debug(f"Found match: {item_name} -> {node_id}")
     
     return matched_node_ids
 
 
-def resolve_imports_to_node_ids(all_nodes: List[Dict], repo_path: str) -> List[Dict]:
+def resolve_imports_to_node_ids(
+    all_nodes: List[Dict],
+    repo_path: str,
+    known_files: Optional[Set[str]] = None
+) -> List[Dict]:
     """
     Resolve all imports_from to actual node IDs for internal imports.
     
     Args:
         all_nodes: List of all extracted nodes
         repo_path: Root directory of the repository
+        known_files: build_file_index of the repo, defaults to the files of `all_nodes`
     
     Returns:
         Updated list of nodes with resolved import references
     """
-    # Build file to nodes mapping
+    # Build file to nodes mapping, relpath once per file rather than per node
     file_to_nodes = {}
+    relative_paths = {}
     for node in all_nodes:
         file_path = node.get('file', '')
         if file_path:
-            relative_path = os.path.relpath(file_path, repo_path)
-            if relative_path not in file_to_nodes:
-                file_to_nodes[relative_path] = []
-            file_to_nodes[relative_path].append(node)
+            relative_path = relative_paths.get(file_path)
+            if relative_path is None:
+                relative_path = relative_paths[file_path] = to_relative_path(file_path, repo_path)
+            file_to_nodes.setdefault(relative_path, []).append(node)
+
+    if known_files is None:
+        known_files = set(file_to_nodes)
+
+    # Per file name -> node id and FILE node, so each imported item is one lookup
+    name_indexes = {path: build_name_index(nodes) for path, nodes in file_to_nodes.items()}
+    file_node_ids = {
+        path: next((n['id'] for n in nodes if n.get('ast_type') == 'file'), None)
+        for path, nodes in file_to_nodes.items()
+    }
     
     logger.info(f"Resolving imports across {len(file_to_nodes)} files...")
     
@@ -168,7 +206,7 @@ def resolve_imports_to_node_ids(all_nodes: List[Dict], repo_path: str) -> List[D
             
             # Try to resolve to actual file
             resolved_file = resolve_import_path_to_file(
-                module, current_file, repo_path, language
+                module, current_file, repo_path, language, known_files
             )
             
             if not resolved_file:
@@ -192,7 +230,7 @@ def resolve_imports_to_node_ids(all_nodes: List[Dict], repo_path: str) -> List[D
             
             # Find specific imported items in the file
             if items and items != ['*']:
-                resolved_node_ids = find_imported_items_in_file(imported_file_nodes, items)
+                resolved_node_ids = find_imported_items_in_file(name_indexes[resolved_file], items)
                 
                 # Debug: Log available nodes if nothing found
                 if not resolved_node_ids:
@@ -202,8 +240,8 @@ def resolve_imports_to_node_ids(all_nodes: List[Dict], repo_path: str) -> List[D
                         logger.debug(f"  - {n.get('name')} ({n.get('ast_type')})")
             else:
                 # Import entire file - reference the FILE node
-                file_node = next((n for n in imported_file_nodes if n['ast_type'] == 'file'), None)
-                resolved_node_ids = [file_node['id']] if file_node else []
+                file_node_id = file_node_ids[resolved_file]
+                resolved_node_ids = [file_node_id] if file_node_id else []
             
             # Update import info with resolved data
             import_info['is_external'] = False
@@ -218,3 +256,45 @@ def resolve_imports_to_node_ids(all_nodes: List[Dict], repo_path: str) -> List[D
     
     logger.info("Import resolution complete!")
     return all_nodes
+
+
+def find_importing_files(
+    files: List[Tuple[str, str]],
+    target_files: Set[str],
+    repo_path: str,
+    known_files: Optional[Set[str]] = None
+) -> List[str]:
+    """
+    Find source files whose imports resolve to one of `target_files`.
+    Uses the regex import extractor only, no AST parsing.
+
+    Args:
+        files: (file_path, language) of the source files to scan
+        target_files: Repo relative paths of the imported files
+        repo_path: Root directory of the repository
+        known_files: build_file_index of the repo, imports are probed on disk without it
+    
+    Returns:
+        Paths (as given in `files`) of the importing files
+    """
+    importers = []
+    
+    for file_path, language in files:
+        try:
+            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+                code_str = f.read()
+        except Exception as e:
+            logger.error(f"Error reading file {file_path}: {e}")
+            continue
+        
+        for import_info in extract_imports(code_str, language):
+            module = import_info.get('module', '')
+            if is_external_import(module, language):
+                continue
+            
+            resolved_file = resolve_import_path_to_file(module, file_path, repo_path, language, known_files)
+            if resolved_file and os.path.normpath(resolved_file) in target_files:
+                importers.append(file_path)
+                break
+    
+    return importers
@@ -1,10 +1,29 @@
 from typing import Dict, List
 import re
 
+# Compiled once. Each pattern starts with a literal keyword, which lets `re`
+# skip ahead to candidate positions instead of trying every offset.
+PY_FROM_IMPORT = re.compile(r'from\s+([a-zA-Z0-9_.]+)\s+import\s+(\([^)]*\)|[^;\n]+)')
+PY_DIRECT_IMPORT = re.compile(r'import\s+([a-zA-Z0-9_., ]+)')
+
+JS_NAMED_IMPORT = re.compile(r'import\s+\{([^}]+)\}\s+from\s+[\'"]([^\'"]+)[\'"]')
+JS_DEFAULT_IMPORT = re.compile(r'import\s+([a-zA-Z0-9_$]+)\s+from\s+[\'"]([^\'"]+)[\'"]')
+JS_NAMESPACE_IMPORT = re.compile(r'import\s+\*\s+as\s+([a-zA-Z0-9_$]+)\s+from\s+[\'"]([^\'"]+)[\'"]')
+JS_REQUIRE_DESTRUCTURE = re.compile(r'(?:const|let|var)\s+\{([^}]+)\}\s*=\s*require\([\'"]([^\'"]+)[\'"]\)')
+JS_REQUIRE = re.compile(r'(?:const|let|var)\s+([a-zA-Z0-9_$]+)\s*=\s*require\([\'"]([^\'"]+)[\'"]\)')
+JS_RE_EXPORT = re.compile(r'export\s+\{([^}]+)\}\s+from\s+[\'"]([^\'"]+)[\'"]')
+
+
+def split_items(items_str: str, separator: str = ' as ') -> List[str]:
+    return [item.strip().split(separator)[0].strip() for item in items_str.split(',') if item.strip()]
+
+
 def extract_imports(code_str: str, language: str) -> List[Dict[str, any]]:
     """
     Extract all imports with their specific items (functions, classes, variables).
-    
+    Linear in the file size: a fixed number of regex scans, and overlaps are
+    checked by match offsets instead of searching the text again.
+
     Returns:
         List of dicts containing:
         - 'module': The module/file path being imported from
@@ -13,116 +32,97 @@ def extract_imports(code_str: str, language: str) -> List[Dict[str, any]]:
         - 'raw_statement': The original import statement
     """
     imports = []
-    
+
     if language == 'python':
-        # Pattern: from module import item1, item2, item3
-        from_import_pattern = r'from\s+([a-zA-Z0-9_.]+)\s+import\s+([^;\n]+)'
-        matches = re.findall(from_import_pattern, code_str, re.MULTILINE)
-        for module, items_str in matches:
-            # Split items and clean them
-            items = [item.strip().split(' as ')[0].strip() 
-                    for item in items_str.split(',')]
+        # Pattern: from module import item1, item2 (also the parenthesised multi line form)
+        from_spans = []
+        for match in PY_FROM_IMPORT.finditer(code_str):
+            module, items_str = match.groups()
+            if items_str.startswith('('):
+                items_str = ' '.join(items_str.strip('()').split()).rstrip(',')
+            from_spans.append(match.span())
             imports.append({
                 'module': module,
-                'items': items,
+                'items': split_items(items_str),
                 'import_type': 'from_import',
                 'raw_statement': f'from {module} import {items_str}'
             })
-        
+
         # Pattern: import module1, module2
-        direct_import_pattern = r'import\s+([a-zA-Z0-9_., ]+)'
-        matches = re.findall(direct_import_pattern, code_str, re.MULTILINE)
-        for modules_str in matches:
-            # Skip if it's part of a 'from ... import' statement
-            if 'from' in code_str[max(0, code_str.find(modules_str)-10):code_str.find(modules_str)]:
+        # Matches inside a 'from ... import' statement are skipped; both scans
+        # run front to back, so one pointer into from_spans is enough
+        span_index = 0
+        for match in PY_DIRECT_IMPORT.finditer(code_str):
+            while span_index < len(from_spans) and from_spans[span_index][1] <= match.start():
+                span_index += 1
+            if span_index < len(from_spans) and from_spans[span_index][0] <= match.start():
                 continue
-            modules = [m.strip().split(' as ')[0].strip() 
-                      for m in modules_str.split(',')]
-            for module in modules:
+            for module in split_items(match.group(1)):
                 imports.append({
                     'module': module,
                     'items': [module],  # For direct import, the module itself is the item
                     'import_type': 'direct_import',
                     'raw_statement': f'import {module}'
                 })
-    
+
     elif language in ['javascript', 'typescript']:
         # Pattern: import { item1, item2 } from 'module'
-        named_import_pattern = r'import\s+\{([^}]+)\}\s+from\s+[\'"]([^\'"]+)[\'"]'
-        matches = re.findall(named_import_pattern, code_str, re.MULTILINE)
-        for items_str, module in matches:
-            items = [item.strip().split(' as ')[0].strip() 
-                    for item in items_str.split(',')]
+        for items_str, module in JS_NAMED_IMPORT.findall(code_str):
             imports.append({
                 'module': module,
-                'items': items,
+                'items': split_items(items_str),
                 'import_type': 'named_import',
                 'raw_statement': f'import {{ {items_str} }} from "{module}"'
             })
-        
+
         # Pattern: import defaultItem from 'module'
-        default_import_pattern = r'import\s+([a-zA-Z0-9_$]+)\s+from\s+[\'"]([^\'"]+)[\'"]'
-        matches = re.findall(default_import_pattern, code_str, re.MULTILINE)
-        for item, module in matches:
-            # Skip if it's part of a named import or namespace import
-            if '{' in code_str[max(0, code_str.find(item)-20):code_str.find(item)] or \
-               '*' in code_str[max(0, code_str.find(item)-20):code_str.find(item)]:
-                continue
+        # The name directly follows 'import', so named and namespace imports never match here
+        for item, module in JS_DEFAULT_IMPORT.findall(code_str):
             imports.append({
                 'module': module,
                 'items': [item],
                 'import_type': 'default_import',
                 'raw_statement': f'import {item} from "{module}"'
             })
-        
+
         # Pattern: import * as namespace from 'module'
-        namespace_import_pattern = r'import\s+\*\s+as\s+([a-zA-Z0-9_$]+)\s+from\s+[\'"]([^\'"]+)[\'"]'
-        matches = re.findall(namespace_import_pattern, code_str, re.MULTILINE)
-        for namespace, module in matches:
+        for namespace, module in JS_NAMESPACE_IMPORT.findall(code_str):
             imports.append({
                 'module': module,
                 'items': [f'* as {namespace}'],
                 'import_type': 'namespace_import',
                 'raw_statement': f'import * as {namespace} from "{module}"'
             })
-        
+
+        # The require patterns start with an alternation, which `re` can't skip
+        # ahead on; most ES module files have no require at all
+        has_require = 'require' in code_str
+
         # Pattern: const { item1, item2 } = require('module')
-        require_destructure_pattern = r'(?:const|let|var)\s+\{([^}]+)\}\s*=\s*require\([\'"]([^\'"]+)[\'"]\)'
-        matches = re.findall(require_destructure_pattern, code_str, re.MULTILINE)
-        for items_str, module in matches:
-            items = [item.strip().split(':')[0].strip() 
-                    for item in items_str.split(',')]
+        for items_str, module in JS_REQUIRE_DESTRUCTURE.findall(code_str) if has_require else []:
             imports.append({
                 'module': module,
-                'items': items,
+                'items': split_items(items_str, separator=':'),
                 'import_type': 'require_destructure',
                 'raw_statement': f'const {{ {items_str} }} = require("{module}")'
             })
-        
-        # Pattern: const item = require('module')
-        require_pattern = r'(?:const|let|var)\s+([a-zA-Z0-9_$]+)\s*=\s*require\([\'"]([^\'"]+)[\'"]\)'
-        matches = re.findall(require_pattern, code_str, re.MULTILINE)
-        for item, module in matches:
-            # Skip if it's destructuring
-            if '{' not in code_str[max(0, code_str.find(item)-5):code_str.find(item)]:
-                imports.append({
-                    'module': module,
-                    'items': [item],
-                    'import_type': 'require',
-                    'raw_statement': f'const {item} = require("{module}")'
-                })
-        
+
+        # Pattern: const item = require('module'), destructuring can't match a bare name
+        for item, module in JS_REQUIRE.findall(code_str) if has_require else []:
+            imports.append({
+                'module': module,
+                'items': [item],
+                'import_type': 'require',
+                'raw_statement': f'const {item} = require("{module}")'
+            })
+
         # Pattern: export { item1 } from 'module'
-        re_export_pattern = r'export\s+\{([^}]+)\}\s+from\s+[\'"]([^\'"]+)[\'"]'
-        matches = re.findall(re_export_pattern, code_str, re.MULTILINE)
-        for items_str, module in matches:
-            items = [item.strip().split(' as ')[0].strip() 
-                    for item in items_str.split(',')]
+        for items_str, module in JS_RE_EXPORT.findall(code_str):
             imports.append({
                 'module': module,
-                'items': items,
+                'items': split_items(items_str),
                 'import_type': 're_export',
                 'raw_statement': f'export {{ {items_str} }} from "{module}"'
             })
-    
-    return imports
\ No newline at end of file
+
+    return imports
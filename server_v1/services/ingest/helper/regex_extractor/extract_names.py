@@ -1,8 +1,9 @@
 from typing import Optional
 import re
 
-# Extract the name from the text chunk, like function name in the function chunk
-def extract_name_from_node(node, text: str, language: str) -> Optional[str]:
+# Extract the name from the text chunk, like function name in the function chunk.
+# `source` is the bytes of the whole file, only the node's span is searched.
+def extract_name_from_node(node, source: bytes, language: str) -> Optional[str]:
 
     # Try direct children first
     for child in node.children:
@@ -26,6 +27,8 @@ def extract_name_from_node(node, text: str, language: str) -> Optional[str]:
         ]
     }
     
+    # Decoded only for the chunks that get here, from the span without a slice copy
+    text = str(memoryview(source)[node.start_byte:node.end_byte], 'utf-8', 'ignore')
     for pattern in patterns.get(language, []):
         match = re.search(pattern, text)
         if match:
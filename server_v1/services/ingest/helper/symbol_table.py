@@ -0,0 +1,238 @@
+import os, threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Set
+import numpy as np
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+CALL_GRAPH_DIR = os.getenv("CALL_GRAPH_DIR") or os.path.join("data", "callgraphs")
+
+# Calls only resolve within the same language family
+LANGUAGE_FAMILIES = {
+    "python": "python",
+    "javascript": "js",
+    "typescript": "js",
+}
+
+CALLABLE_TYPES = {"function": "function_call", "method": "function_call",
+                  "class": "class_call", "interface": "class_call", "enum": "class_call"}
+
+# Importing one of these imports its package, and whatever the package re-exports
+PACKAGE_ENTRY_FILES = {"__init__.py", "index.js", "index.jsx", "index.ts", "index.tsx"}
+
+
+def get_metadata(node: Dict) -> Dict:
+    return node.get("metadata") or {}
+
+
+class SymbolTable:
+    """
+    Repo-wide name -> definition index, plus what each file imports, built
+    once after extraction and import resolution.
+    """
+
+    def __init__(self, nodes: Iterable[Dict], repo_path: Optional[str] = None):
+        self.definitions: Dict[tuple, List[str]] = {}
+        self.node_file: Dict[str, str] = {}
+        self.node_relative_file: Dict[str, str] = {}
+        self.node_kind: Dict[str, str] = {}
+        self.imported_ids: Dict[str, Set[str]] = {}
+        self.imported_files: Dict[str, Set[str]] = {}
+        self.imported_packages: Dict[str, Set[str]] = {}
+
+        for node in nodes:
+            node_id, file_path = node.get("id"), node.get("file")
+            meta = get_metadata(node)
+            kind = CALLABLE_TYPES.get(meta.get("definition_type"))
+            family = LANGUAGE_FAMILIES.get(node.get("language"))
+
+            if meta.get("is_definition") and node.get("name") and kind and family:
+                self.definitions.setdefault((family, node["name"]), []).append(node_id)
+                self.node_file[node_id] = file_path
+                self.node_kind[node_id] = kind
+                if repo_path:
+                    self.node_relative_file[node_id] = os.path.normpath(os.path.relpath(file_path, repo_path))
+
+            if node.get("ast_type") == "file":
+                for import_info in (node.get("relationships") or {}).get("imports_from", []):
+                    self.imported_ids.setdefault(file_path, set()).update(import_info.get("resolved_node_ids") or [])
+                    if import_info.get("resolved_file"):
+                        resolved_file = os.path.normpath(import_info["resolved_file"])
+                        self.imported_files.setdefault(file_path, set()).add(resolved_file)
+                        if os.path.basename(resolved_file) in PACKAGE_ENTRY_FILES:
+                            self.imported_packages.setdefault(file_path, set()).add(os.path.dirname(resolved_file))
+
+    def resolve(self, name: str, language: str, file_path: str) -> List[str]:
+        """
+        Definition ids a call to `name` from `file_path` most likely reaches:
+        the same-named definitions of other files that the file imports, by
+        node, by file, or through a package it imports. Even a unique
+        definition needs that evidence, a call of a common name (get, run,
+        close) is as likely to be a method of a library object.
+        """
+        candidates = self.definitions.get((LANGUAGE_FAMILIES.get(language), name))
+        if not candidates:
+            return []
+
+        imported_ids = self.imported_ids.get(file_path, set())
+        imported_files = self.imported_files.get(file_path, set())
+        imported_packages = self.imported_packages.get(file_path, set())
+
+        def imported(node_id: str) -> bool:
+            if node_id in imported_ids:
+                return True
+            relative_file = self.node_relative_file.get(node_id)
+            if relative_file is None:
+                return False
+            return relative_file in imported_files or any(
+                package == "" or relative_file.startswith(package + os.sep)
+                for package in imported_packages
+            )
+
+        return [
+            node_id for node_id in candidates
+            if self.node_file[node_id] != file_path and imported(node_id)
+        ]
+
+
+def resolve_cross_file_calls(
+    nodes: List[Dict],
+    symbols: SymbolTable,
+    only_targets: Optional[Set[str]] = None
+) -> int:
+    """
+    Add function_call / class_call relationships for calls the per-file pass
+    couldn't resolve (the callee lives in another file). Linear in the number
+    of calls, each lookup is a dict hit plus the few same-named definitions.
+
+    Args:
+        only_targets: When given, only edges into these node ids are added
+
+    Returns:
+        Number of edges added
+    """
+    added = 0
+
+    for node in nodes:
+        calls = get_metadata(node).get("calls")
+        relationships = node.get("relationships")
+        if not calls or relationships is None:
+            continue
+
+        linked = set(relationships.get("function_call") or []) | set(relationships.get("class_call") or [])
+        for call_name in calls:
+            for target in symbols.resolve(call_name, node.get("language"), node.get("file")):
+                if target in linked or target == node.get("id"):
+                    continue
+                if only_targets is not None and target not in only_targets:
+                    continue
+                relationships.setdefault(symbols.node_kind[target], []).append(target)
+                linked.add(target)
+                added += 1
+
+    logger.info(f"Resolved {added} cross-file calls")
+    return added
+
+
+class CallGraph:
+    """
+    Compressed adjacency (CSR) of the FUNCTION_CALL / CLASS_CALL edges of a
+    session: node i calls targets[offsets[i]:offsets[i+1]]. Two int32 arrays
+    plus the id list, instead of a dict of lists per node.
+    """
+
+    def __init__(self, ids: List[str], offsets: np.ndarray, targets: np.ndarray):
+        self.ids = ids
+        self.index = {node_id: i for i, node_id in enumerate(ids)}
+        self.offsets = offsets
+        self.targets = targets
+        self._fan_in = None
+
+    @classmethod
+    def from_edges(cls, ids: List[str], callees: Dict[str, List[str]]) -> "CallGraph":
+        """Build from node ids and a caller id -> callee ids mapping."""
+        index = {node_id: i for i, node_id in enumerate(ids)}
+
+        offsets, targets = array("i", [0]), array("i")
+        for node_id in ids:
+            for target in callees.get(node_id, ()):
+                if target in index:
+                    targets.append(index[target])
+            offsets.append(len(targets))
+
+        return cls(ids, np.frombuffer(offsets, dtype=np.int32), np.frombuffer(targets, dtype=np.int32))
+
+    @classmethod
+    def from_nodes(cls, nodes: Iterable[Dict]) -> "CallGraph":
+        nodes = list(nodes)
+        callees = {}
+        for node in nodes:
+            relationships = node.get("relationships") or {}
+            callees[node["id"]] = (relationships.get("function_call") or []) + (relationships.get("class_call") or [])
+        return cls.from_edges([node["id"] for node in nodes], callees)
+
+    def callees(self, node_id: str) -> List[str]:
+        i = self.index.get(node_id)
+        if i is None:
+            return []
+        return [self.ids[t] for t in self.targets[self.offsets[i]:self.offsets[i + 1]]]
+
+    def fan_in(self, node_id: str) -> int:
+        """Number of nodes calling a node."""
+        if self._fan_in is None:
+            self._fan_in = np.bincount(self.targets, minlength=len(self.ids))
+        i = self.index.get(node_id)
+        return 0 if i is None else int(self._fan_in[i])
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, ids=np.array(self.ids, dtype=str), offsets=self.offsets, targets=self.targets)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CallGraph":
+        with np.load(path) as data:
+            return cls(data["ids"].tolist(), data["offsets"], data["targets"])
+
+
+__call_graphs: Dict[str, CallGraph] = {}
+__graphs_lock = threading.Lock()
+
+
+def call_graph_path(session_id: str) -> str:
+    return os.path.join(CALL_GRAPH_DIR, os.path.basename(session_id) + ".npz")
+
+
+def save_call_graph(session_id: str, graph: CallGraph):
+    graph.save(call_graph_path(session_id))
+    with __graphs_lock:
+        __call_graphs[session_id] = graph
+    logger.info(f"Call graph of {session_id}: {len(graph.ids)} nodes, {len(graph.targets)} call edges")
+
+
+def get_call_graph(session_id: str) -> Optional[CallGraph]:
+    """Session call graph, loaded from disk on first use, None if never built."""
+    with __graphs_lock:
+        graph = __call_graphs.get(session_id)
+    if graph is not None:
+        return graph
+
+    path = call_graph_path(session_id)
+    if not os.path.isfile(path):
+        return None
+
+    graph = CallGraph.load(path)
+    with __graphs_lock:
+        __call_graphs[session_id] = graph
+    return graph
+
+
+def delete_call_graph(session_id: str):
+    with __graphs_lock:
+        __call_graphs.pop(session_id, None)
+    try:
+        os.remove(call_graph_path(session_id))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,234 @@
+import os, time, uuid, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from core.logging import get_logger
+from fastapi import HTTPException
+from services.ingest.pipeline import run_ingest_pipeline, run_incremental_ingest_pipeline, cleanup_session
+
+logger = get_logger(__name__)
+
+# Jobs running at the same time, and jobs allowed to wait for a free worker
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS") or 2)
+INGEST_MAX_QUEUE = int(os.getenv("INGEST_MAX_QUEUE") or 8)
+
+# Finished jobs are kept around this long so clients can read the final status
+JOB_RETENTION_SECONDS = int(os.getenv("INGEST_JOB_RETENTION_SECONDS") or 3600)
+
+ACTIVE_PHASES = ("queued", "cloning", "extracting", "embedding", "storing")
+
+
+class IngestJob:
+    """Mutable status of one ingestion, updated by the worker thread."""
+
+    def __init__(
+        self,
+        repo_url: Optional[str],
+        session_id: Optional[str] = None,
+        incremental: bool = False,
+        commit: Optional[str] = None
+    ):
+        self.job_id = str(uuid.uuid4())
+        self.session_id = session_id or self.job_id
+        self.repo_url = repo_url
+        self.incremental = incremental
+        self.commit = commit
+        self.phase = "queued"
+        self.error: Optional[str] = None
+
+        self.files_total = 0
+        self.files_parsed = 0
+        self.nodes_total = 0
+        self.nodes_embedded = 0
+        self.clone_seconds: Optional[float] = None
+        self.cache_bytes: Optional[int] = None
+
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.phase_started_at = self.created_at
+
+        self._lock = threading.Lock()
+
+    def set_phase(self, phase: str):
+        with self._lock:
+            now = time.time()
+            if self.started_at is None and phase != "queued":
+                self.started_at = now
+            if phase in ("done", "failed"):
+                self.finished_at = now
+            self.phase = phase
+            self.phase_started_at = now
+        logger.info(f"Job {self.job_id} -> {phase}")
+
+    def update(self, **counters):
+        with self._lock:
+            for key, value in counters.items():
+                setattr(self, key, value)
+
+    def on_files_parsed(self, files_parsed: int, files_total: int):
+        self.update(files_parsed=files_parsed, files_total=files_total)
+
+    def on_nodes_embedded(self, nodes_embedded: int, nodes_total: int):
+        self.update(nodes_embedded=nodes_embedded, nodes_total=nodes_total)
+
+    def eta_seconds(self) -> Optional[float]:
+        """Linear estimate for the remainder of the current phase."""
+        if self.phase == "extracting":
+            done, total = self.files_parsed, self.files_total
+        elif self.phase == "embedding":
+            done, total = self.nodes_embedded, self.nodes_total
+        else:
+            return None
+
+        if done <= 0 or total <= 0:
+            return None
+
+        elapsed = time.time() - self.phase_started_at
+        return round(elapsed / done * (total - done), 1)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "session_id": self.session_id,
+                "repo_url": self.repo_url,
+                "incremental": self.incremental,
+                "commit": self.commit,
+                "phase": self.phase,
+                "error": self.error,
+                "files_total": self.files_total,
+                "files_parsed": self.files_parsed,
+                "nodes_total": self.nodes_total,
+                "nodes_embedded": self.nodes_embedded,
+                "eta_seconds": self.eta_seconds(),
+                "clone_seconds": self.clone_seconds,
+                "cache_bytes": self.cache_bytes,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+__executor = None
+__jobs: Dict[str, IngestJob] = {}
+__jobs_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global __executor
+
+    if __executor is None:
+        __executor = ThreadPoolExecutor(
+            max_workers=INGEST_MAX_WORKERS,
+            thread_name_prefix="ingest"
+        )
+
+    return __executor
+
+
+def _run_job(job: IngestJob):
+    try:
+        if job.incremental:
+            run_incremental_ingest_pipeline(
+                job.session_id, repo_url=job.repo_url, commit=job.commit, job=job
+            )
+        else:
+            run_ingest_pipeline(job.repo_url, session_id=job.session_id, job=job)
+        job.set_phase("done")
+    except HTTPException as e:
+        job.update(error=str(e.detail))
+        job.set_phase("failed")
+    except Exception as e:
+        logger.error(f"Ingest job {job.job_id} failed | Error : {e}")
+        job.update(error=str(e))
+        job.set_phase("failed")
+
+
+def _prune_finished_jobs():
+    cutoff = time.time() - JOB_RETENTION_SECONDS
+    for job_id in [
+        job_id for job_id, job in __jobs.items()
+        if job.finished_at is not None and job.finished_at < cutoff
+    ]:
+        del __jobs[job_id]
+
+
+def submit_ingest_job(
+    repo_url: Optional[str],
+    session_id: Optional[str] = None,
+    commit: Optional[str] = None
+) -> IngestJob:
+    """
+    Queue a repo for ingestion and return immediately. Passing the
+    session_id of an existing session queues an incremental update instead.
+
+    Raises:
+        HTTPException(429) when every worker is busy and the wait queue is full
+        HTTPException(409) when the session already has an active job
+    """
+    with __jobs_lock:
+        _prune_finished_jobs()
+
+        active_jobs = [job for job in __jobs.values() if job.phase in ACTIVE_PHASES]
+        if session_id and any(job.session_id == session_id for job in active_jobs):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Session {session_id} is already being ingested"
+            )
+
+        active = len(active_jobs)
+        if active >= INGEST_MAX_WORKERS + INGEST_MAX_QUEUE:
+            logger.warning(f"Ingest queue full ({active} active jobs), rejecting {repo_url}")
+            raise HTTPException(
+                status_code=429,
+                detail="Too many repositories are being ingested, please retry later",
+                headers={"Retry-After": "60"}
+            )
+
+        job = IngestJob(
+            repo_url,
+            session_id=session_id,
+            incremental=session_id is not None,
+            commit=commit
+        )
+        __jobs[job.job_id] = job
+
+    get_executor().submit(_run_job, job)
+    logger.info(f"Queued ingest job {job.job_id} for {repo_url or job.session_id}")
+    return job
+
+
+def get_job(job_id: str) -> Optional[IngestJob]:
+    with __jobs_lock:
+        return __jobs.get(job_id)
+
+
+def get_queue_position(job: IngestJob) -> Optional[int]:
+    """1-based position among queued jobs, None once the job has started."""
+    with __jobs_lock:
+        queued = sorted(
+            (j for j in __jobs.values() if j.phase == "queued"),
+            key=lambda j: j.created_at
+        )
+
+    for position, queued_job in enumerate(queued, start=1):
+        if queued_job is job:
+            return position
+    return None
+
+
+def delete_session(session_id: str):
+    """
+    Remove an ingested session.
+
+    Raises:
+        HTTPException(409) when the session has an active job
+    """
+    with __jobs_lock:
+        if any(job.session_id == session_id and job.phase in ACTIVE_PHASES for job in __jobs.values()):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Session {session_id} is being ingested, retry once the job is done"
+            )
+
+    cleanup_session(session_id)
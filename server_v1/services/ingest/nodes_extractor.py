@@ -1,8 +1,10 @@
+import re
 from typing import Dict, List, Optional, Set
 from services.ingest.parser import get_parser
 from core.logging import get_logger
+from services.ingest.code_node import CodeNode
 
-from services.ingest.helper.regex_extractor.extract_calls import extract_calls_from_text
+from services.ingest.helper.call_extractor import extract_calls_from_node
 from services.ingest.helper.regex_extractor.extract_imports import extract_imports
 from services.ingest.helper.regex_extractor.extract_names import extract_name_from_node
 
@@ -11,6 +13,9 @@ logger = get_logger(__name__)
 MAX_CHUNK_SIZE = 1500  
 MIN_CHUNK_SIZE = 50 
 
+# Whitespace-only chunks are skipped, checked on the file bytes without slicing
+NON_WHITESPACE = re.compile(rb'\S')
+
 
 def make_base_node(
     node_id: str,
@@ -24,39 +29,37 @@ def make_base_node(
     start_byte: int,
     end_byte: int,
     size: int,
-    depth: int
-) -> Dict:
-    """Unified node skeleton for all node types."""
-    return {
-        "id": node_id,
-        "name": name,
-        "code_str": code_str,
-        "ast_type": ast_type,
-        "file": file_path,
-        "language": language,
-        "start_line": start_line,
-        "end_line": end_line,
-        "start_byte": start_byte,
-        "end_byte": end_byte,
-        "size": size,
-        "relationships": {
-            "belongs_to": [],      
-            "parent": [],        
-            "sibling": [],        
-            "function_call": [],  
-            "class_call": [],     
-            "implements": [],      
-            "extends": [],        
-            "imports_from": []    
-        },
-        "metadata": {
+    depth: int,
+    source: Optional[bytes] = None
+) -> CodeNode:
+    """
+    Unified node skeleton for all node types. Relationship types
+    (belongs_to, sibling, function_call, class_call, imports_from, ...)
+    are only added once a node has an edge of that type.
+
+    With `source` (the file's bytes) code_str is left None and read from
+    the [start_byte, end_byte) span of it when needed.
+    """
+    return CodeNode(
+        id=node_id,
+        name=name,
+        code_str=code_str,
+        ast_type=ast_type,
+        file=file_path,
+        language=language,
+        start_line=start_line,
+        end_line=end_line,
+        start_byte=start_byte,
+        end_byte=end_byte,
+        size=size,
+        relationships={},
+        metadata={
             "depth": depth,
-            "calls": [],          
-            "type_references": [], 
             "is_definition": False,
-            "definition_type": None 
-        }
-    }
+            "definition_type": None
+        },
+        source=source
+    )
 
 
 def extract_nodes_from_file(file_path: str, language: str, root_node_id: str) -> List[Dict]:
@@ -126,26 +129,23 @@ def extract_nodes_from_file(file_path: str, language: str, root_node_id: str) ->
         
         # CASE 1: Node fits - create chunk
         if node_size <= MAX_CHUNK_SIZE:
-            try:
-                text = node.text.decode('utf-8', errors='ignore')
-            except:
-                return sibling_ids
-            
-            if not text.strip():
+            # The chunk keeps a span of `code`, its text is only decoded when embedded or written
+            if not NON_WHITESPACE.search(code, node.start_byte, node.end_byte):
                 return sibling_ids
             
             # node.type = function_definition, for_statement, identifier, class declaration
-            chunk_id = f"{file_path}:{node.start_point[0]}:{node.type}"
+            # The column keeps ids unique with several statements on a line (minified code)
+            chunk_id = f"{file_path}:{node.start_point[0]}:{node.start_point[1]}:{node.type}"
             
             # # Skip duplicates
             # if chunk_id in chunks_dict:
             #     return sibling_ids
             
             # Extract name, like for any function chunk, the name will be funciton name
-            name = extract_name_from_node(node, text, language)
+            name = extract_name_from_node(node, code, language)
             
-            # Extract calls from code text
-            calls = extract_calls_from_text(text, language)
+            # Extract calls from the chunk's subtree
+            calls = extract_calls_from_node(node, language)
             
             
             # Determine if definition and its type
@@ -158,13 +158,14 @@ def extract_nodes_from_file(file_path: str, language: str, root_node_id: str) ->
                 ast_type=node.type,
                 file_path=file_path,
                 language=language,
-                code_str=text,
+                code_str=None,
                 start_line=node.start_point[0] + 1,
                 end_line=node.end_point[0] + 1,
                 start_byte=node.start_byte,
                 end_byte=node.end_byte,
                 size=node_size,
-                depth=depth
+                depth=depth,
+                source=code
             )
             
             # Set relationships
@@ -172,14 +173,15 @@ def extract_nodes_from_file(file_path: str, language: str, root_node_id: str) ->
             
             # Add nearby siblings (last 2-3 only)
             nearby_siblings = sibling_ids[-2:] if len(sibling_ids) >= 2 else sibling_ids
-            chunk["relationships"]["sibling"] = nearby_siblings.copy()
+            if nearby_siblings:
+                chunk["relationships"]["sibling"] = nearby_siblings.copy()
             
             # Imports only for import statement nodes
             if node.type in ['import_statement', 'import_declaration', 'import_from_statement']:
                 chunk["relationships"]["imports_from"] = file_imports
             
             # Set metadata
-            chunk["metadata"]["calls"] = list(calls)
+            chunk["metadata"]["calls"] = sorted(calls)
             chunk["metadata"]["is_definition"] = is_def
             chunk["metadata"]["definition_type"] = def_type
             
@@ -194,7 +196,7 @@ def extract_nodes_from_file(file_path: str, language: str, root_node_id: str) ->
             # Add bidirectional sibling links (only to nearby siblings)
             for sib_id in nearby_siblings:
                 if sib_id in chunks_dict:
-                    chunks_dict[sib_id]["relationships"]["sibling"].append(chunk_id)
+                    chunks_dict[sib_id]["relationships"].setdefault("sibling", []).append(chunk_id)
             
             return sibling_ids + [chunk_id]
         
@@ -236,12 +238,14 @@ def extract_nodes_from_file(file_path: str, language: str, root_node_id: str) ->
                 def_type = def_node["metadata"].get("definition_type")
                 
                 if def_type in ["function", "method"]:
-                    if def_node_id not in chunk["relationships"]["function_call"]:
-                        chunk["relationships"]["function_call"].append(def_node_id)
+                    function_calls = chunk["relationships"].setdefault("function_call", [])
+                    if def_node_id not in function_calls:
+                        function_calls.append(def_node_id)
                 
                 elif def_type in ["class", "interface", "enum"]:
-                    if def_node_id not in chunk["relationships"]["class_call"]:
-                        chunk["relationships"]["class_call"].append(def_node_id)
+                    class_calls = chunk["relationships"].setdefault("class_call", [])
+                    if def_node_id not in class_calls:
+                        class_calls.append(def_node_id)
 
     return all_nodes
 
@@ -1,25 +1,315 @@
+import os
+from typing import Dict, List, Optional
+from fastapi import HTTPException
 from core.logging import get_logger
-from services.ingest.repo_handler import clone_repo, cleanup_repo
-from services.ingest.file_traversal import extract_all_nodes
-from services.ingest.storage import store_nodes_in_neo4j
-import uuid
+from services.ingest.repo_handler import clone_repo, cleanup_repo, get_head_commit, diff_commits, get_mirror_cache_size
+from services.ingest.file_traversal import (
+    extract_file,
+    collect_files,
+    get_file_language,
+    is_indexed_path,
+    make_root_node,
+    iter_extracted_batches,
+    resolve_cross_file_edges,
+)
+from services.ingest.streaming import stream_nodes_to_neo4j
+from services.ingest.helper.imports_resolver import resolve_imports_to_node_ids, find_importing_files, build_file_index
+from services.ingest.helper.symbol_table import (
+    PACKAGE_ENTRY_FILES,
+    SymbolTable,
+    CallGraph,
+    resolve_cross_file_calls,
+    save_call_graph,
+    delete_call_graph,
+)
+from services.retreive.query_cache import invalidate_session
+from services.ingest.storage import (
+    store_nodes_in_neo4j,
+    embed_nodes,
+    append_vectors,
+    write_nodes,
+    write_node_edges,
+    finish_session_nodes,
+    set_session_info,
+    get_session_info,
+    mark_session_dirty,
+    get_importer_files,
+    get_node_stubs,
+    delete_file_nodes,
+    delete_session_nodes,
+    write_relationship_edges,
+    build_relationship_edges,
+    get_call_edges,
+    replace_import_edges,
+)
+import uuid, time
 
 logger = get_logger(__name__)
 
-def run_ingest_pipeline(repo_url: str):
 
-    session_id, repo_path = clone_repo(repo_url)
-    all_nodes = extract_all_nodes(repo_path)
-    cleanup_repo(repo_path)
-    
-    if not all_nodes:
-        logger.info("No nodes found")
-        return session_id
+def timed_clone(repo_url: str, session_id: Optional[str], job=None, **kwargs):
+    """clone_repo, reporting clone time and mirror cache disk usage."""
+    started = time.perf_counter()
+    session_id, repo_path = clone_repo(repo_url, session_id, **kwargs)
+    clone_seconds = round(time.perf_counter() - started, 2)
+    cache_bytes = get_mirror_cache_size()
 
-    store_nodes_in_neo4j(all_nodes, session_id)
+    logger.info(f"Clone took {clone_seconds}s, mirror cache uses {cache_bytes} bytes")
+    if job is not None:
+        job.update(clone_seconds=clone_seconds, cache_bytes=cache_bytes)
+    return session_id, repo_path
+
+
+def package_entry_files(paths: List[str], known_files) -> List[str]:
+    """
+    The __init__ / index files of every package holding one of `paths`, the
+    files a package import resolves to. Repo relative, like `known_files`.
+    """
+    entries = set()
+    for path in paths:
+        directory = os.path.dirname(os.path.normpath(path))
+        while True:
+            entries.update(
+                entry for entry in (os.path.join(directory, name) for name in PACKAGE_ENTRY_FILES)
+                if entry in known_files
+            )
+            if not directory:
+                break
+            directory = os.path.dirname(directory)
+    return sorted(entries)
+
+
+def ingest_checkout(repo_path: str, session_id: str, job=None) -> List[Dict]:
+    """
+    Extract and store every node and edge of a checked out repo.
+
+    Parse, embed and write overlap, nodes are stored file batch by file batch.
+    Edges need every node of the repo, so they are resolved and written after.
+    The ROOT node goes in last: session_exists keys on it, so the session
+    only answers queries once everything else is stored.
+
+    Returns:
+        The nodes, without their code text
+    """
+    if job is not None:
+        job.set_phase("extracting")
+
+    files_to_extract = collect_files(repo_path)
+    batches = iter_extracted_batches(
+        repo_path,
+        files_to_extract,
+        progress_callback=job.on_files_parsed if job is not None else None
+    )
+    all_nodes = stream_nodes_to_neo4j(
+        batches,
+        session_id,
+        on_nodes_parsed=(lambda parsed: job.update(nodes_total=parsed)) if job is not None else None,
+        on_nodes_embedded=job.on_nodes_embedded if job is not None else None,
+        on_parsing_done=(lambda: job.set_phase("embedding")) if job is not None else None
+    )
+
+    if job is not None:
+        job.set_phase("storing")
+    resolve_cross_file_edges(all_nodes, repo_path, build_file_index(files_to_extract, repo_path))
+
+    # The files' edges into ROOT are all the stream left of their BELONGS_TO
+    root_node = make_root_node(repo_path)
+    root_edges = [
+        {"source": node["id"], "target": tid, "type": "BELONGS_TO"}
+        for node in all_nodes
+        for tid in node["relationships"].pop("belongs_to", ())
+    ]
+    write_node_edges(all_nodes, session_id)
+
+    root_embeddings = embed_nodes([root_node])
+    append_vectors([root_node], root_embeddings, session_id)
+    finish_session_nodes(session_id)
+    write_nodes([root_node], root_embeddings, session_id, with_vectors=False)
+    write_relationship_edges(root_edges, session_id)
+    return [root_node] + all_nodes
+
+
+def run_ingest_pipeline(
+    repo_url: str,
+    session_id: Optional[str] = None,
+    job=None,
+    commit: Optional[str] = None
+):
+    """
+    Clone, extract and store a repo.
+
+    Args:
+        repo_url: Repository to ingest
+        session_id: Pre-allocated session id, generated when not given
+        job: Optional IngestJob receiving phase and progress updates
+        commit: Commit to ingest, the remote HEAD when not given
+    """
+    if job is not None:
+        job.set_phase("cloning")
+    session_id, repo_path = timed_clone(repo_url, session_id, job, commit=commit)
+
+    try:
+        commit = get_head_commit(repo_path)
+        all_nodes = ingest_checkout(repo_path, session_id, job)
+        set_session_info(session_id, repo_url, commit)
+        save_call_graph(session_id, CallGraph.from_nodes(all_nodes))
+    except Exception:
+        # A half written session would otherwise stay around, and once its ROOT is in, answer queries
+        logger.error(f"Ingest of {repo_url} failed, removing session {session_id}")
+        try:
+            cleanup_session(session_id)
+        except Exception as e:
+            logger.error(f"Cleanup of session {session_id} failed | Error : {e}")
+        raise
+    finally:
+        cleanup_repo(repo_path)
+
+    invalidate_session(session_id)
     logger.info("Stored nodes in neo4j")
     return session_id
 
 
+def run_incremental_ingest_pipeline(
+    session_id: str,
+    repo_url: Optional[str] = None,
+    commit: Optional[str] = None,
+    job=None
+):
+    """
+    Bring an already ingested session up to `commit` (default: remote HEAD).
+
+    Only files added/modified/deleted since the session's recorded commit are
+    re-extracted and rewritten. Unchanged files whose imports point at changed
+    files keep their nodes, only their IMPORTS_FROM edges are re-resolved.
+
+    A session left dirty by an update that failed part way is rebuilt with
+    a full ingest instead.
+    """
+    info = get_session_info(session_id)
+    if not info or not info.get("commit"):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Session {session_id} has no recorded commit, run a full ingest first"
+        )
+    repo_url = repo_url or info["repo_url"]
+
+    if info.get("dirty"):
+        logger.warning(f"Session {session_id} was left part way through an update, re-ingesting it in full")
+        cleanup_session(session_id)
+        return run_ingest_pipeline(repo_url, session_id=session_id, job=job, commit=commit)
+
+    if job is not None:
+        job.set_phase("cloning")
+    # Same checkout path as the first ingest, so node ids line up
+    _, repo_path = timed_clone(repo_url, session_id, job, commit=commit, history=True)
+
+    try:
+        new_commit = get_head_commit(repo_path)
+        if new_commit == info["commit"]:
+            logger.info(f"Session {session_id} already at {new_commit}")
+            return session_id
+
+        changes = diff_commits(repo_path, info["commit"], new_commit)
+        added = [p for p in changes["added"] if is_indexed_path(p)]
+        modified = [p for p in changes["modified"] if is_indexed_path(p)]
+        deleted = [p for p in changes["deleted"] if is_indexed_path(p)]
+        logger.info(
+            f"Incremental ingest {info['commit'][:8]}..{new_commit[:8]}: "
+            f"{len(added)} added, {len(modified)} modified, {len(deleted)} deleted"
+        )
+
+        to_path = lambda p: os.path.join(repo_path, p)
+        changed_files = [to_path(p) for p in added + modified]
+        stale_files = [to_path(p) for p in modified + deleted]
+        touched = set(changed_files) | set(stale_files)
+
+        if job is not None:
+            job.set_phase("extracting")
+
+        # One walk of the checkout, imports resolve against it instead of probing the disk
+        repo_files = collect_files(repo_path)
+        known_files = build_file_index(repo_files, repo_path)
+
+        # Files importing something that changed, found before their edges get deleted
+        importer_files = set(get_importer_files(session_id, stale_files))
+        # Imports with no stored edge count as call evidence too: of a package
+        # re-exporting a changed file, of a changed file by a name that is no
+        # node, of an added file. Found by scanning the files left as they were.
+        scan_targets = {os.path.normpath(p) for p in added + modified + deleted}
+        scan_targets.update(package_entry_files(added + modified + deleted, known_files))
+        if scan_targets:
+            untouched_sources = [
+                (path, language) for path, language in repo_files
+                if language is not None and path not in touched
+            ]
+            importer_files.update(find_importing_files(untouched_sources, scan_targets, repo_path, known_files))
+        importer_files = sorted(f for f in importer_files if f not in touched and os.path.isfile(f))
+
+        new_nodes = []
+        for i, file_path in enumerate(changed_files, start=1):
+            new_nodes.extend(extract_file(file_path, get_file_language(file_path)[1], info["root_id"]))
+            if job is not None:
+                job.on_files_parsed(i, len(changed_files) + len(importer_files))
+
+        importer_nodes = []
+        for file_path in importer_files:
+            importer_nodes.extend(extract_file(file_path, get_file_language(file_path)[1], info["root_id"]))
+
+        # Stored nodes of untouched files stand in as import targets
+        stubs = get_node_stubs(session_id, exclude_files=list(touched) + importer_files)
+        resolve_imports_to_node_ids(new_nodes + importer_nodes + stubs, repo_path, known_files)
+
+        # Cross-file calls out of the new nodes, and into them from files left as they were
+        symbols = SymbolTable(new_nodes + importer_nodes + stubs, repo_path)
+        resolve_cross_file_calls(new_nodes, symbols)
+        new_ids = {node["id"] for node in new_nodes}
+        # Copies with no relationships, so only the new incoming calls become edges
+        callers = [{**node, "relationships": {}} for node in stubs + importer_nodes]
+        resolve_cross_file_calls(callers, symbols, only_targets=new_ids)
+        incoming_call_edges = [
+            edge for caller in callers for edge in build_relationship_edges(caller)
+        ]
+        if job is not None:
+            job.on_files_parsed(len(changed_files) + len(importer_files), len(changed_files) + len(importer_files))
+
+    finally:
+        cleanup_repo(repo_path)
+
+    # Marked before the first write, so a session left part way is never
+    # taken for one at its recorded commit
+    mark_session_dirty(session_id)
+    try:
+        delete_file_nodes(session_id, sorted(touched))
+
+        if new_nodes:
+            if job is not None:
+                job.set_phase("embedding")
+                job.update(nodes_total=len(new_nodes))
+            store_nodes_in_neo4j(
+                new_nodes,
+                session_id,
+                progress_callback=job.on_nodes_embedded if job is not None else None,
+                on_storing=(lambda: job.set_phase("storing")) if job is not None else None
+            )
+
+        if importer_files:
+            replace_import_edges(session_id, importer_files, importer_nodes)
+        write_relationship_edges(incoming_call_edges, session_id)
+
+        save_call_graph(session_id, CallGraph.from_edges(*get_call_edges(session_id)))
+        set_session_info(session_id, repo_url, new_commit)
+    except Exception:
+        logger.error(f"Update of session {session_id} to {new_commit} failed, its next update re-ingests it in full")
+        raise
+    finally:
+        invalidate_session(session_id)
+
+    logger.info(f"Session {session_id} updated to {new_commit}")
+    return session_id
 
 
+def cleanup_session(session_id: str):
+    """Remove everything stored for a session, including its cached answers."""
+    delete_session_nodes(session_id)
+    delete_call_graph(session_id)
+    invalidate_session(session_id)
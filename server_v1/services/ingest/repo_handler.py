@@ -1,15 +1,113 @@
-import uuid, git, os, shutil
+import uuid, git, os, shutil, hashlib, threading
+from typing import Dict, List, Optional
 from core.logging import get_logger
 from fastapi import HTTPException
+from services.ingest.file_traversal import LANGUAGES, IGNORE_DIRS
 
 logger = get_logger(__name__)
 
-def clone_repo(github_url: str):
-    session_id = str(uuid.uuid4())
+# Blobless bare mirrors, one per repo url, reused across ingests
+MIRROR_CACHE_ENABLED = (os.getenv("REPO_MIRROR_CACHE") or "1") != "0"
+MIRROR_CACHE_DIR = os.getenv("REPO_MIRROR_DIR") or os.path.join("data", "mirrors")
+
+__mirror_locks: Dict[str, threading.Lock] = {}
+__mirror_locks_guard = threading.Lock()
+
+
+def get_mirror_path(github_url: str) -> str:
+    url_hash = hashlib.sha1(github_url.strip().rstrip('/').encode()).hexdigest()
+    return os.path.abspath(os.path.join(MIRROR_CACHE_DIR, f"{url_hash}.git"))
+
+
+def get_sparse_patterns() -> List[str]:
+    """Only the files traversal will index get their blobs fetched and checked out."""
+    patterns = [f"*.{ext}" for ext in LANGUAGES] + [f"*{ext}" for ext in ('.md', '.txt')]
+    patterns += [f"!**/{d}/**" for d in sorted(IGNORE_DIRS)]
+    return patterns
+
+
+def get_dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                total += os.path.getsize(os.path.join(root, file))
+            except OSError:
+                pass
+    return total
+
+
+def get_mirror_cache_size() -> int:
+    """Disk usage of the bare mirror cache in bytes."""
+    if not os.path.isdir(MIRROR_CACHE_DIR):
+        return 0
+    return get_dir_size(MIRROR_CACHE_DIR)
+
+
+def update_mirror(github_url: str) -> str:
+    """
+    Create or refresh the blobless bare mirror of `github_url`. A refresh only
+    downloads the commits and trees added since the last fetch.
+    """
+    mirror_path = get_mirror_path(github_url)
+
+    with __mirror_locks_guard:
+        lock = __mirror_locks.setdefault(mirror_path, threading.Lock())
+
+    with lock:
+        if os.path.isdir(mirror_path):
+            logger.info(f"Updating mirror {mirror_path}")
+            # git.Repo misreads bare repos once worktree config is enabled, run git in the dir
+            mirror = git.Git(mirror_path)
+            mirror.fetch("--prune", "origin")
+            # Worktrees of already cleaned checkouts
+            mirror.worktree("prune")
+        else:
+            logger.info(f"Creating mirror {mirror_path}")
+            os.makedirs(MIRROR_CACHE_DIR, exist_ok=True)
+            git.Repo.clone_from(
+                github_url, mirror_path,
+                multi_options=["--mirror", "--filter=blob:none"]
+            )
+
+    return mirror_path
+
+
+def checkout_sparse(repo: git.Repo, ref: str):
+    repo.git.sparse_checkout("set", "--no-cone", *get_sparse_patterns())
+    repo.git.checkout("--detach", ref)
+
+
+def clone_repo(
+    github_url: str,
+    session_id: Optional[str] = None,
+    commit: Optional[str] = None,
+    history: bool = False
+):
+    """
+    Check out `github_url` at `commit` (default HEAD) under data/repos/<session_id>.
+
+    With the mirror cache enabled the checkout is a sparse worktree of a
+    cached blobless mirror. Without it, a blobless sparse clone is made,
+    shallow (depth 1) unless a commit or the history is needed.
+    """
+    session_id = session_id or str(uuid.uuid4())
     local_path = os.path.join("data", "repos", session_id)
     try:
         logger.info("Cloning the repo...")
-        git.Repo.clone_from(github_url, local_path)
+        if MIRROR_CACHE_ENABLED:
+            mirror_path = update_mirror(github_url)
+            git.Git(mirror_path).worktree(
+                "add", "--detach", "--no-checkout", os.path.abspath(local_path), commit or "HEAD"
+            )
+            checkout_sparse(git.Repo(local_path), commit or "HEAD")
+        else:
+            options = ["--filter=blob:none", "--no-checkout"]
+            if not commit and not history:
+                options.append("--depth=1")
+            repo = git.Repo.clone_from(github_url, local_path, multi_options=options)
+            checkout_sparse(repo, commit or "HEAD")
+
         logger.info(f"Repo cloned successfully on path : {local_path}")
         return session_id, local_path
     except Exception as e:
@@ -33,4 +131,40 @@ def cleanup_repo(repo_path: str):
         raise HTTPException(
             status_code=500,
             detail=f"Failed to cleanup repository: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+def get_head_commit(repo_path: str) -> str:
+    return git.Repo(repo_path).head.commit.hexsha
+
+
+def diff_commits(repo_path: str, old_commit: str, new_commit: str) -> Dict[str, List[str]]:
+    """
+    Files changed between two commits, relative to the repo root.
+    Renames are reported as a delete plus an add.
+
+    Returns:
+        {"added": [...], "modified": [...], "deleted": [...]}
+    """
+    changes = {"added": [], "modified": [], "deleted": []}
+    try:
+        output = git.Repo(repo_path).git.diff(
+            "--name-status", "--no-renames", old_commit, new_commit
+        )
+    except Exception as e:
+        logger.error(f"Failed to diff {old_commit}..{new_commit} | Error : {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to diff commits: {str(e)}"
+        )
+
+    for line in output.splitlines():
+        status, _, path = line.partition("\t")
+        if status.startswith("A"):
+            changes["added"].append(path)
+        elif status.startswith("D"):
+            changes["deleted"].append(path)
+        elif path:
+            changes["modified"].append(path)
+
+    return changes
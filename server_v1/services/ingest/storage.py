@@ -1,155 +1,614 @@
-from typing import List, Dict
+import os
+from array import array
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Set, Tuple
 from core.logging import get_logger
-from services.llm.embedding import get_embeddings
-from db.neo4j_client import get_neo4j_driver
+from services.llm.embedding import get_embeddings, vector_dim
+from db.neo4j_client import get_neo4j_driver, session_label, session_vector_index
+from services.vector_store.factory import get_vector_store
 from fastapi import HTTPException
 
 logger = get_logger(__name__)
 
 neo4j_driver = get_neo4j_driver()
 
-def store_nodes_in_neo4j(nodes: List[Dict], session_id: str):
+# Rows per write transaction, nodes carry their embedding so keep this moderate
+WRITE_BATCH_SIZE = int(os.getenv("NEO4J_WRITE_BATCH_SIZE") or 2000)
 
-    if not nodes:
-        logger.warning("No nodes to store in Neo4j.")
-        return
+# Per session vector index, keeps top-k search inside one repo
+SESSION_VECTOR_INDEXES = (os.getenv("SESSION_VECTOR_INDEXES") or "1") != "0"
 
-    flattened = []
-    relationship_edges = [] 
+__schema_ready = False
 
-    for node in nodes:
-        node_id = node.get("id")
-        meta = node.get("metadata", {})
-        rels = node.get("relationships", {})
-
-        flattened.append({
-            "id": node.get("id"),
-            "name": node.get("name") or node.get("ast_type"),
-            "code_str": node.get("code_str", ""),
-            "ast_type": node.get("ast_type"),
-            "file": node.get("file"),
-            "language": node.get("language"),
-            "start_line": node.get("start_line"),
-            "end_line": node.get("end_line"),
-            "start_byte": node.get("start_byte"),
-            "end_byte": node.get("end_byte"),
-            "size": node.get("size"),
-            "depth": meta.get("depth"),
-            "calls": meta.get("calls", []),
-            "type_references": meta.get("type_references", []),
-            "is_definition": meta.get("is_definition"),
-            "definition_type": meta.get("definition_type"),
-        })
-
-        # Resolving the imports and creating relationship list
-        for keys, values in rels.items():
-            if keys == "imports_from":
-                for imp in values:
-                    if imp.get("is_external"):
-                        continue
-
-                    resolved_ids = imp.get("resolved_node_ids", [])
-                    for tid in resolved_ids:
-                        relationship_edges.append({
-                            "source": node_id,
-                            "target": tid,
-                            "type": "IMPORTS_FROM"
-                        })
-                continue
-
-            if isinstance(values, list):
-                for tid in values:
-                    relationship_edges.append({
-                        "source": node_id,
-                        "target": tid,
-                        "type": keys.upper()
-                    })
 
-    try:
-        # preparing text chunk for embedding
-        text_chunks = []
-        for node_data in flattened:
-            text_parts = []
-            if node_data.get("name"):
-                text_parts.append(f"Name: {node_data['name']}")
-            if node_data.get("ast_type"):
-                text_parts.append(f"Type: {node_data['ast_type']}")
-            if node_data.get("code_str"):
-                text_parts.append(f"Code: {node_data['code_str']}")
-            if node_data.get("file"):
-                text_parts.append(f"File: {node_data['file']}")
-            
-            text_chunk = " | ".join(text_parts)
-            text_chunks.append(text_chunk)
-        
-        logger.info(f"Generating embeddings for {len(text_chunks)} nodes...")
-        embeddings = get_embeddings(text_chunks)
-        
-        if embeddings and len(embeddings) == len(flattened):
-            for i, node_data in enumerate(flattened):
-                node_data["embedding"] = embeddings[i]
-            logger.info("Embeddings generated successfully.")
-        else:
-            logger.warning("Failed to generate embeddings or count mismatch. Storing nodes without embeddings.")
+def ensure_schema():
+    """
+    Create the (session_id, id) uniqueness constraint, lookup indexes and,
+    without SESSION_VECTOR_INDEXES, the global vector index. Runs once per
+    process, normally from app startup.
+    """
+    global __schema_ready
 
-        # Starting storage process
-        with neo4j_driver.session() as session:
-            
+    if __schema_ready:
+        return
+
+    with neo4j_driver.session() as session:
+        try:
             session.run(
                 """
-                UNWIND $nodes AS node
-                CREATE (n:CodeNode)
-                SET n += node,
-                    n.session_id = $session_id
-                """,
-                nodes=flattened,
-                session_id=session_id
-            )
-
-            # Add AST labels
+                CREATE CONSTRAINT code_node_session_id IF NOT EXISTS
+                FOR (n:CodeNode) REQUIRE (n.session_id, n.id) IS UNIQUE
+                """
+            ).consume()
+        except Exception as e:
+            # Old servers without composite constraints still get an index backed lookup
+            logger.warning(f"Uniqueness constraint not created, falling back to an index: {e}")
             session.run(
                 """
-                MATCH (n:CodeNode {session_id: $session_id})
-                CALL apoc.create.addLabels(n, [n.ast_type]) YIELD node
-                RETURN node
-                """,
-                session_id=session_id
-            )
+                CREATE INDEX code_node_session_id IF NOT EXISTS
+                FOR (n:CodeNode) ON (n.session_id, n.id)
+                """
+            ).consume()
+
+        session.run(
+            """
+            CREATE INDEX code_node_session_file IF NOT EXISTS
+            FOR (n:CodeNode) ON (n.session_id, n.file)
+            """
+        ).consume()
 
-            # Create vector index (run once)
+        # With session indexes on, a global one would index every embedding a second time
+        if SESSION_VECTOR_INDEXES:
+            migrate_to_session_vector_indexes(session)
+        else:
             try:
                 session.run(
-                    """
+                    f"""
                     CREATE VECTOR INDEX code_embeddings IF NOT EXISTS
                     FOR (n:CodeNode)
                     ON n.embedding
-                    OPTIONS {indexConfig: {
-                        `vector.dimensions`: 768,
+                    OPTIONS {{indexConfig: {{
+                        `vector.dimensions`: {vector_dim},
                         `vector.similarity_function`: 'cosine'
-                    }}
+                    }}}}
                     """
-                )
+                ).consume()
                 logger.info("Vector index created or already exists.")
             except Exception as e:
                 logger.warning(f"Vector index creation warning (may already exist): {e}")
 
-            # Create dynamic relationships
-            session.run(
+    __schema_ready = True
+    logger.info("Neo4j schema ready")
+
+
+def migrate_to_session_vector_indexes(session):
+    """
+    Label and index the sessions stored before session vector indexes, then
+    drop the global `code_embeddings` index they were searched through.
+    Nothing to do once it is gone.
+    """
+    exists = session.run(
+        "SHOW INDEXES YIELD name WHERE name = 'code_embeddings' RETURN count(*) AS found"
+    ).single()["found"]
+    if not exists:
+        return
+
+    session_ids = [
+        record["session_id"] for record in session.run(
+            "MATCH (n:CodeNode {ast_type: 'ROOT'}) RETURN DISTINCT n.session_id AS session_id"
+        )
+    ]
+    if get_vector_store().stores_on_nodes:
+        for session_id in session_ids:
+            label = cypher_name(session_label(session_id))
+            # Chunked like delete_session_nodes, sessions can be large
+            while True:
+                count = session.run(
+                    f"""
+                    MATCH (n:CodeNode {{session_id: $session_id}})
+                    WHERE NOT n:{label}
+                    WITH n LIMIT $batch_size
+                    SET n:{label}
+                    RETURN count(*) AS labelled
+                    """,
+                    session_id=session_id,
+                    batch_size=WRITE_BATCH_SIZE
+                ).single()["labelled"]
+                if count < WRITE_BATCH_SIZE:
+                    break
+            ensure_session_vector_index(session_id)
+
+    session.run("DROP INDEX code_embeddings IF EXISTS").consume()
+    logger.info(f"Moved {len(session_ids)} sessions to session vector indexes, dropped the global one")
+
+
+def ensure_session_vector_index(session_id: str):
+    """Vector index over the session label only, so queries never see other repos."""
+    with neo4j_driver.session() as session:
+        session.run(
+            f"""
+            CREATE VECTOR INDEX {cypher_name(session_vector_index(session_id))} IF NOT EXISTS
+            FOR (n:{cypher_name(session_label(session_id))})
+            ON n.embedding
+            OPTIONS {{indexConfig: {{
+                `vector.dimensions`: {vector_dim},
+                `vector.similarity_function`: 'cosine'
+            }}}}
+            """
+        ).consume()
+    logger.info(f"Session vector index ready for {session_id}")
+
+
+def cypher_name(name: str) -> str:
+    """Backtick-quote a label or relationship type for inlining into Cypher."""
+    return "`" + str(name).replace("`", "``") + "`"
+
+
+def group_by(rows: List[Dict], key: str) -> Dict[str, List[Dict]]:
+    groups: Dict[str, List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(row.get(key) or "UNKNOWN", []).append(row)
+    return groups
+
+
+def write_in_batches(query: str, rows: Iterable[Dict], session_id: str, batch_size: Optional[int] = None):
+    """
+    Run `query` once per slice of `rows` (bound as $rows), each slice in its own
+    managed write transaction so transient failures are retried per batch.
+    `rows` may be a generator, only one batch is materialised at a time.
+    """
+    batch_size = batch_size or WRITE_BATCH_SIZE
+
+    def run_batch(tx, batch):
+        tx.run(query, rows=batch, session_id=session_id).consume()
+
+    rows = iter(rows)
+    with neo4j_driver.session() as session:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            session.execute_write(run_batch, batch)
+
+
+def iter_relationship_targets(node: Dict) -> Iterator[Tuple[str, str]]:
+    """(relationship type, target id) of every edge out of a node."""
+    # Resolving the imports and creating relationship list
+    for keys, values in (node.get("relationships") or {}).items():
+        if keys == "imports_from":
+            for imp in values:
+                if imp.get("is_external"):
+                    continue
+
+                for tid in imp.get("resolved_node_ids", []):
+                    yield "IMPORTS_FROM", tid
+            continue
+
+        if isinstance(values, list):
+            rel_type = keys.upper()
+            for tid in values:
+                yield rel_type, tid
+
+
+def build_relationship_edges(node: Dict, only_type: Optional[str] = None) -> List[Dict]:
+    """Turn a node's relationships into {source, target, type} edges."""
+    node_id = node.get("id")
+    return [
+        {"source": node_id, "target": tid, "type": rel_type}
+        for rel_type, tid in iter_relationship_targets(node)
+        if not only_type or rel_type == only_type
+    ]
+
+
+class EdgeArrays:
+    """
+    Relationship edges of a batch of nodes, per type, as two int32 arrays
+    indexing one shared id list. An edge costs 8 bytes instead of a
+    {source, target, type} dict; rows are only built per write batch.
+    """
+
+    def __init__(self, nodes: Iterable[Dict], rel_types: Optional[Set[str]] = None):
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.by_type: Dict[str, Tuple[array, array]] = {}
+
+        for node in nodes:
+            source = self.id_index(node.get("id"))
+            for rel_type, tid in iter_relationship_targets(node):
+                if rel_types is not None and rel_type not in rel_types:
+                    continue
+                sources, targets = self.by_type.setdefault(rel_type, (array("i"), array("i")))
+                sources.append(source)
+                targets.append(self.id_index(tid))
+
+    def id_index(self, node_id: str) -> int:
+        i = self.index.get(node_id)
+        if i is None:
+            i = self.index[node_id] = len(self.ids)
+            self.ids.append(node_id)
+        return i
+
+    def __len__(self) -> int:
+        return sum(len(sources) for sources, _ in self.by_type.values())
+
+    def rows(self, rel_type: str) -> Iterator[Dict]:
+        sources, targets = self.by_type[rel_type]
+        for source, target in zip(sources, targets):
+            yield {"source": self.ids[source], "target": self.ids[target]}
+
+
+def write_edge_rows(rel_type: str, rows: Iterable[Dict], session_id: str):
+    write_in_batches(
+        f"""
+        UNWIND $rows AS edge
+        MATCH (a:CodeNode {{session_id: $session_id, id: edge.source}})
+        MATCH (b:CodeNode {{session_id: $session_id, id: edge.target}})
+        MERGE (a)-[:{cypher_name(rel_type)}]->(b)
+        """,
+        rows,
+        session_id
+    )
+
+
+def write_relationship_edges(edges: List[Dict], session_id: str):
+    """MERGE {source, target, type} edges, one query per relationship type."""
+    for rel_type, group in group_by(edges, "type").items():
+        write_edge_rows(rel_type, group, session_id)
+
+
+def flatten_node(node: Dict, embedding: Optional[List[float]] = None) -> Dict:
+    """Neo4j property row of a node, built right before its batch is written."""
+    meta = node.get("metadata") or {}
+    row = {
+        "id": node.get("id"),
+        "name": node.get("name") or node.get("ast_type"),
+        "code_str": node.get("code_str", ""),
+        "ast_type": node.get("ast_type"),
+        "file": node.get("file"),
+        "language": node.get("language"),
+        "start_line": node.get("start_line"),
+        "end_line": node.get("end_line"),
+        "start_byte": node.get("start_byte"),
+        "end_byte": node.get("end_byte"),
+        "size": node.get("size"),
+        "depth": meta.get("depth"),
+        "calls": meta.get("calls", []),
+        "type_references": meta.get("type_references", []),
+        "is_definition": meta.get("is_definition"),
+        "definition_type": meta.get("definition_type"),
+    }
+    if embedding is not None:
+        row["embedding"] = embedding
+    return row
+
+
+def embedding_text(node: Dict) -> str:
+    text_parts = []
+    name = node.get("name") or node.get("ast_type")
+    if name:
+        text_parts.append(f"Name: {name}")
+    if node.get("ast_type"):
+        text_parts.append(f"Type: {node['ast_type']}")
+    if node.get("code_str"):
+        text_parts.append(f"Code: {node['code_str']}")
+    if node.get("file"):
+        text_parts.append(f"File: {node['file']}")
+    return " | ".join(text_parts)
+
+
+def embed_nodes(
+    nodes: List[Dict],
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> Optional[List[List[float]]]:
+    """Embeddings of `nodes` in order, None if generation failed or came back short."""
+    # preparing text chunk for embedding
+    text_chunks = [embedding_text(node) for node in nodes]
+
+    logger.info(f"Generating embeddings for {len(text_chunks)} nodes...")
+    embeddings = get_embeddings(text_chunks, progress_callback=progress_callback)
+
+    if embeddings and len(embeddings) == len(nodes):
+        return embeddings
+    logger.warning("Failed to generate embeddings or count mismatch. Storing nodes without embeddings.")
+    return None
+
+
+def append_vectors(nodes: List[Dict], embeddings: Optional[List[List[float]]], session_id: str):
+    """
+    Embeddings of `nodes` into a vector store kept apart from the nodes. They
+    are only written by finish_session_nodes, so a streamed ingest rewrites
+    the store once.
+    """
+    vector_store = get_vector_store()
+    if embeddings is not None and not vector_store.stores_on_nodes:
+        vector_store.append(session_id, [node.get("id") for node in nodes], embeddings)
+
+
+def write_nodes(
+    nodes: List[Dict],
+    embeddings: Optional[List[List[float]]],
+    session_id: str,
+    with_vectors: bool = True
+):
+    """
+    MERGE the property rows of `nodes`, embeddings go on the nodes or, unless
+    `with_vectors` is False, through append_vectors into the vector store.
+    """
+    vector_store = get_vector_store()
+    embed_on_nodes = embeddings is not None and vector_store.stores_on_nodes
+
+    # MERGE on (session_id, id) keeps retried batches idempotent. Labels and
+    # relationship types can't be parameters, so one query per label / type.
+    positions_by_type: Dict[str, List[int]] = {}
+    for i, node in enumerate(nodes):
+        positions_by_type.setdefault(node.get("ast_type") or "UNKNOWN", []).append(i)
+
+    for ast_type, positions in positions_by_type.items():
+        write_in_batches(
+            f"""
+            UNWIND $rows AS node
+            MERGE (n:CodeNode {{session_id: $session_id, id: node.id}})
+            SET n += node, n:{cypher_name(ast_type)}, n:{cypher_name(session_label(session_id))}
+            """,
+            (flatten_node(nodes[i], embeddings[i] if embed_on_nodes else None) for i in positions),
+            session_id
+        )
+
+    if with_vectors:
+        append_vectors(nodes, embeddings, session_id)
+
+
+def write_node_edges(nodes: List[Dict], session_id: str, rel_types: Optional[Set[str]] = None):
+    """MERGE the relationships of `nodes` (all, or `rel_types` only), their targets must already be stored."""
+    relationship_edges = EdgeArrays(nodes, rel_types)
+    for rel_type in relationship_edges.by_type:
+        write_edge_rows(rel_type, relationship_edges.rows(rel_type), session_id)
+    logger.info(f"Stored {len(relationship_edges)} relationships")
+
+
+def finish_session_nodes(session_id: str):
+    """Once all nodes of a session are written."""
+    vector_store = get_vector_store()
+    vector_store.flush(session_id)
+    if vector_store.stores_on_nodes and SESSION_VECTOR_INDEXES:
+        ensure_session_vector_index(session_id)
+
+
+def store_nodes_in_neo4j(
+    nodes: List[Dict],
+    session_id: str,
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    on_storing: Optional[Callable[[], None]] = None
+):
+
+    if not nodes:
+        logger.warning("No nodes to store in Neo4j.")
+        return
+
+    try:
+        embeddings = embed_nodes(nodes, progress_callback)
+        if embeddings is not None:
+            logger.info("Embeddings generated successfully.")
+
+        # Starting storage process
+        if on_storing:
+            on_storing()
+
+        ensure_schema()
+
+        # Nodes stay as they are; property rows and edge rows are built per write batch
+        write_nodes(nodes, embeddings, session_id)
+        logger.info(f"Stored {len(nodes)} nodes")
+        del embeddings
+
+        finish_session_nodes(session_id)
+        write_node_edges(nodes, session_id)
+
+        logger.info("Stored nodes + embeddings + all relationship types successfully.")
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Issue in neo4j storage | Error {e}"
+        )
+
+
+# ============================================================================
+# Session bookkeeping used by incremental re-ingestion
+# ============================================================================
+
+def set_session_info(session_id: str, repo_url: str, commit: str):
+    """Record the ingested repo url and commit on the session's ROOT node, and clear its dirty mark."""
+    with neo4j_driver.session() as session:
+        session.run(
+            """
+            MATCH (n:CodeNode {session_id: $session_id, ast_type: 'ROOT'})
+            SET n.repo_url = $repo_url, n.commit = $commit
+            REMOVE n.dirty
+            """,
+            session_id=session_id,
+            repo_url=repo_url,
+            commit=commit
+        )
+
+
+def mark_session_dirty(session_id: str):
+    """
+    Flag a session whose nodes are about to be rewritten in place. Until
+    set_session_info clears it, its recorded commit may not match the graph.
+    """
+    with neo4j_driver.session() as session:
+        session.run(
+            """
+            MATCH (n:CodeNode {session_id: $session_id, ast_type: 'ROOT'})
+            SET n.dirty = true
+            """,
+            session_id=session_id
+        ).consume()
+
+
+def get_session_info(session_id: str) -> Optional[Dict]:
+    with neo4j_driver.session() as session:
+        record = session.run(
+            """
+            MATCH (n:CodeNode {session_id: $session_id, ast_type: 'ROOT'})
+            RETURN n.id AS root_id, n.repo_url AS repo_url, n.commit AS commit,
+                   coalesce(n.dirty, false) AS dirty
+            LIMIT 1
+            """,
+            session_id=session_id
+        ).single()
+
+    return dict(record) if record else None
+
+
+def get_importer_files(session_id: str, files: List[str]) -> List[str]:
+    """Files outside `files` holding an IMPORTS_FROM edge into one of `files`."""
+    with neo4j_driver.session() as session:
+        result = session.run(
+            """
+            MATCH (a:CodeNode {session_id: $session_id})-[:IMPORTS_FROM]->(b:CodeNode {session_id: $session_id})
+            WHERE b.file IN $files AND NOT a.file IN $files
+            RETURN DISTINCT a.file AS file
+            """,
+            session_id=session_id,
+            files=files
+        )
+        return [record["file"] for record in result]
+
+
+def get_node_stubs(session_id: str, exclude_files: List[str]) -> List[Dict]:
+    """
+    Light copies of stored nodes (no code, no edges), enough for import
+    resolution and for the cross-file call symbol table.
+    """
+    with neo4j_driver.session() as session:
+        result = session.run(
+            """
+            MATCH (n:CodeNode {session_id: $session_id})
+            WHERE n.ast_type <> 'ROOT' AND NOT n.file IN $exclude_files
+            RETURN n.id AS id, n.name AS name, n.ast_type AS ast_type, n.file AS file,
+                   n.language AS language, n.calls AS calls,
+                   n.is_definition AS is_definition, n.definition_type AS definition_type
+            """,
+            session_id=session_id,
+            exclude_files=exclude_files
+        )
+        return [
+            {
+                "id": record["id"],
+                "name": record["name"],
+                "ast_type": record["ast_type"],
+                "file": record["file"],
+                "language": record["language"],
+                "relationships": {},
+                "metadata": {
+                    "calls": record["calls"] or [],
+                    "is_definition": record["is_definition"],
+                    "definition_type": record["definition_type"],
+                },
+            }
+            for record in result
+        ]
+
+
+def get_call_edges(session_id: str) -> Tuple[List[str], Dict[str, List[str]]]:
+    """All node ids of a session and its FUNCTION_CALL / CLASS_CALL adjacency."""
+    with neo4j_driver.session() as session:
+        result = session.run(
+            """
+            MATCH (n:CodeNode {session_id: $session_id})
+            OPTIONAL MATCH (n)-[:FUNCTION_CALL|CLASS_CALL]->(m:CodeNode {session_id: $session_id})
+            RETURN n.id AS id, collect(m.id) AS callees
+            """,
+            session_id=session_id
+        )
+        callees = {record["id"]: record["callees"] for record in result}
+    return list(callees), callees
+
+
+def delete_file_nodes(session_id: str, files: List[str]):
+    """Remove every node of `files` together with all of their edges."""
+    if not files:
+        return
+
+    with neo4j_driver.session() as session:
+        result = session.run(
+            """
+            MATCH (n:CodeNode {session_id: $session_id})
+            WHERE n.file IN $files
+            WITH n, n.id AS id
+            DETACH DELETE n
+            RETURN id
+            """,
+            session_id=session_id,
+            files=files
+        )
+        deleted_ids = [record["id"] for record in result]
+
+    vector_store = get_vector_store()
+    if not vector_store.stores_on_nodes:
+        vector_store.delete(session_id, deleted_ids)
+    logger.info(f"Deleted {len(deleted_ids)} nodes of {len(files)} files")
+
+
+def delete_session_nodes(session_id: str):
+    """Remove every node, edge, vector and the session vector index of a session."""
+    deleted = 0
+    with neo4j_driver.session() as session:
+        # Chunked so huge sessions don't build one giant transaction
+        while True:
+            count = session.run(
                 """
-                UNWIND $edges AS edge
-                MATCH (a:CodeNode {id: edge.source, session_id: $session_id})
-                MATCH (b:CodeNode {id: edge.target, session_id: $session_id})
-                CALL apoc.create.relationship(a, edge.type, {}, b) YIELD rel
-                RETURN rel
+                MATCH (n:CodeNode {session_id: $session_id})
+                WITH n LIMIT $batch_size
+                DETACH DELETE n
+                RETURN count(*) AS deleted
                 """,
-                edges=relationship_edges,
-                session_id=session_id
-            )
+                session_id=session_id,
+                batch_size=WRITE_BATCH_SIZE
+            ).single()["deleted"]
+            deleted += count
+            if count < WRITE_BATCH_SIZE:
+                break
+
+        session.run(f"DROP INDEX {cypher_name(session_vector_index(session_id))} IF EXISTS").consume()
+
+    get_vector_store().delete_session(session_id)
+    logger.info(f"Deleted session {session_id} ({deleted} nodes)")
+
 
-            logger.info("Stored nodes + embeddings + all relationship types successfully.")
+def replace_import_edges(session_id: str, files: List[str], nodes: List[Dict]):
+    """Drop the outgoing IMPORTS_FROM edges of `files` and write the ones of `nodes`."""
+    edges = []
+    for node in nodes:
+        edges.extend(build_relationship_edges(node, only_type="IMPORTS_FROM"))
+
+    try:
+        with neo4j_driver.session() as session:
+            session.run(
+                """
+                MATCH (a:CodeNode {session_id: $session_id})-[r:IMPORTS_FROM]->()
+                WHERE a.file IN $files
+                DELETE r
+                """,
+                session_id=session_id,
+                files=files
+            ).consume()
 
+        write_in_batches(
+            """
+            UNWIND $rows AS edge
+            MATCH (a:CodeNode {session_id: $session_id, id: edge.source})
+            MATCH (b:CodeNode {session_id: $session_id, id: edge.target})
+            MERGE (a)-[:IMPORTS_FROM]->(b)
+            """,
+            edges,
+            session_id
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Issue in neo4j storage | Error {e}"
-        )
\ No newline at end of file
+        )
+    logger.info(f"Re-linked {len(edges)} import edges of {len(files)} files")
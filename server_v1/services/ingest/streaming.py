@@ -0,0 +1,136 @@
+import os, queue, threading
+from typing import Callable, Dict, Iterable, List, Optional
+from fastapi import HTTPException
+from core.logging import get_logger
+from services.ingest.storage import ensure_schema, embed_nodes, write_nodes, write_node_edges
+
+logger = get_logger(__name__)
+
+# Node batches a stage may hold before the one feeding it blocks. Bounds how
+# far parsing runs ahead of embedding, and embedding ahead of the writes.
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE") or 4)
+
+# Relationships that stay inside a file, so their targets are in the same batch.
+# Written with the batch and then dropped from the nodes; targets outside the
+# batch (a file's ROOT) are kept for the caller to write.
+LOCAL_RELATIONSHIPS = ("belongs_to", "sibling")
+
+END_OF_STREAM = object()
+
+
+def run_stage(
+    name: str,
+    work: Callable,
+    inbox: queue.Queue,
+    outbox: Optional[queue.Queue],
+    failures: List[Exception]
+):
+    """
+    Thread body: apply `work` to every item of `inbox` and pass the result on.
+    After a failure anywhere, items are only drained, so no upstream put()
+    blocks on a full queue while the pipeline shuts down.
+    """
+    while True:
+        item = inbox.get()
+        if item is END_OF_STREAM:
+            break
+        if failures:
+            continue
+        try:
+            result = work(item)
+            if outbox is not None:
+                outbox.put(result)
+        except Exception as e:
+            logger.error(f"Ingest {name} stage failed | Error : {e}")
+            failures.append(e)
+
+    if outbox is not None:
+        outbox.put(END_OF_STREAM)
+
+
+def stream_nodes_to_neo4j(
+    batches: Iterable[List[Dict]],
+    session_id: str,
+    on_nodes_parsed: Optional[Callable[[int], None]] = None,
+    on_nodes_embedded: Optional[Callable[[int, int], None]] = None,
+    on_parsing_done: Optional[Callable[[], None]] = None
+) -> List[Dict]:
+    """
+    Embed and write node batches while later ones are still being parsed:
+
+        batches (this thread) -> embed queue -> embedding thread
+                              -> store queue -> storage thread
+
+    Node properties, embeddings and the in-file structural edges are written
+    here. Once a batch is stored its nodes drop their code text and those
+    edges, so the nodes returned are a light index (ids, names, calls,
+    imports) for the cross-file edge pass.
+
+    Args:
+        batches: Node lists, typically iter_extracted_batches of the repo
+        on_nodes_parsed: Called with the number of nodes parsed so far
+        on_nodes_embedded: Called with (nodes_embedded, nodes_parsed)
+        on_parsing_done: Called once `batches` is exhausted
+    """
+    ensure_schema()
+
+    embed_queue: queue.Queue = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    store_queue: queue.Queue = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    failures: List[Exception] = []
+    counts = {"parsed": 0, "embedded": 0}
+
+    def embed(batch: List[Dict]):
+        embeddings = embed_nodes(batch)
+        counts["embedded"] += len(batch)
+        if on_nodes_embedded:
+            on_nodes_embedded(counts["embedded"], counts["parsed"])
+        return batch, embeddings
+
+    def store(item):
+        batch, embeddings = item
+        write_nodes(batch, embeddings, session_id)
+        write_node_edges(batch, session_id, rel_types={rel.upper() for rel in LOCAL_RELATIONSHIPS})
+        batch_ids = {node["id"] for node in batch}
+        for node in batch:
+            node["code_str"] = None
+            relationships = node["relationships"]
+            for rel in LOCAL_RELATIONSHIPS:
+                outside = [tid for tid in relationships.pop(rel, ()) if tid not in batch_ids]
+                if outside:
+                    relationships[rel] = outside
+
+    stages = [
+        threading.Thread(target=run_stage, args=("embedding", embed, embed_queue, store_queue, failures), daemon=True),
+        threading.Thread(target=run_stage, args=("storage", store, store_queue, None, failures), daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+
+    all_nodes = []
+    try:
+        for batch in batches:
+            if failures:
+                break
+            if not batch:
+                continue
+            all_nodes.extend(batch)
+            counts["parsed"] += len(batch)
+            if on_nodes_parsed:
+                on_nodes_parsed(counts["parsed"])
+            embed_queue.put(batch)
+        else:
+            if on_parsing_done:
+                on_parsing_done()
+    finally:
+        embed_queue.put(END_OF_STREAM)
+        for stage in stages:
+            stage.join()
+
+    if failures:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Issue in neo4j storage | Error {failures[0]}"
+        )
+
+    logger.info(f"Streamed {counts['parsed']} nodes to neo4j")
+    return all_nodes
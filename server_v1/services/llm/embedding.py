@@ -5,7 +5,12 @@ from dotenv import load_dotenv
 import os, requests
 from core.logging import get_logger
 from fastapi import HTTPException
-import time
+import time, random, asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Optional
+from google.api_core.exceptions import ResourceExhausted
+from services.llm.rate_limiter import get_embedding_rate_limiter, get_query_rate_limiter
+from services.llm.embedding_cache import get_embedding_cache, make_cache_key
 
 logger = get_logger(__name__)
 
@@ -17,43 +22,206 @@ genai.configure(api_key=os.getenv("LLM_API_KEY"))
 
 vector_dim = int(os.getenv("VECTOR_DIMENSION") or 384)
 
-def get_embeddings(chunks: list[str]) -> list[list[float]]:
-    logger.info(f"got chunks of size {len(chunks)} for embedding")
-    # if len(chunks) == 1:
-    #     task_type="CODE_RETRIEVAL_QUERY"
-    # else:
-    #     task_type="RETRIEVAL_DOCUMENT"
+EMBEDDING_MODEL = "gemini-embedding-001"
+
+# The API accepts at most 100 contents per batch call
+MAX_BUNDLE_ITEMS = 100
+MAX_BUNDLE_TOKENS = int(os.getenv("EMBED_MAX_BUNDLE_TOKENS") or 8000)
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY") or 4)
+
+MAX_RETRIES = 6
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for quota accounting."""
+    return len(text) // 4 + 1
+
+
+def make_bundles(chunks: list[str]) -> list[tuple[int, list[str], int]]:
+    """
+    Pack consecutive chunks into bundles bounded by item count and token count.
+
+    Returns:
+        List of (start_index, bundle_chunks, bundle_tokens)
+    """
+    bundles = []
+    start, bundle, bundle_tokens = 0, [], 0
+
+    for i, chunk in enumerate(chunks):
+        tokens = estimate_tokens(chunk)
+        if bundle and (len(bundle) >= MAX_BUNDLE_ITEMS or bundle_tokens + tokens > MAX_BUNDLE_TOKENS):
+            bundles.append((start, bundle, bundle_tokens))
+            start, bundle, bundle_tokens = i, [], 0
+        bundle.append(chunk)
+        bundle_tokens += tokens
 
-    embedding_result = []
-    bundle_size = 100
+    if bundle:
+        bundles.append((start, bundle, bundle_tokens))
+    return bundles
 
-    for i in range(0, len(chunks), bundle_size):
-        bundle_chunks = chunks[i:i+bundle_size]
 
+def is_rate_limit_error(e: Exception) -> bool:
+    return isinstance(e, ResourceExhausted) or "429" in str(e)
+
+
+def backoff_delay(attempt: int) -> float:
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+    delay = random.uniform(delay / 2, delay)
+    logger.warning(f"Embedding rate limited (attempt {attempt + 1}/{MAX_RETRIES}), retrying in {delay:.1f}s")
+    return delay
+
+
+def embed_bundle(bundle_chunks: list[str], bundle_tokens: int, task_type: str) -> list[list[float]]:
+    """Embed one bundle within the shared quota, retrying 429s with jittered backoff."""
+    limiter = get_embedding_rate_limiter()
+
+    for attempt in range(MAX_RETRIES + 1):
+        # Batch calls are billed per content, not per HTTP request
+        limiter.acquire(requests=len(bundle_chunks), tokens=bundle_tokens)
         try:
             response = genai.embed_content(
-                model="gemini-embedding-001",
+                model=EMBEDDING_MODEL,
                 content=bundle_chunks,
-                task_type="RETRIEVAL_DOCUMENT" ,
+                task_type=task_type,
                 output_dimensionality=vector_dim 
             )
-            logger.info(f"embedding successfull for {i} : {i+bundle_size}")
-            if i+bundle_size < len(chunks):
-                logger.info("sleeping for 61")
-                time.sleep(61)
-                logger.info("waked up!!")
-            embedding_result.extend(response['embedding'])
-        
+            return response['embedding']
+
         except Exception as e:
-            logger.error(f"An error occurred during embedding: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to embed the chunks | Error : {e}"
+            if not is_rate_limit_error(e) or attempt == MAX_RETRIES:
+                raise
+            time.sleep(backoff_delay(attempt))
+
+
+async def embed_bundle_async(bundle_chunks: list[str], bundle_tokens: int, task_type: str) -> list[list[float]]:
+    """
+    embed_bundle for the event loop: same retries, but awaited, and within the
+    query budget so requests never wait behind ingest reservations.
+    """
+    limiter = get_query_rate_limiter()
+
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire_async(requests=len(bundle_chunks), tokens=bundle_tokens)
+        try:
+            response = await genai.embed_content_async(
+                model=EMBEDDING_MODEL,
+                content=bundle_chunks,
+                task_type=task_type,
+                output_dimensionality=vector_dim
             )
+            return response['embedding']
+
+        except Exception as e:
+            if not is_rate_limit_error(e) or attempt == MAX_RETRIES:
+                raise
+            await asyncio.sleep(backoff_delay(attempt))
+
+
+def get_embeddings(
+    chunks: list[str],
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    task_type: str = "RETRIEVAL_DOCUMENT"
+) -> list[list[float]]:
+    logger.info(f"got chunks of size {len(chunks)} for embedding")
+    # if len(chunks) == 1:
+    #     task_type="CODE_RETRIEVAL_QUERY"
+    # else:
+    #     task_type="RETRIEVAL_DOCUMENT"
+
+    embedding_result: list = [None] * len(chunks)
+
+    # Serve what we can from the cache, and embed each distinct missing text once
+    cache = get_embedding_cache()
+    keys = [make_cache_key(EMBEDDING_MODEL, vector_dim, task_type, chunk) for chunk in chunks]
+    cached = cache.get_many(keys) if cache else {}
+
+    missing_positions: dict[str, list[int]] = {}
+    for i, key in enumerate(keys):
+        if key in cached:
+            embedding_result[i] = cached[key]
+        else:
+            missing_positions.setdefault(key, []).append(i)
+
+    missing_keys = list(missing_positions)
+    missing_chunks = [chunks[missing_positions[key][0]] for key in missing_keys]
+    embedded_count = len(chunks) - sum(len(p) for p in missing_positions.values())
+
+    if cache:
+        logger.info(f"Embedding cache: {embedded_count} hits, {len(missing_chunks)} texts to embed")
+    if progress_callback and embedded_count:
+        progress_callback(embedded_count, len(chunks))
+
+    bundles = make_bundles(missing_chunks)
+
+    def run_bundle(bundle):
+        start, bundle_chunks, bundle_tokens = bundle
+        return start, embed_bundle(bundle_chunks, bundle_tokens, task_type)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, min(EMBED_CONCURRENCY, len(bundles)))) as executor:
+            for future in as_completed([executor.submit(run_bundle, b) for b in bundles]):
+                start, embeddings = future.result()
+                bundle_keys = missing_keys[start:start + len(embeddings)]
+
+                for key, embedding in zip(bundle_keys, embeddings):
+                    for i in missing_positions[key]:
+                        embedding_result[i] = embedding
+                        embedded_count += 1
+
+                if cache:
+                    cache.put_many(dict(zip(bundle_keys, embeddings)))
+
+                logger.info(f"embedding successfull for {start} : {start + len(embeddings)}")
+                if progress_callback:
+                    progress_callback(embedded_count, len(chunks))
+
+    except Exception as e:
+        logger.error(f"An error occurred during embedding: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to embed the chunks | Error : {e}"
+        )
     
     return embedding_result
 
 
+async def get_embeddings_async(chunks: list[str], task_type: str = "RETRIEVAL_DOCUMENT") -> list[list[float]]:
+    """
+    get_embeddings for the request path (query embedding). Same cache, its
+    own share of the quota, and every wait is awaited so other requests keep
+    being served.
+    """
+    cache = get_embedding_cache()
+    keys = [make_cache_key(EMBEDDING_MODEL, vector_dim, task_type, chunk) for chunk in chunks]
+    # SQLite calls can wait on an ingest job holding the cache lock
+    cached = await asyncio.to_thread(cache.get_many, keys) if cache else {}
+
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    bundles = make_bundles([chunks[i] for i in missing])
+
+    try:
+        results = await asyncio.gather(*(
+            embed_bundle_async(bundle_chunks, bundle_tokens, task_type)
+            for _, bundle_chunks, bundle_tokens in bundles
+        ))
+    except Exception as e:
+        logger.error(f"An error occurred during embedding: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to embed the chunks | Error : {e}"
+        )
+
+    embedded = {}
+    for (start, _, _), embeddings in zip(bundles, results):
+        for offset, embedding in enumerate(embeddings):
+            embedded[keys[missing[start + offset]]] = embedding
+
+    if cache and embedded:
+        await asyncio.to_thread(cache.put_many, embedded)
+    return [cached.get(key) or embedded[key] for key in keys]
+
 
 # default dimension is 384
 def get_embeddings_local(chunks):
@@ -0,0 +1,173 @@
+import os, time, sqlite3, hashlib, threading
+from array import array
+from typing import Dict, List, Optional
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH") or os.path.join("data", "cache", "embeddings.sqlite")
+# 0 disables the cache
+EMBED_CACHE_MAX_MB = int(os.getenv("EMBED_CACHE_MAX_MB") or 512)
+
+# Evict down to this fraction of the limit, so eviction doesn't run on every insert
+EVICTION_TARGET = 0.9
+
+
+def make_cache_key(model: str, dimension: int, task_type: str, text: str) -> str:
+    digest = hashlib.sha256()
+    for part in (model, str(dimension), task_type, text):
+        digest.update(part.encode("utf-8", errors="ignore"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Content addressed embedding store in a local SQLite file. Vectors are kept
+    as float32 blobs, and the least recently used rows are evicted once the
+    total blob size goes past `max_bytes`.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings(last_access)")
+        self._conn.commit()
+
+        # Scanned once here, then kept up to date by put_many and _evict
+        self.total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            # SQLite caps the number of bound parameters per statement
+            for i in range(0, len(unique_keys), 500):
+                batch = unique_keys[i:i+500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_access = ? WHERE key IN ({placeholders})",
+                        [time.time(), *batch]
+                    )
+            self._conn.commit()
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        if not items:
+            return
+
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+
+        with self._lock:
+            # Rows being replaced no longer count, looked up by key instead of summing the table
+            keys = list(items)
+            replaced_bytes = 0
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i+500]
+                placeholders = ",".join("?" * len(batch))
+                replaced_bytes += self._conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchone()[0]
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.total_bytes += sum(row[2] for row in rows) - replaced_bytes
+
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        target = int(self.max_bytes * EVICTION_TARGET)
+        freed, evicted = 0, []
+
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM embeddings ORDER BY last_access ASC"
+        ):
+            if self.total_bytes - freed <= target:
+                break
+            evicted.append((key,))
+            freed += size
+
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        self.total_bytes -= freed
+        logger.info(f"Embedding cache evicted {len(evicted)} entries ({freed} bytes)")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": entries,
+                "size_bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+__embedding_cache = None
+__cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process wide cache, None when disabled with EMBED_CACHE_MAX_MB=0."""
+    global __embedding_cache
+
+    if EMBED_CACHE_MAX_MB <= 0:
+        return None
+
+    with __cache_lock:
+        if __embedding_cache is None:
+            try:
+                __embedding_cache = EmbeddingCache(EMBED_CACHE_PATH, EMBED_CACHE_MAX_MB * 1024 * 1024)
+                logger.info(f"Embedding cache opened at {EMBED_CACHE_PATH}")
+            except Exception as e:
+                logger.error(f"Failed to open embedding cache at {EMBED_CACHE_PATH} | Error : {e}")
+                return None
+
+    return __embedding_cache
@@ -1,5 +1,6 @@
 from google import genai
-import os
+import os, time
+from typing import AsyncIterator, Iterator
 from dotenv import load_dotenv
 from fastapi import HTTPException
 from core.logging import get_logger
@@ -11,12 +12,57 @@ key = os.getenv("LLM_API_KEY")
 
 client = genai.Client(api_key=key)
 
+LLM_MODEL = "gemini-2.5-flash"
+
 def chat(prompt): 
     logger.info(f"Querying to llm for prompt : {prompt}")
     logger.info("Gemini is on the way!!!!!!!!!!")
     try:
         response = client.models.generate_content(
-            model="gemini-2.5-flash",
+            model=LLM_MODEL,
+            contents=prompt,
+        )
+        return response.text
+    except Exception as e:
+        logger.error(f"Failed in LLM Response! | Error : {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed in LLM Response! | Error : {e}"
+        )
+
+
+def chat_stream(prompt) -> Iterator[str]:
+    """
+    Stream the answer as text chunks from the Gemini streaming API.
+    Time to first token and total generation time are logged separately.
+    """
+    logger.info(f"Streaming llm response for prompt : {prompt}")
+    started = time.perf_counter()
+    first_token_at = None
+    try:
+        for chunk in client.models.generate_content_stream(
+            model=LLM_MODEL,
+            contents=prompt,
+        ):
+            if not chunk.text:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                logger.info(f"LLM time to first token: {(first_token_at - started) * 1000:.0f} ms")
+            yield chunk.text
+    except Exception as e:
+        logger.error(f"Failed in LLM stream! | Error : {e}")
+        raise
+    logger.info(f"LLM stream finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+
+async def chat_async(prompt) -> str:
+    """chat() on the async client, doesn't hold the event loop while the model thinks."""
+    logger.info(f"Querying to llm for prompt : {prompt}")
+    try:
+        response = await client.aio.models.generate_content(
+            model=LLM_MODEL,
             contents=prompt,
         )
         return response.text
@@ -26,9 +72,29 @@ def chat(prompt):
             status_code=500,
             detail=f"Failed in LLM Response! | Error : {e}"
         )
-  
 
 
+async def chat_stream_async(prompt) -> AsyncIterator[str]:
+    """chat_stream() on the async client."""
+    logger.info(f"Streaming llm response for prompt : {prompt}")
+    started = time.perf_counter()
+    first_token_at = None
+    try:
+        async for chunk in await client.aio.models.generate_content_stream(
+            model=LLM_MODEL,
+            contents=prompt,
+        ):
+            if not chunk.text:
+                continue
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                logger.info(f"LLM time to first token: {(first_token_at - started) * 1000:.0f} ms")
+            yield chunk.text
+    except Exception as e:
+        logger.error(f"Failed in LLM stream! | Error : {e}")
+        raise
+    logger.info(f"LLM stream finished in {(time.perf_counter() - started) * 1000:.0f} ms")
+
 
 
 # print(chat("Write a python function to add two numbers"))
@@ -0,0 +1,138 @@
+import os, time, asyncio, threading
+from typing import Optional, Tuple
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """
+    Reservation based token bucket. A reservation may take the bucket
+    negative, the caller then sleeps until it is paid back, so waiting
+    callers are served in arrival order. The debt is capped at `max_debt`
+    (one bucket by default): past it nothing is taken and the caller comes
+    back once the reservation fits, so a burst of callers can't book the
+    budget minutes ahead.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float, max_debt: Optional[float] = None):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_debt = capacity if max_debt is None else max_debt
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity,
+            self.tokens + (now - self.updated_at) * self.refill_per_second
+        )
+        self.updated_at = now
+
+    def reserve(self, amount: float) -> Tuple[bool, float]:
+        """
+        Take `amount` tokens unless that puts the bucket more than `max_debt` behind.
+
+        Returns:
+            (taken, seconds): how long to wait before using the tokens, or when
+            nothing was taken, before reserving again
+        """
+        # A single request bigger than the bucket could never be served otherwise
+        amount = min(amount, self.capacity)
+
+        with self._lock:
+            self._refill()
+            over = amount - self.tokens - self.max_debt
+            if over > 0:
+                return False, over / self.refill_per_second
+
+            self.tokens -= amount
+            if self.tokens >= 0:
+                return True, 0.0
+            return True, -self.tokens / self.refill_per_second
+
+    def refund(self, amount: float):
+        """Give back a reservation that was not used."""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+
+class RateLimiter:
+    """Requests/min and tokens/min budgets shared by every caller of an API."""
+
+    def __init__(self, requests_per_min: int, tokens_per_min: int):
+        self.requests = TokenBucket(requests_per_min, requests_per_min / 60)
+        self.tokens = TokenBucket(tokens_per_min, tokens_per_min / 60)
+
+    def reserve(self, requests: int = 1, tokens: int = 0) -> Tuple[bool, float]:
+        """Both budgets or neither, see TokenBucket.reserve."""
+        taken, wait = self.requests.reserve(requests)
+        if not taken:
+            return False, wait
+
+        tokens_taken, tokens_wait = self.tokens.reserve(tokens)
+        if not tokens_taken:
+            self.requests.refund(requests)
+            return False, tokens_wait
+        return True, max(wait, tokens_wait)
+
+    def acquire(self, requests: int = 1, tokens: int = 0):
+        while True:
+            taken, wait = self.reserve(requests, tokens)
+            if wait > 0:
+                logger.info(f"Rate limit reached, waiting {wait:.1f}s")
+                time.sleep(wait)
+            if taken:
+                return
+
+    async def acquire_async(self, requests: int = 1, tokens: int = 0):
+        """acquire() for the event loop, waits without blocking other requests."""
+        while True:
+            taken, wait = self.reserve(requests, tokens)
+            if wait > 0:
+                logger.info(f"Rate limit reached, waiting {wait:.1f}s")
+                await asyncio.sleep(wait)
+            if taken:
+                return
+
+
+# The embedding API quota, split between ingest bundles and the query
+# embeddings of /api/retreive, so a question never waits behind an ingest
+EMBED_REQUESTS_PER_MIN = int(os.getenv("EMBED_REQUESTS_PER_MIN") or 100)
+EMBED_TOKENS_PER_MIN = int(os.getenv("EMBED_TOKENS_PER_MIN") or 30000)
+EMBED_QUERY_SHARE = float(os.getenv("EMBED_QUERY_SHARE") or 0.2)
+
+__embedding_rate_limiter = None
+__query_rate_limiter = None
+__limiter_lock = threading.Lock()
+
+
+def get_embedding_rate_limiter() -> RateLimiter:
+    """Process wide limiter of ingest embeddings, so concurrent ingest jobs split one quota."""
+    global __embedding_rate_limiter
+
+    with __limiter_lock:
+        if __embedding_rate_limiter is None:
+            __embedding_rate_limiter = RateLimiter(
+                requests_per_min=max(1, round(EMBED_REQUESTS_PER_MIN * (1 - EMBED_QUERY_SHARE))),
+                tokens_per_min=max(1, round(EMBED_TOKENS_PER_MIN * (1 - EMBED_QUERY_SHARE)))
+            )
+
+    return __embedding_rate_limiter
+
+
+def get_query_rate_limiter() -> RateLimiter:
+    """Process wide limiter of query embeddings, EMBED_QUERY_SHARE of the quota."""
+    global __query_rate_limiter
+
+    with __limiter_lock:
+        if __query_rate_limiter is None:
+            __query_rate_limiter = RateLimiter(
+                requests_per_min=max(1, round(EMBED_REQUESTS_PER_MIN * EMBED_QUERY_SHARE)),
+                tokens_per_min=max(1, round(EMBED_TOKENS_PER_MIN * EMBED_QUERY_SHARE))
+            )
+
+    return __query_rate_limiter
@@ -0,0 +1,39 @@
+import os, re
+from typing import Dict
+
+# Words, numbers, and single punctuation marks. Runs of spaces are dropped;
+# SentencePiece style tokenizers fold them into the neighbouring token.
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+# Long identifiers are split into sub-word pieces of about this many characters
+CHARS_PER_PIECE = 4
+
+# Context tokens per request, by model. Far under the models' windows: the
+# budget is about answer quality, latency and cost, not fitting at all.
+CONTEXT_TOKEN_BUDGETS: Dict[str, int] = {
+    "gemini-2.5-flash": 6000,
+    "gemini-2.5-pro": 12000,
+}
+DEFAULT_CONTEXT_TOKEN_BUDGET = 4000
+
+
+def count_tokens(text: str) -> int:
+    """
+    Fast local estimate of model tokens. Counts words and symbols instead of
+    characters, so indentation and long code lines are costed the way a
+    real tokenizer costs them.
+    """
+    tokens = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        length = match.end() - match.start()
+        tokens += (length + CHARS_PER_PIECE - 1) // CHARS_PER_PIECE if length > CHARS_PER_PIECE else 1
+    # Every line break is a token of its own
+    return tokens + text.count("\n")
+
+
+def get_context_token_budget(model: str) -> int:
+    """CONTEXT_TOKEN_BUDGET overrides the per-model budget."""
+    override = os.getenv("CONTEXT_TOKEN_BUDGET")
+    if override:
+        return int(override)
+    return CONTEXT_TOKEN_BUDGETS.get(model, DEFAULT_CONTEXT_TOKEN_BUDGET)
@@ -1,22 +1,117 @@
-from services.retreive.retrieve_context import retrieve_context
+import time, asyncio
+from typing import AsyncIterator, Dict, Optional, Tuple
+from fastapi import HTTPException
+from services.retreive.retrieve_context import retrieve_context, session_exists
+from services.retreive.query_cache import query_embedding_cache, answer_cache, normalize_query, make_answer_key
 from services.llm.prompt_template import template
 from services.llm.query_enhancement import enhance_query
-from services.llm.llm import chat
+from services.llm.llm import chat_async, chat_stream_async
+from services.llm.embedding import get_embeddings_async
 from core.logging import get_logger
+from core.sse import sse_event
 
 logger = get_logger(__name__)
 
-def run_retreival_pipeline(session_id: str, query: str):
-    print(session_id)
+
+async def prepare_answer(session_id: str, query: str) -> Tuple[str, Tuple, Optional[str], Dict]:
+    """
+    Everything before the LLM call: query embedding, context retrieval and answer cache lookup.
+
+    Returns:
+        (prompt, answer cache key, cached answer or None, cache status dict with
+        "query_embedding" and "answer" set to "hit" or "miss")
+    """
     # logger.info("Enhancing user query.......")
     # query = enhance_query(query)
+    cache_status = {}
+
+    normalized_query = normalize_query(query)
+    query_embedding = query_embedding_cache.get(normalized_query)
+    cache_status["query_embedding"] = "miss" if query_embedding is None else "hit"
+
+    if query_embedding is None:
+        logger.info(f"Embedding query: {query}")
+        # The session check doesn't need the embedding, so it overlaps the API call
+        embeddings, found = await asyncio.gather(
+            get_embeddings_async([query]),
+            session_exists(session_id)
+        )
+        query_embedding = embeddings[0]
+        query_embedding_cache.put(normalized_query, query_embedding)
+    else:
+        found = await session_exists(session_id)
+
+    if not found:
+        raise HTTPException(status_code=404, detail=f"Session not found : {session_id}")
 
     logger.info("Fetching Context..........")
-    context = retrieve_context(query, session_id)
+    context, node_ids = await retrieve_context(query, session_id, query_embedding=query_embedding)
+
+    # Same question over the same retrieved nodes gets the same answer
+    answer_key = make_answer_key(session_id, query, node_ids)
+    cached_answer = answer_cache.get(answer_key)
+    cache_status["answer"] = "miss" if cached_answer is None else "hit"
+
+    return template(query, context), answer_key, cached_answer, cache_status
+
+
+async def run_retreival_pipeline(session_id: str, query: str):
+    """
+    Answer a query against a session.
 
-    prompt_template = template(query, context)
+    Returns:
+        (llm response, cache status dict)
+    """
+    prompt, answer_key, llm_response, cache_status = await prepare_answer(session_id, query)
+    if llm_response is not None:
+        logger.info("Answer served from cache")
+        return llm_response, cache_status
 
     logger.info("Getting LLM response...........")
-    llm_response = chat(prompt_template)
+    llm_response = await chat_async(prompt)
+    answer_cache.put(answer_key, llm_response)
+
+    return llm_response, cache_status
+
+
+async def stream_retreival_pipeline(session_id: str, query: str) -> AsyncIterator[str]:
+    """
+    Answer a query as Server-Sent Events.
+
+    Retrieval runs before this returns, so its errors still surface as plain
+    HTTP errors. The returned iterator then yields a "meta" event with the
+    cache status, one unnamed event per text chunk ({"text": ...}), and a
+    final "done" event with timings, or an "error" event if the LLM fails.
+    """
+    started = time.perf_counter()
+    prompt, answer_key, cached_answer, cache_status = await prepare_answer(session_id, query)
+    retrieval_ms = round((time.perf_counter() - started) * 1000)
+
+    async def events():
+        yield sse_event({"cache": cache_status, "retrieval_ms": retrieval_ms}, event="meta")
+
+        if cached_answer is not None:
+            logger.info("Answer served from cache")
+            yield sse_event({"text": cached_answer})
+            yield sse_event({"ttft_ms": retrieval_ms, "total_ms": retrieval_ms}, event="done")
+            return
+
+        logger.info("Streaming LLM response...........")
+        parts, ttft_ms = [], None
+        try:
+            async for text in chat_stream_async(prompt):
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started) * 1000)
+                    logger.info(f"Time to first token: {ttft_ms} ms (retrieval {retrieval_ms} ms)")
+                parts.append(text)
+                yield sse_event({"text": text})
+        except Exception as e:
+            yield sse_event({"detail": f"Failed in LLM Response! | Error : {e}"}, event="error")
+            return
+
+        total_ms = round((time.perf_counter() - started) * 1000)
+        logger.info(f"Streamed answer in {total_ms} ms (time to first token {ttft_ms} ms)")
+        answer_cache.put(answer_key, "".join(parts))
+        yield sse_event({"ttft_ms": ttft_ms, "total_ms": total_ms}, event="done")
 
-    return llm_response
+    return events()
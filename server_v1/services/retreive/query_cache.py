@@ -0,0 +1,103 @@
+import os, re, time, hashlib, threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Entry count and lifetime of each level, a size of 0 disables that level
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE") or 1024)
+QUERY_CACHE_TTL_SECONDS = int(os.getenv("QUERY_CACHE_TTL_SECONDS") or 3600)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE") or 512)
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS") or 900)
+
+
+def normalize_query(query: str) -> str:
+    """Case and whitespace insensitive form of a question."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def hash_query(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8", errors="ignore")).hexdigest()
+
+
+class TTLCache:
+    """Thread safe in-memory LRU cache whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_where(self, predicate) -> int:
+        """Drop every entry whose key matches, returns the number dropped."""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+            }
+
+
+# Normalized query text -> query embedding
+query_embedding_cache = TTLCache(QUERY_CACHE_SIZE, QUERY_CACHE_TTL_SECONDS)
+
+# (session_id, query hash, retrieved node ids) -> LLM answer
+answer_cache = TTLCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS)
+
+
+def make_answer_key(session_id: str, query: str, node_ids: Iterable[str]) -> Tuple:
+    return (session_id, hash_query(query), tuple(sorted(node_ids)))
+
+
+def invalidate_session(session_id: str):
+    """Forget cached answers of a session whose nodes were rewritten or removed."""
+    dropped = answer_cache.discard_where(lambda key: key[0] == session_id)
+    if dropped:
+        logger.info(f"Dropped {dropped} cached answers of session {session_id}")
+
+
+def get_query_cache_stats() -> Dict:
+    return {
+        "query_embedding": query_embedding_cache.stats(),
+        "answer": answer_cache.stats(),
+    }
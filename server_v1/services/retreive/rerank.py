@@ -0,0 +1,119 @@
+import os, math
+from typing import Callable, Dict, List, Optional
+from core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# How much of a hit's relevance carries over to a neighbour, per edge type.
+# Calls point at the code that actually runs, file membership and siblings
+# mostly add surrounding noise.
+DEFAULT_REL_WEIGHTS = {
+    "FUNCTION_CALL": 1.0,
+    "CLASS_CALL": 0.9,
+    "IMPORTS_FROM": 0.6,
+    "SIBLING": 0.35,
+    "BELONGS_TO": 0.2,
+}
+DEFAULT_REL_WEIGHT = 0.3
+
+# Extra discount for every hop past the first
+HOP_DECAY = float(os.getenv("RERANK_HOP_DECAY") or 0.5)
+
+# Blocks cheaper than this many tokens are costed as this many, so
+# near-empty stubs can't win on score per token alone
+MIN_BLOCK_COST = int(os.getenv("RERANK_MIN_BLOCK_COST") or 50)
+
+# Boost for code called from many places: score *= 1 + FAN_IN_WEIGHT * log(1 + callers)
+FAN_IN_WEIGHT = float(os.getenv("RERANK_FAN_IN_WEIGHT") or 0.05)
+
+
+def parse_rel_weights(raw: str) -> Dict[str, float]:
+    """RERANK_REL_WEIGHTS="FUNCTION_CALL=1,SIBLING=0.2" overrides single defaults."""
+    weights = dict(DEFAULT_REL_WEIGHTS)
+    for pair in raw.split(","):
+        if "=" not in pair:
+            continue
+        rel_type, weight = pair.split("=", 1)
+        try:
+            weights[rel_type.strip().upper()] = float(weight)
+        except ValueError:
+            logger.warning(f"Ignoring bad relationship weight : {pair}")
+    return weights
+
+
+REL_WEIGHTS = parse_rel_weights(os.getenv("RERANK_REL_WEIGHTS") or "")
+
+
+def score_candidates(results: List[Dict], call_graph=None) -> List[Dict]:
+    """
+    Flatten search results into scored, distinct candidates.
+
+    A hit scores its vector similarity. A neighbour scores the similarity of
+    the hit it hangs off, times the weight of the edge type, times HOP_DECAY
+    for each hop past the first. A node reachable several ways keeps its best score.
+    With the session's call graph, widely called code gets a small fan-in boost.
+
+    Args:
+        results: [{"node", "score", "neighbours": [{"node", "rel_type", "hop"}]}]
+        call_graph: Optional CallGraph of the session
+
+    Returns:
+        [{"node", "score", "via"}] best first, via is "hit" or the edge type
+    """
+    best: Dict[str, Dict] = {}
+
+    def offer(node: Dict, score: float, via: str):
+        current = best.get(node["id"])
+        if current is None or score > current["score"]:
+            best[node["id"]] = {"node": node, "score": score, "via": via}
+
+    for result in results:
+        offer(result["node"], result["score"], "hit")
+        for neighbour in result.get("neighbours") or []:
+            weight = REL_WEIGHTS.get(neighbour.get("rel_type"), DEFAULT_REL_WEIGHT)
+            decay = HOP_DECAY ** max(0, (neighbour.get("hop") or 1) - 1)
+            offer(neighbour["node"], result["score"] * weight * decay, neighbour.get("rel_type") or "related")
+
+    if call_graph is not None and FAN_IN_WEIGHT:
+        for node_id, candidate in best.items():
+            candidate["score"] *= 1 + FAN_IN_WEIGHT * math.log1p(call_graph.fan_in(node_id))
+
+    return sorted(best.values(), key=lambda candidate: -candidate["score"])
+
+
+def select_within_budget(
+    candidates: List[Dict],
+    budget: int,
+    cost: Callable[[Dict], int],
+    is_redundant: Optional[Callable[[Dict, List[Dict]], bool]] = None
+) -> List[Dict]:
+    """
+    Greedy knapsack: take candidates by score per unit of cost while they fit,
+    then compare with the single best candidate that fits and keep whichever
+    set scores more (the usual guard that keeps greedy within 2x of optimal).
+    Candidates `is_redundant` flags against the ones already taken are skipped.
+
+    Returns:
+        The chosen candidates, best score first
+    """
+    costs = {id(candidate): max(cost(candidate), 1) for candidate in candidates}
+    by_density = sorted(
+        candidates,
+        key=lambda c: -c["score"] / max(costs[id(c)], MIN_BLOCK_COST)
+    )
+
+    chosen, used = [], 0
+    for candidate in by_density:
+        if is_redundant is not None and is_redundant(candidate, chosen):
+            continue
+        if used + costs[id(candidate)] <= budget:
+            chosen.append(candidate)
+            used += costs[id(candidate)]
+
+    fitting = [c for c in candidates if costs[id(c)] <= budget]
+    if fitting:
+        single = max(fitting, key=lambda c: c["score"])
+        if single["score"] > sum(c["score"] for c in chosen):
+            chosen = [single]
+
+    return sorted(chosen, key=lambda c: -c["score"])
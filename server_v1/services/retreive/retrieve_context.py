@@ -1,101 +1,172 @@
+import re, time, asyncio, textwrap
+from typing import Dict, List, Optional, Tuple
 from core.logging import get_logger
-from services.llm.embedding import get_embeddings
-from db.neo4j_client import get_neo4j_driver
+from services.llm.embedding import get_embeddings_async
+from db.neo4j_client import get_async_neo4j_driver
+from services.vector_store.factory import get_vector_store
+from services.retreive.vector_search import search_and_expand_async, expand_hits_async
+from services.retreive.rerank import score_candidates, select_within_budget
+from services.ingest.helper.symbol_table import get_call_graph
+from services.llm.tokens import count_tokens, get_context_token_budget
+from services.llm.llm import LLM_MODEL
 from fastapi import HTTPException
 
 logger = get_logger(__name__)
-neo4j_driver = get_neo4j_driver()
 
-CONTEXT_THRESHOLD = 6000
+BLOCK_SEPARATOR = "\n---\n"
 
+# Nodes whose text summarises their span instead of holding its code
+SUMMARY_TYPES = ("file", "ROOT")
 
-def retrieve_context(query: str, session_id: str, k: str = 10) -> str:
+
+async def session_exists(session_id: str) -> bool:
+    async with get_async_neo4j_driver().session() as session:
+        result = await session.run(
+            """
+            MATCH (n:CodeNode {session_id: $session_id, ast_type: 'ROOT'})
+            RETURN n.id AS id
+            LIMIT 1
+            """,
+            session_id=session_id
+        )
+        return await result.single() is not None
+
+
+async def search_with_neighbours(session_id: str, query_embedding: List[float], k: int) -> List[Dict]:
+    """
+    Top-k hits with their neighbours, as [{"node", "score", "neighbours"}].
+
+    Vectors on the Neo4j nodes: lookup and expansion are one query. Other
+    backends: the store finds the ids, then one query expands them.
+    """
+    store = get_vector_store()
+
+    async with get_async_neo4j_driver().session() as session:
+        if store.stores_on_nodes:
+            started = time.perf_counter()
+            results = await search_and_expand_async(session, query_embedding, session_id, k)
+            store.record_latency(started)
+            return results
+
+        hits = await store.search_async(session_id, query_embedding, k)
+        return await expand_hits_async(session, hits, session_id)
+
+
+def compact_code(code: str) -> str:
+    """Dedented code without trailing spaces or runs of blank lines."""
+    code = (code or "").expandtabs(4)
+    first, _, rest = code.partition("\n")
+    body_lines = [line for line in rest.splitlines() if line.strip()]
+    if body_lines and not first[:1].isspace() and all(line[:1].isspace() for line in body_lines):
+        # Snippets start at the node, so a nested definition lost the indentation
+        # of its first line only; its body is dedented on its own and kept one
+        # level under it. Code whose lines start at column 0 is left as it is.
+        rest = textwrap.indent(textwrap.dedent(rest), "    ")
+        code = first + "\n" + rest
+    else:
+        code = textwrap.dedent(code)
+    code = "\n".join(line.rstrip() for line in code.splitlines())
+    return re.sub(r"\n{3,}", "\n\n", code).strip()
+
+
+def format_block(node: Dict, code: str) -> str:
+    return (
+        f"{BLOCK_SEPARATOR}"
+        f"Name: {node['name']}\n"
+        f"Type: {node['ast_type']}\n"
+        f"File: {node['file']}\n"
+        f"Code:\n{code}\n"
+    )
+
+
+def code_key(code: str) -> str:
+    """Whitespace insensitive form, so copies of one snippet under several nodes match."""
+    return " ".join(code.split())
+
+
+def code_span(node: Dict) -> Optional[Tuple[str, int, int]]:
+    """
+    (file, start_byte, end_byte) of the source a node holds. None for nodes
+    without a span, and for file and ROOT nodes, whose text only describes it.
+    """
+    if node.get("ast_type") in SUMMARY_TYPES or node.get("start_byte") is None or node.get("end_byte") is None:
+        return None
+    return node.get("file"), node["start_byte"], node["end_byte"]
+
+
+def is_redundant(candidate: Dict, chosen: List[Dict]) -> bool:
+    """
+    Code already in the context: the candidate's span overlaps a chosen one
+    of the same file, e.g. a method whose class block was taken, or a class
+    one of whose methods was.
+    """
+    span = candidate["span"]
+    if span is None:
+        return False
+    file, start, end = span
+    return any(
+        taken["span"] is not None
+        and taken["span"][0] == file
+        and taken["span"][1] < end
+        and start < taken["span"][2]
+        for taken in chosen
+    )
+
+
+async def retrieve_context(
+    query: str,
+    session_id: str,
+    k: int = 10,
+    query_embedding: Optional[List[float]] = None
+) -> Tuple[str, List[str]]:
+    """
+    Build the LLM context for a query.
+
+    Returns:
+        (context text, ids of the nodes that made it into the context)
+    """
     try:
-        logger.info(f"Embedding query: {query}")
-        query_embedding = get_embeddings([query])[0]
-
-        # staritn session
-        with neo4j_driver.session() as session:
-            # Fetching top 
-            result = session.run(
-                """
-                CALL db.index.vector.queryNodes("code_embeddings", $k, $query_vector)
-                YIELD node, score
-                WHERE node.session_id = $session_id
-                RETURN node, score
-                ORDER BY score DESC
-                """,
-                query_vector=query_embedding,
-                session_id=session_id,
-                k=k
-            )
-
-            top_nodes = [record["node"] for record in result]
-            logger.info(f"Top nodes found: {len(top_nodes)}")
-
-            if not top_nodes:
-                return f"Query: {query}\nNo relevant nodes found."
-
-            top_ids = [node["id"] for node in top_nodes]
-
-            # Fetch neighbours
-            rel_result = session.run(
-                """
-                MATCH (n:CodeNode)
-                WHERE n.session_id = $session_id AND n.id IN $top_ids
-
-                MATCH (n)-[r]->(m:CodeNode)
-                WHERE m.session_id = $session_id
-
-                RETURN n AS source_node, m AS target_node, type(r) AS rel_type
-                """,
-                top_ids=top_ids,
-                session_id=session_id
-            )
-
-            # Collect unique related nodes (avoid duplicates)
-            related_nodes = []
-            seen_ids = set()
-
-            for record in rel_result:
-                m = record["target_node"]
-                if m["id"] not in seen_ids:
-                    related_nodes.append(m)
-                    seen_ids.add(m["id"])
-
-            logger.info(f"Related outward neighbor nodes: {len(related_nodes)}")
-
-
-        all_nodes = top_nodes + [n for n in related_nodes if n not in top_nodes]
-
-        context_parts = ""
-        current_length = len(context_parts)
-        nodes_added = 0
-
-        for node in all_nodes:
-            block = f"""
-                Name: {node['name']}
-                Type: {node['ast_type']}
-                File: {node['file']}
-                Code: {node['code_str']}
-                """
-            block = "\n---------------------------------------------------------------------------\n" + block
-
-            block_len = len(block)
-
-            if current_length + block_len > CONTEXT_THRESHOLD:
-                logger.info(
-                    f"Threshold reached. Added {nodes_added} nodes out of {len(all_nodes)}"
-                )
-                break
-
-            context_parts += block
-            current_length += block_len
-            nodes_added += 1
-
-
-        logger.info(f"Final context length: {current_length} (nodes added: {nodes_added})")
-        return context_parts
+        if query_embedding is None:
+            logger.info(f"Embedding query: {query}")
+            query_embedding = (await get_embeddings_async([query]))[0]
+
+        # Fetching top k of this session only, with their neighbours
+        results = await search_with_neighbours(session_id, query_embedding, k)
+        logger.info(f"Top nodes found: {len(results)}")
+
+        if not results:
+            return f"Query: {query}\nNo relevant nodes found.", []
+
+        call_graph = await asyncio.to_thread(get_call_graph, session_id)
+        candidates = score_candidates(results, call_graph=call_graph)
+        logger.info(f"Candidates after merging neighbours: {len(candidates)}")
+
+        # Identical code (same snippet under several nodes) keeps only its best scored copy
+        unique_candidates, seen_code = [], set()
+        for candidate in candidates:
+            candidate["code"] = compact_code(candidate["node"].get("code_str"))
+            candidate["code_key"] = code_key(candidate["code"])
+            if candidate["code_key"] in seen_code:
+                continue
+            seen_code.add(candidate["code_key"])
+            candidate["span"] = code_span(candidate["node"])
+            candidate["block"] = format_block(candidate["node"], candidate["code"])
+            candidate["tokens"] = count_tokens(candidate["block"])
+            unique_candidates.append(candidate)
+        candidates = unique_candidates
+
+        budget = get_context_token_budget(LLM_MODEL)
+        chosen = select_within_budget(candidates, budget, lambda c: c["tokens"], is_redundant=is_redundant)
+        context_parts = "".join(candidate["block"] for candidate in chosen)
+        context_ids = [candidate["node"]["id"] for candidate in chosen]
+
+        logger.info(
+            f"Final context: ~{sum(c['tokens'] for c in chosen)} of {budget} tokens, "
+            f"{len(context_parts)} chars "
+            f"(nodes added: {len(chosen)} of {len(candidates)}, "
+            f"via {sorted(set(c['via'] for c in chosen))})"
+        )
+        return context_parts, context_ids
 
     except Exception as e:
         logger.error(f"Retrieval error: {e}")
@@ -0,0 +1,289 @@
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from core.logging import get_logger
+from db.neo4j_client import session_vector_index
+
+logger = get_logger(__name__)
+
+GLOBAL_VECTOR_INDEX = "code_embeddings"
+
+# Adaptive over-fetch on the shared index: first ask for k * factor, then grow
+# by `factor` until k in-session hits are found or the cap is reached
+OVERFETCH_FACTOR = int(os.getenv("VECTOR_OVERFETCH_FACTOR") or 4)
+OVERFETCH_MAX = int(os.getenv("VECTOR_OVERFETCH_MAX") or 4096)
+
+
+# Node properties sent back to the client, everything else (the embedding
+# above all) stays on the server
+NODE_PROJECTION = "{.id, .name, .ast_type, .file, .code_str, .start_line, .start_byte, .end_byte}"
+
+SESSION_INDEX_QUERY = f"""
+CALL db.index.vector.queryNodes($index_name, $k, $query_vector)
+YIELD node, score
+RETURN node {NODE_PROJECTION} AS node, score
+ORDER BY score DESC
+"""
+
+GLOBAL_INDEX_QUERY = f"""
+CALL db.index.vector.queryNodes($index_name, $fetch, $query_vector)
+YIELD node, score
+WITH collect({{node: node, score: score}}) AS hits
+RETURN size(hits) AS fetched,
+       [hit IN hits WHERE hit.node.session_id = $session_id
+        | {{node: hit.node {NODE_PROJECTION}, score: hit.score}}] AS matches
+"""
+
+# Neighbour expansion around the hits
+RETRIEVE_HOPS = min(2, max(1, int(os.getenv("RETRIEVE_HOPS") or 1)))
+# Comma separated relationship types to follow, all types when empty
+RETRIEVE_REL_TYPES = [t.strip().upper() for t in (os.getenv("RETRIEVE_REL_TYPES") or "").split(",") if t.strip()]
+RETRIEVE_MAX_NEIGHBOURS = int(os.getenv("RETRIEVE_MAX_NEIGHBOURS") or 25)
+
+
+def expansion_subquery(hops: int) -> str:
+    """
+    Per-hit subquery collecting up to $max_neighbours outward neighbours
+    within `hops`, closest first, as {node, rel_type, hop}. rel_type is the
+    type of the edge that reaches the neighbour.
+    """
+    # Variable length bounds can't be parameters, so the validated int is inlined
+    return f"""
+    CALL {{
+        WITH node
+        OPTIONAL MATCH (node)-[rels*1..{int(hops)}]->(m:CodeNode)
+        WHERE m.session_id = $session_id AND m <> node
+          AND ($rel_types IS NULL OR all(r IN rels WHERE type(r) IN $rel_types))
+        WITH m, rels
+        ORDER BY size(rels)
+        WITH m, min(size(rels)) AS hop, head(collect(type(last(rels)))) AS rel_type
+        ORDER BY hop
+        LIMIT $max_neighbours
+        RETURN collect(CASE WHEN m IS NULL THEN null
+                       ELSE {{node: m {NODE_PROJECTION}, rel_type: rel_type, hop: hop}} END) AS neighbours
+    }}
+    """
+
+
+def expansion_params(hops: Optional[int], rel_types: Optional[List[str]], max_neighbours: Optional[int]) -> Tuple[int, Dict]:
+    hops = RETRIEVE_HOPS if hops is None else min(2, max(1, hops))
+    rel_types = RETRIEVE_REL_TYPES if rel_types is None else rel_types
+    return hops, {
+        "rel_types": rel_types or None,
+        "max_neighbours": RETRIEVE_MAX_NEIGHBOURS if max_neighbours is None else max_neighbours,
+    }
+
+
+def next_fetch(fetch: int, fetched: int, found: int, k: int, factor: int, max_fetch: int) -> Optional[int]:
+    """Fetch size of the next over-fetch round, None when the search is done."""
+    # Done when satisfied, when the index has nothing more, or at the cap
+    if found >= k or fetched < fetch or fetch >= max_fetch:
+        return None
+    return min(fetch * factor, max_fetch)
+
+
+def adaptive_overfetch(
+    search: Callable[[int], Tuple[int, List]],
+    k: int,
+    factor: int = OVERFETCH_FACTOR,
+    max_fetch: int = OVERFETCH_MAX
+) -> Tuple[List, Dict]:
+    """
+    Grow the global top-n until it holds k hits of the wanted session.
+
+    Args:
+        search: Called with n, returns (number of global hits, in-session hits)
+        k: Wanted in-session hits
+
+    Returns:
+        (first k in-session hits, stats dict with rounds and final fetch size)
+    """
+    fetch = max(k, k * factor)
+    rounds = 0
+
+    while True:
+        rounds += 1
+        fetched, matches = search(fetch)
+        following = next_fetch(fetch, fetched, len(matches), k, factor, max_fetch)
+        if following is None:
+            break
+        fetch = following
+
+    return matches[:k], {"rounds": rounds, "fetch": fetch, "found": len(matches)}
+
+
+async def adaptive_overfetch_async(
+    search: Callable[[int], Awaitable[Tuple[int, List]]],
+    k: int,
+    factor: int = OVERFETCH_FACTOR,
+    max_fetch: int = OVERFETCH_MAX
+) -> Tuple[List, Dict]:
+    """adaptive_overfetch with an awaitable search."""
+    fetch = max(k, k * factor)
+    rounds = 0
+
+    while True:
+        rounds += 1
+        fetched, matches = await search(fetch)
+        following = next_fetch(fetch, fetched, len(matches), k, factor, max_fetch)
+        if following is None:
+            break
+        fetch = following
+
+    return matches[:k], {"rounds": rounds, "fetch": fetch, "found": len(matches)}
+
+
+def query_top_nodes(session, query_embedding: List[float], session_id: str, k: int) -> List[Dict]:
+    """
+    Top-k nodes of one session as [{"node": ..., "score": ...}], best first.
+
+    Uses the session's own vector index when it exists, and falls back to
+    adaptive over-fetch on the global index, which only exists when the
+    server runs with SESSION_VECTOR_INDEXES=0.
+    """
+    try:
+        result = session.run(
+            SESSION_INDEX_QUERY,
+            index_name=session_vector_index(session_id),
+            k=k,
+            query_vector=query_embedding
+        )
+        return [{"node": record["node"], "score": record["score"]} for record in result]
+    except Exception as e:
+        logger.info(f"Session vector index unavailable, using global index: {e}")
+
+    def search(fetch: int):
+        record = session.run(
+            GLOBAL_INDEX_QUERY,
+            index_name=GLOBAL_VECTOR_INDEX,
+            fetch=fetch,
+            query_vector=query_embedding,
+            session_id=session_id
+        ).single()
+        return record["fetched"], record["matches"]
+
+    matches, stats = adaptive_overfetch(search, k)
+    logger.info(f"Global index over-fetch: {stats}")
+    return matches
+
+
+async def query_top_nodes_async(
+    session,
+    query_embedding: List[float],
+    session_id: str,
+    k: int,
+    use_session_index: bool = True
+) -> List[Dict]:
+    """query_top_nodes on an async Neo4j session."""
+    if use_session_index:
+        try:
+            result = await session.run(
+                SESSION_INDEX_QUERY,
+                index_name=session_vector_index(session_id),
+                k=k,
+                query_vector=query_embedding
+            )
+            return [{"node": record["node"], "score": record["score"]} async for record in result]
+        except Exception as e:
+            logger.info(f"Session vector index unavailable, using global index: {e}")
+
+    async def search(fetch: int):
+        result = await session.run(
+            GLOBAL_INDEX_QUERY,
+            index_name=GLOBAL_VECTOR_INDEX,
+            fetch=fetch,
+            query_vector=query_embedding,
+            session_id=session_id
+        )
+        record = await result.single()
+        return record["fetched"], record["matches"]
+
+    matches, stats = await adaptive_overfetch_async(search, k)
+    logger.info(f"Global index over-fetch: {stats}")
+    return matches
+
+
+async def expand_hits_async(
+    session,
+    hits: List[Dict],
+    session_id: str,
+    hops: Optional[int] = None,
+    rel_types: Optional[List[str]] = None,
+    max_neighbours: Optional[int] = None
+) -> List[Dict]:
+    """
+    Projected nodes and neighbours of already known hits in one query.
+
+    Returns:
+        [{"node", "score", "neighbours"}] in hit order, hits missing from the graph dropped
+    """
+    if not hits:
+        return []
+
+    hops, params = expansion_params(hops, rel_types, max_neighbours)
+    result = await session.run(
+        f"""
+        UNWIND range(0, size($ids) - 1) AS rank
+        MATCH (node:CodeNode {{session_id: $session_id, id: $ids[rank]}})
+        {expansion_subquery(hops)}
+        RETURN rank, node {NODE_PROJECTION} AS node, neighbours
+        ORDER BY rank
+        """,
+        ids=[hit["id"] for hit in hits],
+        session_id=session_id,
+        **params
+    )
+    return [
+        {"node": record["node"], "score": hits[record["rank"]]["score"], "neighbours": record["neighbours"]}
+        async for record in result
+    ]
+
+
+async def search_and_expand_async(
+    session,
+    query_embedding: List[float],
+    session_id: str,
+    k: int,
+    hops: Optional[int] = None,
+    rel_types: Optional[List[str]] = None,
+    max_neighbours: Optional[int] = None
+) -> List[Dict]:
+    """
+    Vector lookup plus neighbour expansion in a single round trip, using the
+    session's vector index. Sessions without one fall back to over-fetch on
+    the global index followed by expand_hits_async.
+
+    Returns:
+        [{"node", "score", "neighbours"}], best first
+    """
+    expansion_hops, params = expansion_params(hops, rel_types, max_neighbours)
+    try:
+        result = await session.run(
+            f"""
+            CALL db.index.vector.queryNodes($index_name, $k, $query_vector)
+            YIELD node, score
+            {expansion_subquery(expansion_hops)}
+            RETURN node {NODE_PROJECTION} AS node, score, neighbours
+            ORDER BY score DESC
+            """,
+            index_name=session_vector_index(session_id),
+            k=k,
+            query_vector=query_embedding,
+            session_id=session_id,
+            **params
+        )
+        return [
+            {"node": record["node"], "score": record["score"], "neighbours": record["neighbours"]}
+            async for record in result
+        ]
+    except Exception as e:
+        logger.info(f"Session vector index unavailable, using global index: {e}")
+
+    hits = await query_top_nodes_async(session, query_embedding, session_id, k, use_session_index=False)
+    return await expand_hits_async(
+        session,
+        [{"id": hit["node"]["id"], "score": hit["score"]} for hit in hits],
+        session_id,
+        hops=hops,
+        rel_types=rel_types,
+        max_neighbours=max_neighbours
+    )
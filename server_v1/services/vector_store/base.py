@@ -0,0 +1,91 @@
+import time, asyncio, threading
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, List, Optional
+
+# Query latencies kept per backend for the p50/p99 report
+LATENCY_WINDOW = 2000
+
+
+class VectorStore(ABC):
+    """
+    Session scoped vector store. Hits are dicts with "id" and "score", best
+    first; backends that already hold the graph node may add it as "node".
+    """
+
+    name = "base"
+
+    # True when embeddings live on the Neo4j nodes themselves, so storage
+    # writes them with the node instead of calling upsert()
+    stores_on_nodes = False
+
+    def __init__(self):
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._latency_lock = threading.Lock()
+
+    @abstractmethod
+    def upsert(self, session_id: str, ids: List[str], vectors: List[List[float]]):
+        ...
+
+    @abstractmethod
+    def query(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        ...
+
+    @abstractmethod
+    def delete(self, session_id: str, ids: List[str]):
+        ...
+
+    @abstractmethod
+    def delete_session(self, session_id: str):
+        ...
+
+    def append(self, session_id: str, ids: List[str], vectors: List[List[float]]):
+        """
+        upsert() for one batch of an ingest still running. Backends that
+        rewrite the whole session on every write hold the rows until flush().
+        """
+        self.upsert(session_id, ids, vectors)
+
+    def flush(self, session_id: str):
+        """Write the rows append() held back, once every batch of the session is in."""
+
+    async def query_async(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        """Awaitable query(), backends without an async client run it on a worker thread."""
+        return await asyncio.to_thread(self.query, session_id, vector, k)
+
+    def search(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        """query() with its latency recorded."""
+        started = time.perf_counter()
+        try:
+            return self.query(session_id, vector, k)
+        finally:
+            self.record_latency(started)
+
+    async def search_async(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        """query_async() with its latency recorded."""
+        started = time.perf_counter()
+        try:
+            return await self.query_async(session_id, vector, k)
+        finally:
+            self.record_latency(started)
+
+    def record_latency(self, started: float):
+        with self._latency_lock:
+            self._latencies.append((time.perf_counter() - started) * 1000)
+
+    def latency_stats(self) -> Dict[str, Optional[float]]:
+        with self._latency_lock:
+            samples = sorted(self._latencies)
+
+        if not samples:
+            return {"backend": self.name, "queries": 0, "p50_ms": None, "p99_ms": None}
+
+        def percentile(p: float) -> float:
+            return round(samples[min(len(samples) - 1, int(p * len(samples)))], 2)
+
+        return {
+            "backend": self.name,
+            "queries": len(samples),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+        }
@@ -0,0 +1,32 @@
+import os, threading
+from core.logging import get_logger
+from services.vector_store.base import VectorStore
+
+logger = get_logger(__name__)
+
+# neo4j (default), local or pinecone
+VECTOR_BACKEND = (os.getenv("VECTOR_BACKEND") or "neo4j").lower()
+
+__vector_store = None
+__store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    global __vector_store
+
+    with __store_lock:
+        if __vector_store is None:
+            if VECTOR_BACKEND == "local":
+                from services.vector_store.local_store import LocalVectorStore
+                __vector_store = LocalVectorStore()
+            elif VECTOR_BACKEND == "pinecone":
+                from services.vector_store.pinecone_store import PineconeVectorStore
+                __vector_store = PineconeVectorStore()
+            elif VECTOR_BACKEND == "neo4j":
+                from services.vector_store.neo4j_store import Neo4jVectorStore
+                __vector_store = Neo4jVectorStore()
+            else:
+                raise ValueError(f"Unknown VECTOR_BACKEND : {VECTOR_BACKEND}")
+            logger.info(f"Using {__vector_store.name} vector store")
+
+    return __vector_store
@@ -0,0 +1,230 @@
+import os, json, shutil, threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from core.logging import get_logger
+from services.vector_store.base import VectorStore
+
+logger = get_logger(__name__)
+
+LOCAL_VECTOR_DIR = os.getenv("LOCAL_VECTOR_DIR") or os.path.join("data", "vectors")
+
+# Sessions up to this size are searched exactly, bigger ones through an IVF index
+LOCAL_IVF_THRESHOLD = int(os.getenv("LOCAL_IVF_THRESHOLD") or 20000)
+LOCAL_IVF_NPROBE = int(os.getenv("LOCAL_IVF_NPROBE") or 16)
+
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64
+ASSIGN_CHUNK_ROWS = 65536
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    """Unit rows, so a dot product is the cosine similarity."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k best scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores)
+    candidates = np.argpartition(-scores, k)[:k]
+    return candidates[np.argsort(-scores[candidates])]
+
+
+def assign_to_centroids(matrix: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    assignments = np.empty(len(matrix), dtype=np.int32)
+    for i in range(0, len(matrix), ASSIGN_CHUNK_ROWS):
+        assignments[i:i+ASSIGN_CHUNK_ROWS] = np.argmax(matrix[i:i+ASSIGN_CHUNK_ROWS] @ centroids.T, axis=1)
+    return assignments
+
+
+def train_ivf(matrix: np.ndarray, nlist: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Spherical k-means on a sample of the rows, then an inverted list layout:
+    `order` holds row numbers grouped by list, list c is order[offsets[c]:offsets[c+1]].
+    """
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(matrix), nlist * KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(matrix[rng.choice(len(matrix), sample_size, replace=False)])
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=nlist)
+
+        # Empty lists get re-seeded from random sample rows
+        empty = counts == 0
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = normalize(sums)
+
+    assignments = assign_to_centroids(matrix, centroids)
+    order = np.argsort(assignments, kind="stable").astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))]).astype(np.int64)
+    return {"centroids": centroids, "order": order, "offsets": offsets}
+
+
+class SessionVectors:
+    """One session's vectors, ids and optional IVF lists, as loaded from disk."""
+
+    def __init__(self, ids: List[str], matrix: np.ndarray, ivf: Optional[Dict[str, np.ndarray]] = None):
+        self.ids = ids
+        self.matrix = matrix
+        self.ivf = ivf
+
+    def search(self, query: np.ndarray, k: int, nprobe: int) -> List[Dict]:
+        if not self.ids:
+            return []
+
+        if self.ivf is None:
+            rows = None
+            scores = self.matrix @ query
+        else:
+            centroids, order, offsets = self.ivf["centroids"], self.ivf["order"], self.ivf["offsets"]
+            probe = top_k(centroids @ query, min(nprobe, len(centroids)))
+            # Sorted rows keep the memory-mapped reads sequential
+            rows = np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe]))
+            scores = self.matrix[rows] @ query
+
+        best = top_k(scores, k)
+        return [
+            {"id": self.ids[int(i if rows is None else rows[i])], "score": float(scores[i])}
+            for i in best
+        ]
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store. Each session is a contiguous float32 matrix saved
+    under LOCAL_VECTOR_DIR/<session_id>/ and memory-mapped for search. Small
+    sessions are searched exactly, sessions past LOCAL_IVF_THRESHOLD vectors
+    through an IVF (k-means inverted lists) index probing LOCAL_IVF_NPROBE lists.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        root: str = LOCAL_VECTOR_DIR,
+        ivf_threshold: int = LOCAL_IVF_THRESHOLD,
+        nprobe: int = LOCAL_IVF_NPROBE
+    ):
+        super().__init__()
+        self.root = root
+        self.ivf_threshold = ivf_threshold
+        self.nprobe = nprobe
+        self._sessions: Dict[str, SessionVectors] = {}
+        # Rows appended by an ingest in progress, saved (and the IVF trained) once on flush()
+        self._pending: Dict[str, List[Tuple[List[str], np.ndarray]]] = {}
+        self._lock = threading.Lock()
+
+    def _session_dir(self, session_id: str) -> str:
+        return os.path.join(self.root, os.path.basename(session_id))
+
+    def _load(self, session_id: str) -> SessionVectors:
+        with self._lock:
+            cached = self._sessions.get(session_id)
+        if cached is not None:
+            return cached
+
+        session_dir = self._session_dir(session_id)
+        ids_path = os.path.join(session_dir, "ids.json")
+        if not os.path.isfile(ids_path):
+            return SessionVectors([], np.zeros((0, 0), dtype=np.float32))
+
+        with open(ids_path) as f:
+            ids = json.load(f)
+        matrix = np.load(os.path.join(session_dir, "vectors.npy"), mmap_mode="r")
+
+        ivf = None
+        ivf_path = os.path.join(session_dir, "ivf.npz")
+        if os.path.isfile(ivf_path):
+            with np.load(ivf_path) as data:
+                ivf = {key: data[key] for key in data.files}
+
+        loaded = SessionVectors(ids, matrix, ivf)
+        with self._lock:
+            self._sessions[session_id] = loaded
+        return loaded
+
+    def _save(self, session_id: str, ids: List[str], matrix: np.ndarray):
+        session_dir = self._session_dir(session_id)
+        os.makedirs(session_dir, exist_ok=True)
+
+        # Write to temp files first so a concurrent reader never sees half a session
+        np.save(os.path.join(session_dir, "vectors.tmp.npy"), matrix)
+        with open(os.path.join(session_dir, "ids.tmp.json"), "w") as f:
+            json.dump(ids, f)
+
+        ivf_path = os.path.join(session_dir, "ivf.npz")
+        if len(ids) > self.ivf_threshold:
+            nlist = max(1, int(np.sqrt(len(ids))))
+            logger.info(f"Training IVF index with {nlist} lists for {len(ids)} vectors")
+            np.savez(os.path.join(session_dir, "ivf.tmp.npz"), **train_ivf(matrix, nlist))
+            os.replace(os.path.join(session_dir, "ivf.tmp.npz"), ivf_path)
+        elif os.path.isfile(ivf_path):
+            os.remove(ivf_path)
+
+        os.replace(os.path.join(session_dir, "vectors.tmp.npy"), os.path.join(session_dir, "vectors.npy"))
+        os.replace(os.path.join(session_dir, "ids.tmp.json"), os.path.join(session_dir, "ids.json"))
+
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def upsert(self, session_id: str, ids: List[str], vectors: List[List[float]]):
+        if not ids:
+            return
+
+        current = self._load(session_id)
+        new_matrix = normalize(np.asarray(vectors, dtype=np.float32))
+
+        # Replaced ids are dropped from the old rows, new rows are appended
+        replaced = set(ids)
+        keep = [i for i, node_id in enumerate(current.ids) if node_id not in replaced]
+        all_ids = [current.ids[i] for i in keep] + list(ids)
+        if keep:
+            matrix = np.vstack([np.asarray(current.matrix[keep]), new_matrix])
+        else:
+            matrix = new_matrix
+
+        self._save(session_id, all_ids, matrix)
+        logger.info(f"Stored {len(ids)} vectors for session {session_id} ({len(all_ids)} total)")
+
+    def append(self, session_id: str, ids: List[str], vectors: List[List[float]]):
+        if not ids:
+            return
+        rows = normalize(np.asarray(vectors, dtype=np.float32))
+        with self._lock:
+            self._pending.setdefault(session_id, []).append((list(ids), rows))
+
+    def flush(self, session_id: str):
+        with self._lock:
+            pending = self._pending.pop(session_id, [])
+        if pending:
+            self.upsert(
+                session_id,
+                [node_id for ids, _ in pending for node_id in ids],
+                np.vstack([rows for _, rows in pending])
+            )
+
+    def query(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        query = normalize(np.asarray([vector], dtype=np.float32))[0]
+        return self._load(session_id).search(query, k, self.nprobe)
+
+    def delete(self, session_id: str, ids: List[str]):
+        current = self._load(session_id)
+        removed = set(ids)
+        keep = [i for i, node_id in enumerate(current.ids) if node_id not in removed]
+        if len(keep) == len(current.ids):
+            return
+
+        matrix = np.asarray(current.matrix[keep]) if keep else np.zeros((0, current.matrix.shape[1]), dtype=np.float32)
+        self._save(session_id, [current.ids[i] for i in keep], matrix)
+
+    def delete_session(self, session_id: str):
+        shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._pending.pop(session_id, None)
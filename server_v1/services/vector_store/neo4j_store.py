@@ -0,0 +1,39 @@
+from typing import Dict, List
+from core.logging import get_logger
+from db.neo4j_client import get_neo4j_driver, get_async_neo4j_driver
+from services.vector_store.base import VectorStore
+from services.retreive.vector_search import query_top_nodes, query_top_nodes_async
+
+logger = get_logger(__name__)
+
+
+class Neo4jVectorStore(VectorStore):
+    """Embeddings stored as a property of the CodeNode, searched with Neo4j vector indexes."""
+
+    name = "neo4j"
+    stores_on_nodes = True
+
+    def __init__(self):
+        super().__init__()
+        self.driver = get_neo4j_driver()
+
+    def upsert(self, session_id: str, ids: List[str], vectors: List[List[float]]):
+        # Written together with the node properties by storage
+        pass
+
+    def query(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        with self.driver.session() as session:
+            hits = query_top_nodes(session, vector, session_id, k)
+        return [{"id": hit["node"]["id"], "score": hit["score"], "node": hit["node"]} for hit in hits]
+
+    async def query_async(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        async with get_async_neo4j_driver().session() as session:
+            hits = await query_top_nodes_async(session, vector, session_id, k)
+        return [{"id": hit["node"]["id"], "score": hit["score"], "node": hit["node"]} for hit in hits]
+
+    def delete(self, session_id: str, ids: List[str]):
+        # Goes away with the node
+        pass
+
+    def delete_session(self, session_id: str):
+        pass
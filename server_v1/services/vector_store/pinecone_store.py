@@ -0,0 +1,43 @@
+import os
+from typing import Dict, List
+from core.logging import get_logger
+from services.vector_store.base import VectorStore
+
+logger = get_logger(__name__)
+
+UPSERT_BATCH_SIZE = 100
+
+
+class PineconeVectorStore(VectorStore):
+    """One Pinecone index (PINECONE_INDEX), one namespace per session."""
+
+    name = "pinecone"
+
+    def __init__(self):
+        super().__init__()
+        # Optional dependency, only needed with VECTOR_BACKEND=pinecone
+        from pinecone import Pinecone
+
+        api_key = os.getenv("PINECONE_API_KEY")
+        if not api_key:
+            raise ValueError("PINECONE_API_KEY not found in environment variables")
+
+        index_name = os.getenv("PINECONE_INDEX") or "coderag"
+        self.index = Pinecone(api_key=api_key).Index(index_name)
+
+    def upsert(self, session_id: str, ids: List[str], vectors: List[List[float]]):
+        items = list(zip(ids, vectors))
+        for i in range(0, len(items), UPSERT_BATCH_SIZE):
+            self.index.upsert(vectors=items[i:i+UPSERT_BATCH_SIZE], namespace=session_id)
+        logger.info(f"Upserted {len(items)} vectors to pinecone namespace {session_id}")
+
+    def query(self, session_id: str, vector: List[float], k: int) -> List[Dict]:
+        result = self.index.query(vector=vector, top_k=k, namespace=session_id)
+        return [{"id": match["id"], "score": match["score"]} for match in result.get("matches", [])]
+
+    def delete(self, session_id: str, ids: List[str]):
+        for i in range(0, len(ids), UPSERT_BATCH_SIZE):
+            self.index.delete(ids=ids[i:i+UPSERT_BATCH_SIZE], namespace=session_id)
+
+    def delete_session(self, session_id: str):
+        self.index.delete(delete_all=True, namespace=session_id)